@@ -0,0 +1,635 @@
+"""
+Vectorized aggregations over training attempt data.
+
+Every report table is built from per-group sums and counts computed in a
+single groupby pass, so the cost grows with the number of rows rather
+than with the number of groups. Sums and counts also combine by simple
+addition, which lets partial results from separate chunks of history be
+merged before the rates are derived.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics import confusion
+from src.audio import pitch
+from src.data.schema import parse_timestamps, to_bool_int
+from src.data.tasks import read_task_table
+from src.data.timeseries import DEFAULT_WINDOW
+
+# Additive per-group totals everything else is derived from
+SUM_COLUMNS = [
+    "attempts", "correct", "attempt_total", "play_again_total",
+    "first_tries", "first_try_correct"
+]
+
+NOTE_KEYS = ["correct_note_name", "correct_octave"]
+
+# Partial tables that are merged by summing (start/end by min/max)
+PARTIAL_TABLES = ["totals", "groups", "sessions", "notes", "daily"]
+
+# Tasks kept for the recent progress figure
+RECENT_TASKS = DEFAULT_WINDOW
+
+# Columns the aggregations read
+ANALYSIS_COLUMNS = [
+    "session_id", "task_id", "timestamp", "correct_note_name", "correct_octave",
+    "correct_midi", "guessed_midi", "is_correct", "attempt_number",
+    "play_again_count", "note_group"
+]
+
+
+def group_codes(df, keys):
+    """
+    Factorize group keys into dense integer codes.
+
+    Args:
+        df (pd.DataFrame): Attempt rows
+        keys (str, pd.Series or list): Column name(s) or Series to group by
+
+    Returns:
+        tuple: (codes per row, -1 where a key is missing; sorted pd.Index of groups)
+    """
+    if isinstance(keys, (str, pd.Series)):
+        keys = [keys]
+    columns = [k if isinstance(k, pd.Series) else df[k] for k in keys]
+
+    codes = np.zeros(len(df), dtype=np.int64)
+    missing = np.zeros(len(df), dtype=bool)
+    levels = []
+    for column in columns:
+        column_codes, uniques = pd.factorize(column, sort=True)
+        if isinstance(uniques.dtype, pd.CategoricalDtype):
+            # Label groups by value so tables look the same however keys were read
+            uniques = uniques.categories[uniques.codes]
+        missing |= column_codes < 0
+        codes = codes * len(uniques) + column_codes
+        levels.append(uniques)
+    codes[missing] = -1
+    if len(levels) == 1:
+        return codes, pd.Index(levels[0], name=columns[0].name)
+
+    # Keep only key combinations that occur, renumbered densely in sorted order
+    valid = codes[~missing]
+    combinations = int(np.prod([len(u) for u in levels]))
+    if combinations <= max(len(valid), 1 << 16):
+        present = np.bincount(valid, minlength=combinations) > 0
+        used = np.flatnonzero(present)
+        codes[~missing] = (np.cumsum(present) - 1)[valid]
+    else:
+        used, codes[~missing] = np.unique(valid, return_inverse=True)
+    positions = []
+    for uniques in reversed(levels):
+        positions.append(used % len(uniques))
+        used = used // len(uniques)
+    arrays = [uniques[pos] for uniques, pos in zip(levels, reversed(positions))]
+    return codes, pd.MultiIndex.from_arrays(arrays, names=[c.name for c in columns])
+
+
+def attempt_sums(df, keys):
+    """
+    Compute additive totals per group.
+
+    Args:
+        df (pd.DataFrame): Attempt rows
+        keys (str, pd.Series or list): Column name(s) or Series to group by
+
+    Returns:
+        pd.DataFrame: SUM_COLUMNS indexed by the group keys (sorted)
+    """
+    return _sums(df, *group_codes(df, keys))
+
+
+def _sums(df, codes, index):
+    """Sum SUM_COLUMNS per group code with bincount."""
+    valid = codes >= 0
+    codes = codes[valid]
+    is_correct = df["is_correct"].to_numpy(dtype=bool)[valid]
+    attempt_number = df["attempt_number"].to_numpy(dtype=np.int64)[valid]
+    first_try = attempt_number == 1
+
+    def total(weights=None):
+        counts = np.bincount(codes, weights=weights, minlength=len(index))
+        return counts.round().astype(np.int64)
+
+    return pd.DataFrame({
+        "attempts": total(),
+        "correct": total(is_correct),
+        "attempt_total": total(attempt_number),
+        "play_again_total": total(df["play_again_count"].to_numpy(dtype=np.int64)[valid]),
+        "first_tries": total(first_try),
+        "first_try_correct": total(first_try & is_correct),
+    }, index=index)
+
+
+def completed_tasks(df, keys):
+    """
+    Count distinct tasks with a correct answer per group.
+
+    Args:
+        df (pd.DataFrame): Attempt rows
+        keys (str, pd.Series or list): Column name(s) or Series to group by
+
+    Returns:
+        pd.Series: Number of completed tasks per group (0 for groups without any)
+    """
+    return _completed(df, *group_codes(df, keys))
+
+
+def _completed(df, codes, index):
+    """Count distinct correctly answered task ids per group code."""
+    correct = df["is_correct"].to_numpy(dtype=bool) & (codes >= 0)
+    tasks = pd.Series(df["task_id"].to_numpy()[correct])
+    per_code = tasks.groupby(codes[correct]).nunique()
+    counts = np.zeros(len(index), dtype=np.int64)
+    counts[per_code.index.to_numpy()] = per_code.to_numpy()
+    return pd.Series(counts, index=index)
+
+
+def rates(sums):
+    """
+    Derive per-group rates from additive totals.
+
+    Args:
+        sums (pd.DataFrame): Output of attempt_sums (or merged partials)
+
+    Returns:
+        pd.DataFrame: Success_Rate, Avg_Attempts and Avg_Play_Again per group
+    """
+    return pd.DataFrame({
+        "Success_Rate": sums["correct"] / sums["attempts"],
+        "Avg_Attempts": sums["attempt_total"] / sums["attempts"],
+        "Avg_Play_Again": sums["play_again_total"] / sums["attempts"],
+    }, index=sums.index)
+
+
+def canonical_note_names(names):
+    """
+    Respell note names with sharps so enharmonic spellings group together.
+    
+    Each distinct spelling is looked up once; names that are not note
+    spellings are kept as they are.
+
+    Args:
+        names (pd.Series): Note names, e.g. correct_note_name
+
+    Returns:
+        pd.Series: 'D♭' becomes 'C#', 'E♭' becomes 'D#' and so on
+    """
+    spellings = list(pd.unique(names.dropna()))
+    known = [s for s in spellings if s in pitch.NOTE_OFFSETS]
+    mapping = dict(zip(spellings, spellings))
+    if known:
+        mapping.update(zip(known, pitch.canonical_names(known)))
+    return names.map(mapping)
+
+
+def _note_keys(df):
+    """Note name and octave group keys, with flat spellings merged into sharps."""
+    name, octave = NOTE_KEYS
+    return [canonical_note_names(df[name]), octave]
+
+
+def _dates(df):
+    """Calendar day of each attempt."""
+    return df["timestamp"].dt.normalize().rename("date")
+
+
+def _completed_partial(df, keys):
+    """Additive totals plus the number of completed tasks per group."""
+    codes, index = group_codes(df, keys)
+    table = _sums(df, codes, index)
+    table["completed"] = _completed(df, codes, index)
+    return table, codes
+
+
+def _session_partial(df):
+    """Per-session totals, completed tasks and first/last timestamp."""
+    sessions, codes = _completed_partial(df, "session_id")
+    valid = codes >= 0
+    span = df["timestamp"][valid].groupby(codes[valid]).agg(["min", "max"])
+    sessions["start"] = span["min"].to_numpy()
+    sessions["end"] = span["max"].to_numpy()
+    return sessions
+
+
+def partial_aggregates(df):
+    """
+    Compute mergeable aggregates of a batch of attempts.
+
+    Completed tasks are counted per batch. A task has exactly one correct
+    attempt, so the counts of separate batches add up to the count over
+    their union.
+
+    Args:
+        df (pd.DataFrame): Attempt rows with parsed timestamps
+
+    Returns:
+        dict: 'totals', 'groups', 'sessions', 'notes' and 'daily' tables of
+            additive totals, the 'confusion' matrix of correct against guessed
+            MIDI numbers, and the first_try_correct outcomes of the 'recent' tasks
+    """
+    is_correct = df["is_correct"].astype(bool)
+    first_try_correct = int(((df["attempt_number"] == 1) & is_correct).sum())
+    totals = pd.DataFrame({
+        "attempts": [len(df)],
+        "completed": [df.loc[is_correct, "task_id"].nunique()],
+        "first_try_correct": [first_try_correct],
+    }, index=pd.Index(["all"], name="scope"))
+
+    return {
+        "totals": totals,
+        "groups": _completed_partial(df, "note_group")[0],
+        "sessions": _session_partial(df),
+        "notes": attempt_sums(df, _note_keys(df)),
+        "daily": attempt_sums(df, _dates(df)),
+        "confusion": confusion.confusion_matrix(df["correct_midi"], df["guessed_midi"]),
+        "recent": pd.DataFrame({
+            "first_try_correct": is_correct[df["attempt_number"] == 1].to_numpy(),
+        }).tail(RECENT_TASKS).reset_index(drop=True),
+    }
+
+
+def _task_partial(facts, keys):
+    """Additive totals plus completed tasks per group, from one row per task."""
+    codes, index = group_codes(facts, keys)
+    valid = codes >= 0
+    codes = codes[valid]
+
+    def total(column):
+        values = facts[column].to_numpy(dtype=np.float64)[valid]
+        return np.bincount(codes, weights=values, minlength=len(index)).round().astype(np.int64)
+
+    table = pd.DataFrame({
+        "attempts": total("attempts"),
+        "correct": total("completed"),
+        "attempt_total": total("attempt_total"),
+        "play_again_total": total("play_again_total"),
+        "first_tries": np.bincount(codes, minlength=len(index)).astype(np.int64),
+        "first_try_correct": total("first_try_correct"),
+    }, index=index)
+    table["completed"] = table["correct"]
+    return table, codes
+
+
+def task_aggregates(facts, attempts=None):
+    """
+    Compute mergeable aggregates from task facts.
+
+    Used for the task table and for rolled-up history. Gives the
+    aggregates partial_aggregates computes over the tasks' attempts. The
+    daily table counts the attempts given in ``attempts`` on their own
+    days, like partial_aggregates; the other tasks only record when they
+    started and ended, so their attempts count towards the day the task
+    started, which differs only for tasks answered across midnight. The
+    confusion matrix is rebuilt from each task's wrong guesses and its
+    correct answer.
+
+    Args:
+        facts (pd.DataFrame): One row per task with tasks.TASK_COLUMNS,
+            in play order
+        attempts (pd.DataFrame): Attempt rows with parsed timestamps of
+            some of the tasks (see day_crossing_attempts), or None
+
+    Returns:
+        dict: Aggregates as returned by partial_aggregates
+    """
+    facts = facts.reset_index(drop=True)
+    for col in ("completed", "first_try_correct"):
+        facts[col] = facts[col].map(to_bool_int).astype(bool)
+    start = parse_timestamps(facts["first_timestamp"])
+    first_try_correct = facts["first_try_correct"]
+    totals = pd.DataFrame({
+        "attempts": [int(facts["attempts"].sum())],
+        "completed": [int(facts["completed"].sum())],
+        "first_try_correct": [int(first_try_correct.sum())],
+    }, index=pd.Index(["all"], name="scope"))
+
+    sessions, codes = _task_partial(facts, "session_id")
+    valid = codes >= 0
+    sessions["start"] = start[valid].groupby(codes[valid]).min().to_numpy()
+    end = parse_timestamps(facts["last_timestamp"])
+    sessions["end"] = end[valid].groupby(codes[valid]).max().to_numpy()
+
+    wrong = facts["wrong_guesses"].str.split().explode().dropna()
+    correct_midi = facts["correct_midi"].to_numpy(dtype=np.int64)
+    completed = facts["completed"].to_numpy()
+    matrix = confusion.confusion_matrix(
+        np.concatenate([correct_midi[wrong.index.to_numpy()], correct_midi[completed]]),
+        np.concatenate([wrong.to_numpy(dtype=np.int64), correct_midi[completed]]))
+
+    day = start.dt.normalize().rename("date")
+    if attempts is None or attempts.empty:
+        daily = _task_partial(facts, day)[0].drop(columns="completed")
+    else:
+        own_days = facts["task_id"].isin(attempts["task_id"]).to_numpy()
+        frames = [attempt_sums(attempts, _dates(attempts))]
+        if not own_days.all():
+            rest = facts[~own_days]
+            frames.insert(0, _task_partial(rest, day[~own_days])[0].drop(columns="completed"))
+        daily = pd.concat(frames).groupby(level=0).sum()
+
+    notes = _task_partial(facts, _note_keys(facts))[0]
+    return {
+        "totals": totals,
+        "groups": _task_partial(facts, "note_group")[0],
+        "sessions": sessions,
+        "notes": notes.drop(columns="completed"),
+        "daily": daily,
+        "confusion": matrix,
+        "recent": pd.DataFrame({
+            "first_try_correct": first_try_correct.to_numpy(),
+        }).tail(RECENT_TASKS).reset_index(drop=True),
+    }
+
+
+def day_crossing_attempts(storage, facts):
+    """
+    Read the attempts of the tasks that were answered across midnight.
+
+    Sessions are read through the store's session reads, so only the
+    sessions of such tasks are touched. Tasks whose attempts were rolled
+    up have none left to read.
+
+    Args:
+        storage (StorageBackend): Attempt store
+        facts (pd.DataFrame): Task facts with session_id, task_id,
+            first_timestamp and last_timestamp
+
+    Returns:
+        pd.DataFrame: ANALYSIS_COLUMNS rows with parsed timestamps of the
+            tasks whose first and last attempt fall on different days, or
+            None if there are none
+    """
+    first = parse_timestamps(facts["first_timestamp"]).dt.normalize()
+    last = parse_timestamps(facts["last_timestamp"]).dt.normalize()
+    crossing = facts[(first != last).to_numpy()]
+    if crossing.empty:
+        return None
+    frames = [storage.read_session(session_id, ANALYSIS_COLUMNS)
+              for session_id in crossing["session_id"].astype(str).unique()]
+    attempts = pd.concat(frames, ignore_index=True)
+    attempts = attempts[attempts["task_id"].astype(str).isin(set(crossing["task_id"].astype(str)))]
+    if attempts.empty:
+        return None
+    attempts = attempts.reset_index(drop=True)
+    attempts["timestamp"] = parse_timestamps(attempts["timestamp"])
+    return attempts
+
+
+def add_rolled_up(storage, result):
+    """
+    Add the aggregates of a store's rolled-up tasks to those of its attempts.
+
+    Args:
+        storage (StorageBackend): Attempt store
+        result (dict): Aggregates of the store's attempts, or None
+
+    Returns:
+        dict: Aggregates of the whole history, or None if it is empty
+    """
+    facts = storage.read_rolled_up()
+    if facts is None or facts.empty:
+        return result
+    # Rolled-up months are older than every remaining attempt
+    rolled = task_aggregates(facts)
+    return rolled if result is None else merge_aggregates(rolled, result)
+
+
+def merge_aggregates(older, newer):
+    """
+    Combine the aggregates of two consecutive batches of attempts.
+
+    Args:
+        older (dict): partial_aggregates of the earlier batch
+        newer (dict): partial_aggregates of the later batch
+
+    Returns:
+        dict: Aggregates of both batches together
+    """
+    return combine_aggregates([older, newer])
+
+
+def combine_aggregates(parts, chronological=True):
+    """
+    Combine the aggregates of any number of batches in one pass.
+
+    Args:
+        parts (list): partial_aggregates dicts, oldest first
+        chronological (bool): Whether the parts are consecutive batches of
+            one history. Parts without a common order (e.g. the histories
+            of different students) have no recent tasks together, and
+            'recent' is None.
+
+    Returns:
+        dict: Aggregates of all batches together
+    """
+    merged = {}
+    for name in PARTIAL_TABLES:
+        frames = [part[name] for part in parts if len(part[name])]
+        if len(frames) < 2:
+            merged[name] = frames[0] if frames else parts[-1][name]
+            continue
+        combined = pd.concat(frames)
+        how = {col: "sum" for col in combined.columns}
+        how.update({col: agg for col, agg in (("start", "min"), ("end", "max")) if col in how})
+        merged[name] = combined.groupby(level=list(range(combined.index.nlevels))).agg(how)
+    merged["confusion"] = sum(part["confusion"] for part in parts)
+    if chronological:
+        recent = pd.concat([part["recent"] for part in parts], ignore_index=True)
+        merged["recent"] = recent.tail(RECENT_TASKS).reset_index(drop=True)
+    else:
+        merged["recent"] = None
+    return merged
+
+
+def stream_aggregates(storage, chunksize=100000):
+    """
+    Aggregate a whole store chunk by chunk.
+
+    Only one chunk of attempts is in memory at a time; the running
+    aggregates grow with the number of sessions, days and notes, not
+    with the number of attempts. Rolled-up history is included. While
+    the store's task table is complete, its rows are aggregated instead
+    of the attempts (see task_aggregates); only the attempts of tasks
+    answered across midnight are read, so that every attempt counts
+    towards its own day as in partial_aggregates.
+
+    Args:
+        storage (StorageBackend): Attempt store
+        chunksize (int): Attempts (or tasks) read per chunk
+
+    Returns:
+        dict: Aggregates of the whole store, or None if it is empty
+    """
+    result = None
+    table = read_task_table(storage, chunksize)
+    if table is not None:
+        for chunk in table.iter_chunks(chunksize):
+            if not chunk.empty:
+                partial = task_aggregates(chunk, day_crossing_attempts(storage, chunk))
+                result = partial if result is None else merge_aggregates(result, partial)
+        return result
+    for chunk in storage.iter_chunks(chunksize, columns=ANALYSIS_COLUMNS):
+        if chunk.empty:
+            continue
+        chunk['timestamp'] = parse_timestamps(chunk['timestamp'])
+        partial = partial_aggregates(chunk)
+        result = partial if result is None else merge_aggregates(result, partial)
+    return add_rolled_up(storage, result)
+
+
+def group_table(groups):
+    """
+    Build the note group report table.
+
+    Args:
+        groups (pd.DataFrame): 'groups' partial aggregates
+
+    Returns:
+        pd.DataFrame: Completed_Tasks, Success_Rate and Avg_Attempts per note group
+    """
+    table = rates(groups)[["Success_Rate", "Avg_Attempts"]]
+    table.insert(0, "Completed_Tasks", groups["completed"])
+    return table
+
+
+def session_table(sessions):
+    """
+    Build the session report table.
+
+    Args:
+        sessions (pd.DataFrame): 'sessions' partial aggregates
+
+    Returns:
+        pd.DataFrame: Start, End, Completed_Tasks, Success_Rate and Avg_Attempts per session
+    """
+    table = group_table(sessions)
+    table.insert(0, "End", sessions["end"])
+    table.insert(0, "Start", sessions["start"])
+    return table
+
+
+def note_table(notes):
+    """
+    Build the note/octave report table.
+
+    Args:
+        notes (pd.DataFrame): 'notes' partial aggregates
+
+    Returns:
+        pd.DataFrame: Total_Attempts, Success_Rate, Avg_Attempts and
+            Avg_Play_Again indexed by (correct_note_name, correct_octave)
+    """
+    table = rates(notes)
+    table.insert(0, "Total_Attempts", notes["attempts"])
+    return table
+
+
+def daily_table(daily):
+    """
+    Build the daily first-try accuracy table.
+
+    Args:
+        daily (pd.DataFrame): 'daily' partial aggregates
+
+    Returns:
+        pd.DataFrame: Total_Tasks, Correct_Tasks and Accuracy indexed by day
+    """
+    daily = daily[daily["first_tries"] > 0]
+    return pd.DataFrame({
+        "Total_Tasks": daily["first_tries"],
+        "Correct_Tasks": daily["first_try_correct"],
+        "Accuracy": daily["first_try_correct"] / daily["first_tries"],
+    }, index=daily.index)
+
+
+def overall_table(aggregates):
+    """
+    Compute headline totals.
+
+    Args:
+        aggregates (dict): Partial aggregates of the whole history
+
+    Returns:
+        dict: sessions, completed_tasks, attempts, first_try_correct and accuracy
+    """
+    totals = aggregates["totals"].sum()
+    completed = int(totals["completed"])
+    first_try_correct = int(totals["first_try_correct"])
+    return {
+        "sessions": len(aggregates["sessions"]),
+        "completed_tasks": completed,
+        "attempts": int(totals["attempts"]),
+        "first_try_correct": first_try_correct,
+        "accuracy": first_try_correct / completed if completed > 0 else 0,
+    }
+
+
+def recent_accuracy(recent):
+    """
+    Compute first-try accuracy over the most recent tasks.
+
+    Args:
+        recent (pd.DataFrame): 'recent' rows of the aggregates, or None
+
+    Returns:
+        float: Share of the tasks answered correctly at the first attempt,
+            or None without any tasks
+    """
+    if recent is None or recent.empty:
+        return None
+    return recent["first_try_correct"].sum() / len(recent)
+
+
+def group_summary(df):
+    """
+    Summarize performance per note group.
+
+    Args:
+        df (pd.DataFrame): Attempt rows
+
+    Returns:
+        pd.DataFrame: Completed_Tasks, Success_Rate and Avg_Attempts per note group
+    """
+    return group_table(_completed_partial(df, "note_group")[0])
+
+
+def session_summary(df):
+    """
+    Summarize each training session.
+
+    Args:
+        df (pd.DataFrame): Attempt rows with parsed timestamps
+
+    Returns:
+        pd.DataFrame: Start, End, Completed_Tasks, Success_Rate and Avg_Attempts per session
+    """
+    return session_table(_session_partial(df))
+
+
+def note_summary(df):
+    """
+    Summarize performance per note and octave.
+
+    Args:
+        df (pd.DataFrame): Attempt rows
+
+    Returns:
+        pd.DataFrame: Total_Attempts, Success_Rate, Avg_Attempts and
+            Avg_Play_Again indexed by (correct_note_name, correct_octave)
+    """
+    return note_table(attempt_sums(df, _note_keys(df)))
+
+
+def daily_accuracy(df):
+    """
+    Compute first-try accuracy per calendar day.
+
+    Args:
+        df (pd.DataFrame): Attempt rows with parsed timestamps
+
+    Returns:
+        pd.DataFrame: Total_Tasks, Correct_Tasks and Accuracy indexed by day
+    """
+    return daily_table(attempt_sums(df, _dates(df)))
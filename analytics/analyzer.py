@@ -6,38 +6,110 @@ import warnings
 # Suppress NumPy version warnings from SciPy/Seaborn
 warnings.filterwarnings('ignore', category=UserWarning, module='seaborn')
 
+import argparse
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import numpy as np
 
+# Make the src package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.schema import parse_timestamps
+from src.data.skill import SkillModel, skill_path
+from src.data.storage import open_storage
+from src.data import timeseries
+from analytics import aggregates, confidence, confusion, distance, export
+from analytics.incremental import IncrementalAnalytics
+
 
 class PitchTrainingAnalyzer:
     """Analyzer for perfect pitch training data."""
     
-    def __init__(self, data_file="data/training_data.csv"):
+    def __init__(self, data_file="data/training_data.csv", incremental=False, chunksize=None):
         """
         Initialize the analyzer.
         
         Args:
-            data_file (str): Path to the training data CSV file
+            data_file (str): Path to the training data file (.csv, .db or .bin)
+            incremental (bool): Update persisted aggregates with new rows only
+                instead of loading the whole history
+            chunksize (int): Stream the history in chunks of this many rows
+                instead of loading it into memory at once
         """
         self.data_file = data_file
+        self.incremental = incremental
+        self.chunksize = chunksize
         self.data = None
+        self.aggregates = None
+        self.outcomes_reader = None
         self.load_data()
     
+    @classmethod
+    def from_aggregates(cls, aggregates, data_file="data/training_data.csv"):
+        """
+        Create an analyzer over aggregates that were computed elsewhere.
+        
+        Args:
+            aggregates (dict): Aggregates as returned by aggregates.partial_aggregates
+            data_file (str): Data file the aggregates came from, read only by
+                reports that need raw rows
+        
+        Returns:
+            PitchTrainingAnalyzer: Analyzer that does not load the data file
+        """
+        analyzer = cls.__new__(cls)
+        analyzer.data_file = data_file
+        analyzer.incremental = False
+        analyzer.chunksize = None
+        analyzer.data = pd.DataFrame()
+        analyzer.aggregates = aggregates
+        analyzer.outcomes_reader = None
+        return analyzer
+    
     def load_data(self):
-        """Load training data from CSV file."""
+        """Load training data from the data file."""
         try:
-            if Path(self.data_file).exists():
-                self.data = pd.read_csv(self.data_file)
+            if Path(self.data_file).exists() and self.incremental:
+                self.data = pd.DataFrame()
+                analytics = IncrementalAnalytics(self.data_file)
+                self.aggregates = analytics.update()
+                self.outcomes_reader = analytics.read_outcomes
+                analytics.close()
+                update = analytics.last_update
+                total = aggregates.overall_table(self.aggregates)['attempts']
+                print(f"Processed {update['new_rows']} new of {total} training records "
+                      f"from {self.data_file} in {update['seconds']:.2f}s")
+                if total == 0:
+                    print(f"Data file {self.data_file} is empty")
+                    self.aggregates = None
+            elif Path(self.data_file).exists() and self.chunksize:
+                self.data = pd.DataFrame()
+                storage = open_storage(self.data_file)
+                self.aggregates = aggregates.stream_aggregates(storage, self.chunksize)
+                storage.close()
+                if self.aggregates is None:
+                    print(f"Data file {self.data_file} is empty")
+                else:
+                    total = aggregates.overall_table(self.aggregates)['attempts']
+                    print(f"Streamed {total} training records from {self.data_file} "
+                          f"in chunks of {self.chunksize}")
+            elif Path(self.data_file).exists():
+                storage = open_storage(self.data_file)
+                self.data = storage.read_all()
                 if not self.data.empty:
-                    self.data['timestamp'] = pd.to_datetime(self.data['timestamp'])
+                    self.data['timestamp'] = parse_timestamps(self.data['timestamp'])
+                    self.aggregates = aggregates.partial_aggregates(self.data)
                     print(f"Loaded {len(self.data)} training records from {self.data_file}")
                 else:
-                    print(f"Data file {self.data_file} is empty")
                     self.data = pd.DataFrame()
+                # Months rolled up into task rows are no longer in self.data
+                self.aggregates = aggregates.add_rolled_up(storage, self.aggregates)
+                storage.close()
+                if self.aggregates is None:
+                    print(f"Data file {self.data_file} is empty")
             else:
                 print(f"Data file {self.data_file} not found")
                 print("Available data files in data directory:")
@@ -49,75 +121,135 @@ class PitchTrainingAnalyzer:
         except Exception as e:
             print(f"Error loading data: {e}")
             self.data = pd.DataFrame()
+            self.aggregates = None
     
     def generate_summary_report(self):
         """Generate a summary report of training performance."""
-        if self.data.empty:
+        if self.aggregates is None:
             print("No data available for analysis")
             return
         
         print("=== Perfect Pitch Training Summary Report ===\n")
         
         # Overall statistics
-        total_sessions = self.data['session_id'].nunique()
-        total_tasks = self.data[self.data['is_correct'] == True]['task_id'].nunique()
-        total_attempts = len(self.data)
-        
-        print(f"Total Training Sessions: {total_sessions}")
-        print(f"Total Completed Tasks: {total_tasks}")
-        print(f"Total Attempts: {total_attempts}")
-        
-        # Accuracy statistics
-        first_try_correct = len(self.data[
-            (self.data['attempt_number'] == 1) & 
-            (self.data['is_correct'] == True)
-        ])
-        
-        overall_accuracy = first_try_correct / total_tasks if total_tasks > 0 else 0
-        print(f"First-Try Accuracy: {overall_accuracy:.1%}")
+        overall = aggregates.overall_table(self.aggregates)
+        print(f"Total Training Sessions: {overall['sessions']}")
+        print(f"Total Completed Tasks: {overall['completed_tasks']}")
+        print(f"Total Attempts: {overall['attempts']}")
+        print(f"First-Try Accuracy: {overall['accuracy']:.1%}")
         
         # Note group performance
         print("\n=== Performance by Note Group ===")
-        group_stats = self.data.groupby('note_group').agg({
-            'task_id': lambda x: x[self.data.loc[x.index, 'is_correct']].nunique(),
-            'is_correct': 'mean',
-            'attempt_number': 'mean'
-        }).round(3)
-        group_stats.columns = ['Completed_Tasks', 'Success_Rate', 'Avg_Attempts']
-        print(group_stats)
+        group_sums = self.aggregates['groups']
+        group_stats = aggregates.group_table(group_sums).join(
+            confidence.rate_intervals(group_sums).drop(columns='Success_Rate')
+        ).round(3)
+        print(group_stats.to_string())
         
         # Most challenging notes
+        # Ranked by the lower bound of the failure rate, so rarely tried
+        # notes do not top the list by chance
         print("\n=== Most Challenging Notes ===")
-        note_difficulty = self.data.groupby(['correct_note_name', 'correct_octave']).agg({
-            'is_correct': ['count', 'mean'],
-            'attempt_number': 'mean'
-        }).round(3)
-        note_difficulty.columns = ['Total_Attempts', 'Success_Rate', 'Avg_Attempts']
-        challenging_notes = note_difficulty.sort_values('Success_Rate').head(10)
-        print(challenging_notes)
-        
-        # Progress over time
+        challenging_notes = confidence.rank_difficulty(self.aggregates['notes']).head(10).round(3)
+        print(challenging_notes.to_string())
+        
+        # Progress over time; merged histories without a common order
+        # (e.g. a cohort) have no recent tasks
+        if self.aggregates['recent'] is None:
+            return
         print("\n=== Recent Progress ===")
-        recent_data = self.data.tail(100)  # Last 100 attempts
-        recent_accuracy = len(recent_data[
-            (recent_data['attempt_number'] == 1) & 
-            (recent_data['is_correct'] == True)
-        ]) / len(recent_data[recent_data['attempt_number'] == 1])
-        print(f"Last 100 attempts accuracy: {recent_accuracy:.1%}")
-    
-    def plot_accuracy_over_time(self, save_path="analytics/accuracy_over_time.png"):
+        recent_accuracy = aggregates.recent_accuracy(self.aggregates['recent'])
+        if recent_accuracy is None:
+            print("No tasks recorded yet")
+        else:
+            print(f"Last {len(self.aggregates['recent'])} tasks first-try accuracy: "
+                  f"{recent_accuracy:.1%}")
+    
+    def generate_confusion_report(self, top=10):
+        """Report what is guessed instead of the correct note."""
+        if self.aggregates is None:
+            print("No data available for analysis")
+            return
+        
+        matrix = self.aggregates['confusion']
+        errors = confusion.error_decomposition(matrix)
+        print("\n=== Error Breakdown ===")
+        print(f"Wrong Guesses: {errors['errors']} of {errors['attempts']} attempts")
+        for key, label in (("octave_only", "Right note, wrong octave"),
+                           ("pitch_class_only", "Right octave, wrong note"),
+                           ("both", "Wrong note and octave")):
+            share = errors[key] / errors['errors'] if errors['errors'] else 0
+            print(f"{label}: {errors[key]} ({share:.1%})")
+        
+        print("\n=== Most Confused Notes ===")
+        print(confusion.most_confused(matrix, top).round(3).to_string(index=False))
+        
+        print("\n=== Semitone Distance of Wrong Guesses ===")
+        distances = confusion.semitone_histogram(matrix).drop(0, errors='ignore')
+        print(distances[distances > 0].to_string())
+    
+    def generate_distance_report(self, top=10):
+        """Report how far wrong guesses are from the correct note."""
+        if self.aggregates is None:
+            print("No data available for analysis")
+            return
+        
+        matrix = self.aggregates['confusion']
+        metrics = distance.distance_metrics(matrix)
+        print("\n=== Guess Distance ===")
+        if metrics['errors'] == 0:
+            print("No wrong guesses recorded yet")
+            return
+        print(f"Mean Distance: {metrics['mean_abs_semitones']:.2f} semitones "
+              f"({metrics['mean_abs_cents']:.0f} cents), RMS {metrics['rms_semitones']:.2f}")
+        direction = "high" if metrics['bias_cents'] > 0 else "low"
+        print(f"Bias: {abs(metrics['bias_cents']):.0f} cents {direction} "
+              f"(mean frequency ratio {metrics['mean_ratio']:.3f})")
+        print(f"Mean Pitch-Class Error (octaves folded): {metrics['mean_abs_folded']:.2f} semitones")
+        print(f"One Semitone Off: {metrics['neighbour_share']:.1%}")
+        print(f"Right Note, Wrong Octave: {metrics['octave_share']:.1%}")
+        
+        print("\n=== Notes Missed by the Widest Margin ===")
+        notes = distance.note_distance_table(matrix)
+        notes = notes.sort_values("Mean_Abs_Semitones", ascending=False, kind="stable")
+        print(notes.head(top).round(3).to_string())
+    
+    def skill_model(self):
+        """
+        Read the per-note skill model the app keeps next to the data file.
+        
+        Returns:
+            SkillModel: The saved model, or None if there is none
+        """
+        path = skill_path(self.data_file)
+        if not Path(path).exists():
+            return None
+        try:
+            return SkillModel.load(path)
+        except Exception as e:
+            print(f"Error loading skill model: {e}")
+            return None
+    
+    def generate_skill_report(self, top=10):
+        """Report the current skill estimate of the weakest notes."""
+        print("\n=== Current Skill Estimates ===")
+        model = self.skill_model()
+        table = model.table() if model is not None else None
+        if table is None or table.empty:
+            print("No skill estimates recorded yet")
+            return
+        print(f"Weakest notes (first-try success, evidence fades with a "
+              f"{model.half_life_seconds / 86400:.0f}-day half-life):")
+        print(table.head(top).round({"Skill": 3, "Evidence": 3}).to_string())
+    
+    def plot_accuracy_over_time(self, save_path="analytics/accuracy_over_time.png", dpi=300, show=True):
         """Plot accuracy over time."""
-        if self.data.empty:
+        if self.aggregates is None:
             print("No data available for plotting")
             return
         
         # Calculate daily accuracy
-        self.data['date'] = self.data['timestamp'].dt.date
-        daily_stats = self.data[self.data['attempt_number'] == 1].groupby('date').agg({
-            'is_correct': ['count', 'sum']
-        })
-        daily_stats.columns = ['Total_Tasks', 'Correct_Tasks']
-        daily_stats['Accuracy'] = daily_stats['Correct_Tasks'] / daily_stats['Total_Tasks']
+        daily_stats = aggregates.daily_table(self.aggregates['daily'])
         
         # Create plot
         plt.figure(figsize=(12, 6))
@@ -131,27 +263,92 @@ class PitchTrainingAnalyzer:
         
         # Save plot
         Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
+        if show:
+            plt.show()
+        plt.close()
         print(f"Plot saved to {save_path}")
     
-    def plot_note_difficulty_heatmap(self, save_path="analytics/note_difficulty_heatmap.png"):
+    def task_outcomes(self):
+        """
+        Get the first-try outcome of every task in play order.
+        
+        Incremental analyzers use the outcomes kept with the persisted
+        aggregates; otherwise they come from the loaded rows, or from the
+        store's task table when it is complete.
+        
+        Returns:
+            pd.DataFrame: Task outcomes (see timeseries.task_outcomes), or None
+                if there is no data file to read them from
+        """
+        if self.outcomes_reader is not None:
+            return self.outcomes_reader()
+        if not Path(self.data_file).exists():
+            return None
+        storage = open_storage(self.data_file)
+        if self.data is not None and not self.data.empty:
+            # Months rolled up into task rows are no longer in self.data
+            outcomes = timeseries.task_outcomes(self.data)
+            rolled = timeseries.rolled_up_outcomes(storage)
+            if rolled is not None:
+                rolled['timestamp'] = parse_timestamps(rolled['timestamp'])
+                outcomes = pd.concat([rolled, outcomes], ignore_index=True)
+        else:
+            outcomes = timeseries.load_task_outcomes(storage, self.chunksize or 100000)
+        storage.close()
+        return outcomes
+    
+    def plot_accuracy_trend(self, save_path="analytics/accuracy_trend.png",
+                            window=timeseries.DEFAULT_WINDOW, span=timeseries.DEFAULT_SPAN,
+                            dpi=300, show=True, outcomes=None):
+        """Plot rolling and EWMA first-try accuracy over tasks, and per-session curves."""
+        if outcomes is None and self.aggregates is not None:
+            outcomes = self.task_outcomes()
+        if outcomes is None or outcomes.empty:
+            print("No data available for plotting")
+            return
+        
+        series = timeseries.accuracy_series(outcomes, window, span)
+        curves = timeseries.session_curves(outcomes)
+        
+        fig, (trend_ax, session_ax) = plt.subplots(2, 1, figsize=(12, 10))
+        trend_ax.plot(series.index, series['Rolling_Accuracy'], label=f'Last {window} tasks')
+        trend_ax.plot(series.index, series['EWMA_Accuracy'], label=f'EWMA (span {span})', alpha=0.8)
+        trend_ax.set_title('First-Try Accuracy Trend')
+        trend_ax.set_xlabel('Task')
+        trend_ax.set_ylabel('First-Try Accuracy')
+        trend_ax.set_ylim(0, 1)
+        trend_ax.grid(True, alpha=0.3)
+        trend_ax.legend()
+        
+        for _, curve in curves.groupby('session_id', sort=False):
+            session_ax.plot(curve['task_number'], curve['accuracy'], alpha=0.6)
+        session_ax.set_title('First-Try Accuracy Within Each Session')
+        session_ax.set_xlabel('Task in Session')
+        session_ax.set_ylabel('Cumulative First-Try Accuracy')
+        session_ax.set_ylim(0, 1)
+        session_ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
+        if show:
+            plt.show()
+        plt.close()
+        print(f"Plot saved to {save_path}")
+    
+    def plot_note_difficulty_heatmap(self, save_path="analytics/note_difficulty_heatmap.png",
+                                     dpi=300, show=True):
         """Plot a heatmap of note difficulty by octave."""
-        if self.data.empty:
+        if self.aggregates is None:
             print("No data available for plotting")
             return
         
         # Calculate success rates by note and octave
-        note_octave_stats = self.data.groupby(['correct_note_name', 'correct_octave']).agg({
-            'is_correct': 'mean'
-        }).reset_index()
+        note_octave_stats = aggregates.note_table(self.aggregates['notes'])
         
         # Create pivot table for heatmap
-        heatmap_data = note_octave_stats.pivot(
-            index='correct_note_name', 
-            columns='correct_octave', 
-            values='is_correct'
-        )
+        heatmap_data = note_octave_stats['Success_Rate'].unstack('correct_octave')
         
         # Reorder notes to chromatic order
         NOTES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
@@ -168,62 +365,114 @@ class PitchTrainingAnalyzer:
         
         # Save plot
         Path(save_path).parent.mkdir(parents=True, exist_ok=True)
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
+        if show:
+            plt.show()
+        plt.close()
+        print(f"Plot saved to {save_path}")
+    
+    def plot_confusion_matrix(self, save_path="analytics/note_confusion_matrix.png", dpi=300, show=True):
+        """Plot how often each note name is guessed for each correct note name."""
+        if self.aggregates is None:
+            print("No data available for plotting")
+            return
+        
+        # Share of each correct note's attempts going to each guess
+        counts = confusion.pitch_class_matrix(self.aggregates['confusion'])
+        shares = counts.div(counts.sum(axis=1).replace(0, np.nan), axis=0)
+        
+        plt.figure(figsize=(10, 8))
+        sns.heatmap(shares, annot=True, cmap='Blues', vmin=0, vmax=1,
+                    fmt='.2f', cbar_kws={'label': 'Share of Attempts'})
+        plt.title('Guessed Note by Correct Note')
+        plt.xlabel('Guessed Note')
+        plt.ylabel('Correct Note')
+        plt.tight_layout()
+        
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
+        if show:
+            plt.show()
+        plt.close()
         print(f"Plot saved to {save_path}")
     
-    def export_detailed_report(self, output_path="analytics/detailed_report.xlsx"):
-        """Export detailed analysis to Excel file."""
-        if self.data.empty:
+    def export_detailed_report(self, output_path="analytics/detailed_report.xlsx", streaming=None):
+        """
+        Export detailed analysis to Excel file.
+        
+        Args:
+            output_path (str): Path of the xlsx file
+            streaming (bool): Stream the raw sheets from the data file chunk by
+                chunk, splitting them at Excel's row limit. Defaults to streaming
+                unless the whole history is already loaded and fits in one sheet.
+        """
+        if self.aggregates is None:
             print("No data available for export")
             return
         
-        # Prepare different analysis sheets
+        if streaming is None:
+            streaming = self.data.empty or len(self.data) >= export.EXCEL_MAX_ROWS
+        if streaming:
+            storage = open_storage(self.data_file)
+            rows = export.export_streaming_report(storage, self.aggregates, output_path,
+                                                  self.chunksize or 100000)
+            storage.close()
+            print(f"Detailed report exported to {output_path} ({rows} attempts streamed)")
+            return
+        
         with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
             # Raw data
             self.data.to_excel(writer, sheet_name='Raw_Data', index=False)
             
-            # Summary by session
-            session_summary = self.data.groupby('session_id').agg({
-                'timestamp': ['min', 'max'],
-                'task_id': lambda x: x[self.data.loc[x.index, 'is_correct']].nunique(),
-                'is_correct': 'mean',
-                'attempt_number': 'mean'
-            })
-            session_summary.to_excel(writer, sheet_name='Session_Summary')
-            
-            # Note difficulty analysis
-            note_analysis = self.data.groupby(['correct_note_name', 'correct_octave']).agg({
-                'is_correct': ['count', 'mean'],
-                'attempt_number': 'mean',
-                'play_again_count': 'mean'
-            })
-            note_analysis.to_excel(writer, sheet_name='Note_Analysis')
-            
-            # Group performance
-            group_performance = self.data.groupby('note_group').agg({
-                'task_id': lambda x: x[self.data.loc[x.index, 'is_correct']].nunique(),
-                'is_correct': 'mean',
-                'attempt_number': 'mean'
-            })
-            group_performance.to_excel(writer, sheet_name='Group_Performance')
+            # Session, note, group and confusion summaries
+            for sheet_name, (table, index) in export.summary_tables(self.aggregates).items():
+                table.to_excel(writer, sheet_name=sheet_name, index=index)
         
         print(f"Detailed report exported to {output_path}")
+    
+    def export_report_bundle(self, output_dir="analytics/report_bundle"):
+        """Export the raw history as a compressed file next to a summary workbook."""
+        if self.aggregates is None:
+            print("No data available for export")
+            return
+        
+        storage = open_storage(self.data_file)
+        paths = export.export_bundle(storage, self.aggregates, output_dir, self.chunksize or 100000)
+        storage.close()
+        print(f"Report bundle exported to {', '.join(paths)}")
 
 
 def main():
     """Main function for running analytics."""
-    analyzer = PitchTrainingAnalyzer()
+    parser = argparse.ArgumentParser(description="Analyze perfect pitch training data")
+    parser.add_argument("data_file", nargs="?", default="data/training_data.csv")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process rows added since the last incremental run")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the data in chunks of this many rows to bound memory use")
+    parser.add_argument("--export", choices=["xlsx", "bundle"], default="xlsx",
+                        help="Excel report, or compressed raw data plus a summary workbook")
+    args = parser.parse_args()
+    analyzer = PitchTrainingAnalyzer(args.data_file, incremental=args.incremental,
+                                     chunksize=args.chunksize)
     
     # Generate summary report
     analyzer.generate_summary_report()
+    analyzer.generate_skill_report()
+    analyzer.generate_confusion_report()
+    analyzer.generate_distance_report()
     
     # Create visualizations
     analyzer.plot_accuracy_over_time()
+    analyzer.plot_accuracy_trend()
     analyzer.plot_note_difficulty_heatmap()
+    analyzer.plot_confusion_matrix()
     
     # Export detailed report
-    analyzer.export_detailed_report()
+    if args.export == "bundle":
+        analyzer.export_report_bundle()
+    else:
+        analyzer.export_detailed_report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+"""
+Cohort analytics across many students' training data files.
+
+Each file is aggregated in its own worker process; the partial aggregates
+are merged into cohort-level tables, so the usual summary, heatmap and
+accuracy plots describe the whole cohort. Students are also ranked
+against each other.
+
+Usage:
+    python analytics/cohort.py "students/*/training_data.csv" --workers 8
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+import matplotlib.pyplot as plt
+
+# Make the src and analytics packages importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import aggregates, export
+from analytics.analyzer import PitchTrainingAnalyzer
+from src.data.schema import parse_timestamps
+from src.data.storage import open_storage
+
+
+def aggregate_file(path, chunksize=None):
+    """
+    Aggregate one data file. Runs in a worker process.
+
+    Args:
+        path (str): Path to a training data store
+        chunksize (int): Stream the file in chunks of this many rows
+
+    Returns:
+        dict: path, aggregates (None for an empty or unreadable file),
+            rows, seconds and the worker's pid
+    """
+    start = time.perf_counter()
+    result = None
+    try:
+        storage = open_storage(path)
+        try:
+            if chunksize:
+                result = aggregates.stream_aggregates(storage, chunksize)
+            else:
+                df = storage.read_all(aggregates.ANALYSIS_COLUMNS)
+                if not df.empty:
+                    df['timestamp'] = parse_timestamps(df['timestamp'])
+                    result = aggregates.partial_aggregates(df)
+                result = aggregates.add_rolled_up(storage, result)
+        finally:
+            storage.close()
+    except Exception as e:
+        print(f"Error aggregating {path}: {e}")
+    return {
+        "path": path,
+        "aggregates": result,
+        "rows": aggregates.overall_table(result)["attempts"] if result else 0,
+        "seconds": time.perf_counter() - start,
+        "pid": os.getpid(),
+    }
+
+
+def student_label(path, paths):
+    """
+    Name a student after their data file.
+
+    Files that share a name (e.g. one ``training_data.csv`` per student
+    directory) are named after their directory instead.
+
+    Args:
+        path (str): The student's data file
+        paths (list): All data files in the cohort
+
+    Returns:
+        str: Student label
+    """
+    names = [Path(p).name for p in paths]
+    if names.count(Path(path).name) > 1:
+        return Path(path).parent.name
+    return Path(path).stem
+
+
+def student_rankings(results):
+    """
+    Rank students by first-try accuracy.
+
+    Args:
+        results (list): Worker results from aggregate_file
+
+    Returns:
+        pd.DataFrame: Per-student totals and rates, including first-try
+            accuracy over each student's recent tasks, best first
+    """
+    paths = [r["path"] for r in results]
+    rows = []
+    for result in results:
+        if result["aggregates"] is None:
+            continue
+        overall = aggregates.overall_table(result["aggregates"])
+        notes = result["aggregates"]["notes"]
+        rows.append({
+            "Student": student_label(result["path"], paths),
+            "Sessions": overall["sessions"],
+            "Attempts": overall["attempts"],
+            "Completed_Tasks": overall["completed_tasks"],
+            "First_Try_Accuracy": overall["accuracy"],
+            "Success_Rate": notes["correct"].sum() / notes["attempts"].sum(),
+            "Recent_Accuracy": aggregates.recent_accuracy(result["aggregates"]["recent"]),
+        })
+    rankings = pd.DataFrame(rows, columns=[
+        "Student", "Sessions", "Attempts", "Completed_Tasks",
+        "First_Try_Accuracy", "Success_Rate", "Recent_Accuracy"
+    ])
+    rankings = rankings.sort_values("First_Try_Accuracy", ascending=False, kind="stable")
+    rankings.insert(0, "Rank", range(1, len(rankings) + 1))
+    return rankings.set_index("Rank")
+
+
+class CohortAnalyzer(PitchTrainingAnalyzer):
+    """Analyzer for the merged data of many students."""
+
+    def __init__(self, pattern, workers=None, chunksize=None):
+        """
+        Initialize the cohort analyzer and aggregate every matching file.
+
+        Args:
+            pattern (str): Glob pattern of data files (``**`` is recursive)
+            workers (int): Worker processes; defaults to the number of CPUs
+            chunksize (int): Stream each file in chunks of this many rows
+        """
+        self.pattern = pattern
+        self.workers = workers or os.cpu_count() or 1
+        self.results = []
+        self.rankings = None
+        super().__init__(data_file=pattern, chunksize=chunksize)
+
+    def load_data(self):
+        """Aggregate every file in parallel and merge the results."""
+        self.data = pd.DataFrame()
+        paths = sorted(glob.glob(self.pattern, recursive=True))
+        if not paths:
+            print(f"No data files match {self.pattern}")
+            return
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(paths))) as pool:
+            futures = [pool.submit(aggregate_file, path, self.chunksize) for path in paths]
+            results = [future.result() for future in as_completed(futures)]
+        wall = time.perf_counter() - start
+
+        self.results = sorted(results, key=lambda r: r["path"])
+        parts = [r["aggregates"] for r in self.results if r["aggregates"] is not None]
+        if parts:
+            # Recent progress is reported per student in the ranking
+            self.aggregates = aggregates.combine_aggregates(parts, chronological=False)
+            self.rankings = student_rankings(self.results)
+        self._print_timing(wall)
+
+    def _print_timing(self, wall):
+        """Print per-worker and overall throughput."""
+        total_rows = sum(r["rows"] for r in self.results)
+        print(f"Aggregated {len(self.results)} files ({total_rows} attempts) "
+              f"with {self.workers} workers in {wall:.2f}s "
+              f"({total_rows / wall if wall > 0 else 0:,.0f} attempts/s)")
+        by_worker = {}
+        for result in self.results:
+            stats = by_worker.setdefault(result["pid"], {"files": 0, "rows": 0, "seconds": 0.0})
+            stats["files"] += 1
+            stats["rows"] += result["rows"]
+            stats["seconds"] += result["seconds"]
+        for number, (pid, stats) in enumerate(sorted(by_worker.items()), start=1):
+            print(f"  worker {number} (pid {pid}): {stats['files']} files, {stats['rows']} attempts, "
+                  f"{stats['seconds']:.2f}s busy")
+
+    def generate_summary_report(self):
+        """Generate the cohort summary followed by the student ranking."""
+        super().generate_summary_report()
+        if self.rankings is not None:
+            print("\n=== Student Ranking (first-try accuracy) ===")
+            print(self.rankings.round(3).to_string())
+
+    def plot_student_accuracy(self, save_path="analytics/cohort_accuracy_by_student.png",
+                              dpi=300, show=True):
+        """Plot each student's daily first-try accuracy on one chart."""
+        if self.aggregates is None:
+            print("No data available for plotting")
+            return
+
+        paths = [r["path"] for r in self.results]
+        plt.figure(figsize=(12, 6))
+        for result in self.results:
+            if result["aggregates"] is None:
+                continue
+            daily = aggregates.daily_table(result["aggregates"]["daily"])
+            plt.plot(daily.index, daily['Accuracy'], marker='o', alpha=0.7,
+                     label=student_label(result["path"], paths))
+        plt.title('Accuracy Over Time by Student')
+        plt.xlabel('Date')
+        plt.ylabel('First-Try Accuracy')
+        plt.xticks(rotation=45)
+        plt.grid(True, alpha=0.3)
+        if len(self.results) <= 20:
+            plt.legend()
+        plt.tight_layout()
+
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        plt.savefig(save_path, dpi=dpi, bbox_inches='tight')
+        if show:
+            plt.show()
+        plt.close()
+        print(f"Plot saved to {save_path}")
+
+    def export_detailed_report(self, output_path="analytics/cohort_report.xlsx"):
+        """Export the cohort tables and student ranking to an Excel file."""
+        if self.aggregates is None:
+            print("No data available for export")
+            return
+
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            self.rankings.to_excel(writer, sheet_name='Student_Ranking')
+            aggregates.daily_table(self.aggregates['daily']).to_excel(writer, sheet_name='Daily_Accuracy')
+            for sheet_name, (table, index) in export.summary_tables(self.aggregates).items():
+                table.to_excel(writer, sheet_name=sheet_name, index=index)
+
+        print(f"Cohort report exported to {output_path}")
+
+
+def main():
+    """Command-line entry point for cohort analytics."""
+    parser = argparse.ArgumentParser(description="Analyze a cohort of training data files")
+    parser.add_argument("pattern", help='Glob of data files, e.g. "students/*/training_data.csv"')
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPUs)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream each file in chunks of this many rows")
+    parser.add_argument("--output-dir", default="analytics/cohort", help="Where plots and the report go")
+    args = parser.parse_args()
+
+    analyzer = CohortAnalyzer(args.pattern, workers=args.workers, chunksize=args.chunksize)
+    analyzer.generate_summary_report()
+    analyzer.generate_confusion_report()
+    output = Path(args.output_dir)
+    analyzer.plot_accuracy_over_time(str(output / "accuracy_over_time.png"))
+    analyzer.plot_student_accuracy(str(output / "accuracy_by_student.png"))
+    analyzer.plot_note_difficulty_heatmap(str(output / "note_difficulty_heatmap.png"))
+    analyzer.plot_confusion_matrix(str(output / "note_confusion_matrix.png"))
+    analyzer.export_detailed_report(str(output / "cohort_report.xlsx"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Confusion matrix of correct against guessed notes.
+
+Every attempt falls into one cell of a 128 x 128 matrix indexed by the
+correct and the guessed MIDI number. The matrix is built with a single
+bincount over flattened cell indices and, like the other aggregates,
+matrices of separate batches add up, so it is kept in the persisted
+aggregates and updated with new attempts only. Pitch-class and octave
+errors, the semitone-distance histogram and the most confused pairs are
+all derived from the matrix without touching the attempts again.
+
+Usage:
+    python analytics/confusion.py [data_file] [--top 10]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Make the src package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.audio.pitch import note_label
+from src.config import MIDI_NOTES, NOTES
+
+OCTAVES = -(-MIDI_NOTES // len(NOTES))
+
+# Guessed minus correct MIDI number of every cell, offset to be non-negative
+_DISTANCE_INDEX = (np.arange(MIDI_NOTES)[None, :] - np.arange(MIDI_NOTES)[:, None]
+                   + MIDI_NOTES - 1).ravel()
+
+
+def confusion_matrix(correct_midi, guessed_midi):
+    """
+    Count attempts per (correct, guessed) MIDI pair.
+
+    Args:
+        correct_midi (array-like): Correct MIDI number of each attempt
+        guessed_midi (array-like): Guessed MIDI number of each attempt
+
+    Returns:
+        np.ndarray: 128 x 128 int64 counts; rows are correct notes, columns
+            guessed notes. Numbers outside 0-127 are ignored.
+    """
+    correct = np.asarray(correct_midi, dtype=np.int64)
+    guessed = np.asarray(guessed_midi, dtype=np.int64)
+    valid = (correct >= 0) & (correct < MIDI_NOTES) & (guessed >= 0) & (guessed < MIDI_NOTES)
+    cells = correct[valid] * MIDI_NOTES + guessed[valid]
+    return np.bincount(cells, minlength=MIDI_NOTES * MIDI_NOTES).reshape(MIDI_NOTES, MIDI_NOTES)
+
+
+def _folded(matrix):
+    """View the matrix as (correct octave, pitch class, guessed octave, pitch class)."""
+    size = OCTAVES * len(NOTES)
+    padded = np.zeros((size, size), dtype=matrix.dtype)
+    padded[:MIDI_NOTES, :MIDI_NOTES] = matrix
+    return padded.reshape(OCTAVES, len(NOTES), OCTAVES, len(NOTES))
+
+
+def pitch_class_matrix(matrix):
+    """
+    Fold the confusion matrix onto note names, ignoring octaves.
+
+    Args:
+        matrix (np.ndarray): 128 x 128 confusion matrix
+
+    Returns:
+        pd.DataFrame: 12 x 12 counts, correct note names by guessed note names
+    """
+    return pd.DataFrame(_folded(matrix).sum(axis=(0, 2)),
+                        index=pd.Index(NOTES, name="correct_note_name"),
+                        columns=pd.Index(NOTES, name="guessed_note_name"))
+
+
+def octave_matrix(matrix):
+    """
+    Fold the confusion matrix onto octaves, ignoring note names.
+
+    Args:
+        matrix (np.ndarray): 128 x 128 confusion matrix
+
+    Returns:
+        pd.DataFrame: Counts, correct octaves by guessed octaves
+    """
+    return pd.DataFrame(_folded(matrix).sum(axis=(1, 3)),
+                        index=pd.RangeIndex(OCTAVES, name="correct_octave"),
+                        columns=pd.RangeIndex(OCTAVES, name="guessed_octave"))
+
+
+def error_decomposition(matrix):
+    """
+    Split wrong guesses into pitch-class and octave errors.
+
+    Args:
+        matrix (np.ndarray): 128 x 128 confusion matrix
+
+    Returns:
+        dict: attempts and correct, plus the wrong guesses split into
+            octave_only (right note name), pitch_class_only (right octave)
+            and both (neither right)
+    """
+    folded = _folded(matrix)
+    attempts = int(matrix.sum())
+    correct = int(np.trace(matrix))
+    same_pitch_class = int(np.einsum("ipjp->", folded))
+    same_octave = int(np.einsum("ipiq->", folded))
+    return {
+        "attempts": attempts,
+        "correct": correct,
+        "errors": attempts - correct,
+        "octave_only": same_pitch_class - correct,
+        "pitch_class_only": same_octave - correct,
+        "both": attempts - same_pitch_class - same_octave + correct,
+    }
+
+
+def semitone_histogram(matrix):
+    """
+    Count attempts by signed distance from the correct note.
+
+    Args:
+        matrix (np.ndarray): 128 x 128 confusion matrix
+
+    Returns:
+        pd.Series: Attempts per guessed-minus-correct distance in semitones,
+            from the lowest to the highest distance that occurred
+    """
+    counts = np.bincount(_DISTANCE_INDEX, weights=matrix.ravel(),
+                         minlength=2 * MIDI_NOTES - 1).astype(np.int64)
+    histogram = pd.Series(counts, index=pd.RangeIndex(1 - MIDI_NOTES, MIDI_NOTES, name="semitones"),
+                          name="attempts")
+    used = np.flatnonzero(counts)
+    if len(used) == 0:
+        return histogram.iloc[:0]
+    return histogram.iloc[used[0]:used[-1] + 1]
+
+
+def most_confused(matrix, n=10):
+    """
+    List the most frequent wrong (correct, guessed) pairs.
+
+    Args:
+        matrix (np.ndarray): 128 x 128 confusion matrix
+        n (int): Number of pairs to return
+
+    Returns:
+        pd.DataFrame: Correct, Guessed, Semitones, Count and Share (of the
+            correct note's attempts), most frequent first
+    """
+    wrong = matrix.ravel().copy()
+    wrong[::MIDI_NOTES + 1] = 0
+    n = min(n, np.count_nonzero(wrong))
+    if n == 0:
+        cells = np.array([], dtype=np.int64)
+    else:
+        cells = np.argpartition(-wrong, n - 1)[:n]
+        # Most frequent first; ties in MIDI order
+        cells = cells[np.lexsort((cells, -wrong[cells]))]
+    correct, guessed = np.divmod(cells, MIDI_NOTES)
+    row_totals = matrix.sum(axis=1)
+    return pd.DataFrame({
+        "Correct": [note_label(m) for m in correct],
+        "Guessed": [note_label(m) for m in guessed],
+        "Semitones": guessed - correct,
+        "Count": wrong[cells],
+        "Share": wrong[cells] / row_totals[correct],
+    })
+
+
+def main():
+    """Print the confusion analysis of a data file, updating its cached aggregates."""
+    from analytics.analyzer import PitchTrainingAnalyzer
+    from analytics.incremental import IncrementalAnalytics
+
+    parser = argparse.ArgumentParser(description="Show which notes are confused with which")
+    parser.add_argument("data_file", nargs="?", default="data/training_data.csv")
+    parser.add_argument("--top", type=int, default=10, help="Number of confused pairs to list")
+    args = parser.parse_args()
+
+    analytics = IncrementalAnalytics(args.data_file)
+    result = analytics.update()
+    analytics.close()
+
+    analyzer = PitchTrainingAnalyzer.from_aggregates(result, args.data_file)
+    analyzer.generate_confusion_report(args.top)
+
+
+if __name__ == "__main__":
+    main()
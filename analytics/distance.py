@@ -0,0 +1,124 @@
+"""
+How far wrong guesses are from the correct note.
+
+Distances are measured in semitones, cents, frequency ratios and as
+octave-folded pitch-class errors with the array functions of
+src.audio.pitch. Report metrics are computed over the 128 x 128
+confusion matrix, each (correct, guessed) cell weighted by its count,
+so they cost the same for any history length and work on incremental
+and streamed aggregates alike. attempt_distances gives the same
+distances per attempt row.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.audio import pitch
+from src.config import MIDI_NOTES
+
+# Correct and guessed MIDI number of every flattened matrix cell
+_CORRECT, _GUESSED = np.divmod(np.arange(MIDI_NOTES * MIDI_NOTES), MIDI_NOTES)
+_SEMITONES = pitch.semitone_distance(_CORRECT, _GUESSED)
+_FOLDED = pitch.folded_distance(_CORRECT, _GUESSED)
+_OCTAVES = pitch.octave_distance(_CORRECT, _GUESSED)
+
+
+def attempt_distances(df):
+    """
+    Distance of every attempt's guess from the correct note.
+
+    Args:
+        df (pd.DataFrame): Attempt rows with correct_midi and guessed_midi
+
+    Returns:
+        pd.DataFrame: Semitones, Cents, Folded_Semitones, Octaves and
+            Frequency_Ratio with the rows' index
+    """
+    correct = df["correct_midi"].to_numpy()
+    guessed = df["guessed_midi"].to_numpy()
+    return pd.DataFrame({
+        "Semitones": pitch.semitone_distance(correct, guessed),
+        "Cents": pitch.cents_distance(correct, guessed),
+        "Folded_Semitones": pitch.folded_distance(correct, guessed),
+        "Octaves": pitch.octave_distance(correct, guessed),
+        "Frequency_Ratio": pitch.frequency_ratio(correct, guessed),
+    }, index=df.index)
+
+
+def _wrong_counts(matrix):
+    """Counts of the flattened matrix with the correct guesses removed."""
+    wrong = np.asarray(matrix, dtype=np.float64).ravel().copy()
+    wrong[::MIDI_NOTES + 1] = 0
+    return wrong
+
+
+def distance_metrics(matrix):
+    """
+    Summarize how far off the wrong guesses were.
+
+    Args:
+        matrix (np.ndarray): 128 x 128 confusion matrix
+
+    Returns:
+        dict: errors, mean_abs_semitones, rms_semitones, mean_abs_cents,
+            bias_cents (positive when guesses run high), mean_ratio
+            (geometric mean frequency ratio), mean_abs_folded (pitch-class
+            error in semitones), neighbour_share (guesses one semitone off)
+            and octave_share (right pitch class, wrong octave); the
+            metrics are NaN without wrong guesses
+    """
+    wrong = _wrong_counts(matrix)
+    errors = wrong.sum()
+    if errors == 0:
+        metrics = dict.fromkeys(["mean_abs_semitones", "rms_semitones", "mean_abs_cents", "bias_cents",
+                                 "mean_ratio", "mean_abs_folded", "neighbour_share", "octave_share"],
+                                float("nan"))
+        return {"errors": 0, **metrics}
+
+    def mean(values):
+        return float(np.dot(wrong, values) / errors)
+
+    abs_semitones = np.abs(_SEMITONES)
+    bias_cents = mean(pitch.cents_distance(_CORRECT, _GUESSED))
+    return {
+        "errors": int(errors),
+        "mean_abs_semitones": mean(abs_semitones),
+        "rms_semitones": float(np.sqrt(mean(_SEMITONES ** 2))),
+        "mean_abs_cents": 100 * mean(abs_semitones),
+        "bias_cents": bias_cents,
+        "mean_ratio": float(np.exp2(bias_cents / 1200)),
+        "mean_abs_folded": mean(np.abs(_FOLDED)),
+        "neighbour_share": mean(abs_semitones == 1),
+        "octave_share": mean(_FOLDED == 0),
+    }
+
+
+def note_distance_table(matrix):
+    """
+    Distance of wrong guesses per correct note.
+
+    Args:
+        matrix (np.ndarray): 128 x 128 confusion matrix
+
+    Returns:
+        pd.DataFrame: Note, Errors, Mean_Abs_Semitones, Bias_Semitones,
+            Mean_Abs_Folded and Octave_Share indexed by the correct MIDI
+            number, for notes with wrong guesses
+    """
+    wrong = _wrong_counts(matrix).reshape(MIDI_NOTES, MIDI_NOTES)
+    errors = wrong.sum(axis=1)
+    notes = np.flatnonzero(errors)
+    wrong = wrong[notes]
+    shape = (MIDI_NOTES, MIDI_NOTES)
+
+    def mean(values):
+        return (wrong * values.reshape(shape)[notes]).sum(axis=1) / errors[notes]
+
+    return pd.DataFrame({
+        "Note": [pitch.note_label(m) for m in notes],
+        "Errors": errors[notes].astype(np.int64),
+        "Mean_Abs_Semitones": mean(np.abs(_SEMITONES)),
+        "Bias_Semitones": mean(_SEMITONES),
+        "Mean_Abs_Folded": mean(np.abs(_FOLDED)),
+        "Octave_Share": mean(_FOLDED == 0),
+    }, index=pd.Index(notes, name="correct_midi"))
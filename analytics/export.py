@@ -0,0 +1,226 @@
+"""
+Constant-memory report export.
+
+The raw history is written chunk by chunk, either into a write-only xlsx
+workbook, which openpyxl streams to disk row by row, or into a compressed
+CSV (Parquet when pyarrow is installed) next to a small summary workbook.
+Only one chunk of attempts is in memory at a time, and sheets are split
+before they reach Excel's row limit.
+"""
+
+import gzip
+import os
+
+import pandas as pd
+from openpyxl import Workbook
+
+from analytics import aggregates, confidence, confusion, distance
+from src.data.schema import ATTEMPT_COLUMNS, parse_timestamps
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional; bundles fall back to gzipped CSV
+    pyarrow = None
+
+# Rows per worksheet in Excel, including the header row
+EXCEL_MAX_ROWS = 1048576
+
+RAW_SHEET = "Raw_Data"
+
+
+def summary_tables(aggs):
+    """
+    Build the report's summary tables.
+
+    Args:
+        aggs (dict): Aggregates of the whole history
+
+    Returns:
+        dict: Sheet name -> (table, whether to write its index)
+    """
+    matrix = aggs["confusion"]
+    note_intervals = confidence.rate_intervals(aggs["notes"]).drop(columns="Success_Rate")
+    group_intervals = confidence.rate_intervals(aggs["groups"]).drop(columns="Success_Rate")
+    return {
+        "Session_Summary": (aggregates.session_table(aggs["sessions"]), True),
+        "Note_Analysis": (aggregates.note_table(aggs["notes"]).join(note_intervals), True),
+        "Group_Performance": (aggregates.group_table(aggs["groups"]).join(group_intervals), True),
+        "Note_Confusion": (confusion.pitch_class_matrix(matrix), True),
+        "Confused_Pairs": (confusion.most_confused(matrix, 50), False),
+        "Guess_Distance": (distance.note_distance_table(matrix), True),
+    }
+
+
+def _rows(df, index=True):
+    """Yield a DataFrame's rows as lists of plain cell values, without the header."""
+    if index:
+        df = df.reset_index()
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        yield list(row)
+
+
+def _header(df, index=True):
+    """Header row of a DataFrame as written by _rows."""
+    names = [str(name) for name in df.index.names] if index else []
+    return names + [str(col) for col in df.columns]
+
+
+def write_table(workbook, sheet_name, df, index=True):
+    """
+    Append a small table as a sheet of a write-only workbook.
+
+    Args:
+        workbook (Workbook): Write-only openpyxl workbook
+        sheet_name (str): Sheet title
+        df (pd.DataFrame): Table to write
+        index (bool): Write the index as leading columns
+    """
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(_header(df, index))
+    for row in _rows(df, index):
+        sheet.append(row)
+
+
+def _parsed_chunks(storage, chunksize):
+    """Yield the store's attempts chunk by chunk with parsed timestamps."""
+    for chunk in storage.iter_chunks(chunksize, columns=ATTEMPT_COLUMNS):
+        if chunk.empty:
+            continue
+        chunk['timestamp'] = parse_timestamps(chunk['timestamp'])
+        yield chunk
+
+
+def write_raw_sheets(workbook, chunks, max_rows=EXCEL_MAX_ROWS):
+    """
+    Stream attempt chunks into as many raw data sheets as they need.
+
+    Sheets are named Raw_Data, Raw_Data_2, ... and each holds at most
+    ``max_rows`` rows including its header.
+
+    Args:
+        workbook (Workbook): Write-only openpyxl workbook
+        chunks (iterable): DataFrames of attempts in ATTEMPT_COLUMNS order
+        max_rows (int): Row limit per sheet
+
+    Returns:
+        int: Number of attempts written
+    """
+    sheet = None
+    sheets = 0
+    rows_in_sheet = 0
+    written = 0
+    for chunk in chunks:
+        for row in _rows(chunk[ATTEMPT_COLUMNS], index=False):
+            if sheet is None or rows_in_sheet >= max_rows:
+                sheets += 1
+                sheet = workbook.create_sheet(RAW_SHEET if sheets == 1 else f"{RAW_SHEET}_{sheets}")
+                sheet.append(ATTEMPT_COLUMNS)
+                rows_in_sheet = 1
+            sheet.append(row)
+            rows_in_sheet += 1
+            written += 1
+    if sheet is None:
+        workbook.create_sheet(RAW_SHEET).append(ATTEMPT_COLUMNS)
+    return written
+
+
+def _save(workbook, output_path):
+    """Save a workbook atomically."""
+    tmp_path = str(output_path) + ".tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, output_path)
+
+
+def export_streaming_report(storage, aggs, output_path, chunksize=100000, max_rows=EXCEL_MAX_ROWS):
+    """
+    Export the detailed report with the raw history streamed into the workbook.
+
+    Args:
+        storage (StorageBackend): Attempt store to stream the raw sheets from
+        aggs (dict): Aggregates of the whole history
+        output_path (str): Path of the xlsx file
+        chunksize (int): Attempts read per chunk
+        max_rows (int): Row limit per sheet
+
+    Returns:
+        int: Number of raw attempts written
+    """
+    workbook = Workbook(write_only=True)
+    written = write_raw_sheets(workbook, _parsed_chunks(storage, chunksize), max_rows)
+    for sheet_name, (table, index) in summary_tables(aggs).items():
+        write_table(workbook, sheet_name, table, index)
+    _save(workbook, output_path)
+    return written
+
+
+def _write_raw_csv(chunks, path):
+    """Write attempt chunks to a gzipped CSV."""
+    tmp_path = path + ".tmp"
+    written = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as f:
+        pd.DataFrame(columns=ATTEMPT_COLUMNS).to_csv(f, index=False)
+        for chunk in chunks:
+            chunk[ATTEMPT_COLUMNS].to_csv(f, index=False, header=False)
+            written += len(chunk)
+    os.replace(tmp_path, path)
+    return written
+
+
+def _write_raw_parquet(chunks, path):
+    """Write attempt chunks as row groups of a Parquet file."""
+    tmp_path = path + ".tmp"
+    written = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pyarrow.Table.from_pandas(chunk[ATTEMPT_COLUMNS], preserve_index=False)
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(tmp_path, table.schema, compression="zstd")
+            elif not table.schema.equals(writer.schema):
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            written += len(chunk)
+        if writer is None:
+            empty = pd.DataFrame(columns=ATTEMPT_COLUMNS)
+            pyarrow.parquet.write_table(pyarrow.Table.from_pandas(empty, preserve_index=False), tmp_path)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, path)
+    return written
+
+
+def export_bundle(storage, aggs, output_dir, chunksize=100000):
+    """
+    Export the raw history as a compressed file next to a summary workbook.
+
+    The raw attempts go to ``raw_data.parquet`` when pyarrow is installed
+    and to ``raw_data.csv.gz`` otherwise; ``summary.xlsx`` holds the
+    summary tables.
+
+    Args:
+        storage (StorageBackend): Attempt store to stream the raw data from
+        aggs (dict): Aggregates of the whole history
+        output_dir (str): Directory for the bundle
+        chunksize (int): Attempts read per chunk
+
+    Returns:
+        list: Paths of the files written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    chunks = _parsed_chunks(storage, chunksize)
+    if pyarrow is not None:
+        raw_path = os.path.join(output_dir, "raw_data.parquet")
+        _write_raw_parquet(chunks, raw_path)
+    else:
+        raw_path = os.path.join(output_dir, "raw_data.csv.gz")
+        _write_raw_csv(chunks, raw_path)
+
+    workbook = Workbook(write_only=True)
+    for sheet_name, (table, index) in summary_tables(aggs).items():
+        write_table(workbook, sheet_name, table, index)
+    summary_path = os.path.join(output_dir, "summary.xlsx")
+    _save(workbook, summary_path)
+    return [raw_path, summary_path]
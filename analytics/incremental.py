@@ -0,0 +1,168 @@
+"""
+Incremental analytics over a growing training history.
+
+The analyzer's aggregates are stored next to the data file together with
+a watermark, the storage position up to which rows have been processed.
+Each update reads only the rows appended after the watermark and merges
+their aggregates into the stored ones, so its cost depends on the new
+data rather than on the size of the history. The first-try outcome of
+every task is appended to an ``.outcomes`` file next to the aggregates,
+so the accuracy trend does not rescan the history either and an update
+only writes the outcomes of the new tasks. Rolling up partitions
+invalidates the watermark, and the next update starts over.
+"""
+
+import os
+import time
+
+import pandas as pd
+
+from analytics import aggregates
+from src.data import timeseries
+from src.data.schema import SCHEMA_VERSION, parse_timestamps
+from src.data.storage import open_storage
+
+# Bump when the stored aggregate layout changes; older caches, and caches
+# built with another data schema version, are rebuilt
+CACHE_VERSION = 6
+
+# Outcome timestamps are written in the ISO form the attempt store uses
+_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+class IncrementalAnalytics:
+    """Maintains persisted aggregates of a training data store."""
+
+    def __init__(self, data_file="data/training_data.csv", cache_file=None):
+        """
+        Initialize incremental analytics.
+
+        Args:
+            data_file (str): Path to the training data store
+            cache_file (str): Where to keep the aggregates; defaults to
+                ``<store>.agg`` next to the data
+        """
+        self.data_file = data_file
+        self.storage = open_storage(data_file)
+        self.cache_file = cache_file or self.storage.path + ".agg"
+        self.outcomes_file = self.cache_file + ".outcomes"
+        self.last_update = {}
+
+    def load(self):
+        """
+        Load the stored aggregates.
+
+        Returns:
+            dict: Cached state with 'watermark', 'aggregates' and
+                'outcomes_size', or None if there is no usable cache
+        """
+        if not os.path.exists(self.cache_file):
+            return None
+        try:
+            state = pd.read_pickle(self.cache_file)
+        except Exception as e:
+            print(f"Error reading aggregate cache {self.cache_file}: {e}")
+            return None
+        if state.get("version") != CACHE_VERSION or state.get("schema") != SCHEMA_VERSION:
+            return None
+        # The outcomes file must hold at least the outcomes the state counts
+        if not os.path.exists(self.outcomes_file) or os.path.getsize(self.outcomes_file) < state["outcomes_size"]:
+            return None
+        return state
+
+    def save(self, state):
+        """Atomically write the aggregates and watermark."""
+        tmp_path = self.cache_file + ".tmp"
+        pd.to_pickle(state, tmp_path)
+        os.replace(tmp_path, self.cache_file)
+
+    def save_outcomes(self, outcomes, size=None):
+        """
+        Write task outcomes to the outcomes file.
+
+        Args:
+            outcomes (pd.DataFrame): Task outcomes in play order
+            size (int): Append after this many bytes of the file, dropping
+                anything an interrupted update wrote beyond them; None
+                replaces the file
+
+        Returns:
+            int: Size of the outcomes file
+        """
+        if size is None:
+            tmp_path = self.outcomes_file + ".tmp"
+            outcomes[timeseries.OUTCOME_COLUMNS].to_csv(tmp_path, index=False, date_format=_DATE_FORMAT)
+            os.replace(tmp_path, self.outcomes_file)
+        else:
+            with open(self.outcomes_file, 'r+', encoding='utf-8', newline='') as f:
+                f.truncate(size)
+                f.seek(size)
+                outcomes[timeseries.OUTCOME_COLUMNS].to_csv(f, index=False, header=False,
+                                                            date_format=_DATE_FORMAT)
+        return os.path.getsize(self.outcomes_file)
+
+    def read_outcomes(self):
+        """
+        Read the task outcomes kept with the aggregates.
+
+        Returns:
+            pd.DataFrame: Task outcomes (see timeseries.task_outcomes) as of
+                the last update, or None if there are none
+        """
+        if not os.path.exists(self.outcomes_file):
+            return None
+        outcomes = pd.read_csv(self.outcomes_file, dtype={"session_id": str, "task_id": str})
+        outcomes['timestamp'] = parse_timestamps(outcomes['timestamp'])
+        outcomes['first_try_correct'] = outcomes['first_try_correct'].astype(bool)
+        return outcomes
+
+    def update(self, rebuild=False):
+        """
+        Bring the stored aggregates and task outcomes up to date with the
+        data store. The outcomes are read with ``read_outcomes``.
+
+        Args:
+            rebuild (bool): Ignore the stored aggregates and process the whole history
+
+        Returns:
+            dict: Aggregates of the whole history (see aggregates.partial_aggregates)
+        """
+        start = time.perf_counter()
+        state = None if rebuild else self.load()
+        try:
+            new_rows, watermark = self.storage.read_after(state["watermark"] if state else None)
+        except ValueError as e:
+            # The store was truncated or replaced; start over
+            print(f"Rebuilding aggregates: {e}")
+            state = None
+            new_rows, watermark = self.storage.read_after(None)
+
+        if state is not None and new_rows.empty:
+            result = state["aggregates"]
+        else:
+            new_rows['timestamp'] = parse_timestamps(new_rows['timestamp'])
+            partial = aggregates.partial_aggregates(new_rows)
+            outcomes = timeseries.task_outcomes(new_rows)
+            if state is not None:
+                result = aggregates.merge_aggregates(state["aggregates"], partial)
+                outcomes_size = self.save_outcomes(outcomes, state["outcomes_size"])
+            else:
+                result = aggregates.add_rolled_up(self.storage, partial)
+                rolled = timeseries.rolled_up_outcomes(self.storage)
+                if rolled is not None:
+                    rolled['timestamp'] = parse_timestamps(rolled['timestamp'])
+                    outcomes = pd.concat([rolled, outcomes], ignore_index=True)
+                outcomes_size = self.save_outcomes(outcomes)
+            self.save({"version": CACHE_VERSION, "schema": SCHEMA_VERSION, "watermark": watermark,
+                       "aggregates": result, "outcomes_size": outcomes_size})
+
+        self.last_update = {
+            "new_rows": len(new_rows),
+            "rebuilt": state is None,
+            "seconds": time.perf_counter() - start,
+        }
+        return result
+
+    def close(self):
+        """Release the data store."""
+        self.storage.close()
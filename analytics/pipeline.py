@@ -0,0 +1,278 @@
+"""
+Headless report pipeline.
+
+Builds the analyzer's summary, figures and Excel report without a
+display: matplotlib is switched to the Agg backend and the artifacts are
+rendered concurrently in worker processes. Each artifact is fingerprinted
+by the aggregates it is drawn from; an artifact whose fingerprint matches
+the previous run is left as it is. Per-artifact timings are printed.
+
+Usage:
+    python analytics/pipeline.py [data_file] --output-dir analytics/report --workers 4
+"""
+
+import matplotlib
+matplotlib.use("Agg")
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Make the src and analytics packages importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics.analyzer import PitchTrainingAnalyzer
+from src.data import timeseries
+
+# Bump when an artifact's rendering changes so cached artifacts are redrawn
+PIPELINE_VERSION = 3
+
+CACHE_FILE = ".pipeline_cache.json"
+
+# Artifact file -> aggregate tables it is drawn from ("outcomes" is the
+# task outcome series, "skill" the app's skill model, "data_file" the raw history)
+ARTIFACTS = {
+    "summary.txt": ["totals", "groups", "sessions", "notes", "recent", "confusion", "skill"],
+    "accuracy_over_time.png": ["daily"],
+    "accuracy_trend.png": ["outcomes"],
+    "note_difficulty_heatmap.png": ["notes"],
+    "note_confusion_matrix.png": ["confusion"],
+    "detailed_report.xlsx": ["sessions", "notes", "groups", "confusion", "data_file"],
+}
+
+
+def _hash_input(digest, value):
+    """Feed one artifact input into a hash."""
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(list(value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(value.tobytes())
+    else:
+        digest.update(repr(value).encode())
+
+
+def fingerprint(name, inputs, dpi):
+    """
+    Fingerprint an artifact by what it is drawn from.
+
+    Args:
+        name (str): Artifact file name
+        inputs (dict): The artifact's inputs by table name
+        dpi (int): Figure resolution
+
+    Returns:
+        str: Hex digest that changes whenever the artifact would change
+    """
+    digest = hashlib.sha256(f"{name}:{PIPELINE_VERSION}:{dpi}".encode())
+    for key in sorted(inputs):
+        digest.update(key.encode())
+        _hash_input(digest, inputs[key])
+    return digest.hexdigest()
+
+
+def _file_stamp(path):
+    """Identify a data file's contents by size and modification time."""
+    stat = os.stat(path)
+    return (str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+def render_artifact(name, inputs, data_file, path, dpi):
+    """
+    Render one artifact. Runs in a worker process.
+
+    Args:
+        name (str): Artifact file name (a key of ARTIFACTS)
+        inputs (dict): The artifact's inputs by table name
+        data_file (str): Data file the aggregates came from
+        path (str): Where to write the artifact
+        dpi (int): Figure resolution
+
+    Returns:
+        tuple: (name, seconds, worker pid)
+    """
+    start = time.perf_counter()
+    analyzer = PitchTrainingAnalyzer.from_aggregates(inputs, data_file)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        if name == "summary.txt":
+            analyzer.generate_summary_report()
+            analyzer.generate_skill_report()
+            analyzer.generate_confusion_report()
+            analyzer.generate_distance_report()
+        elif name == "accuracy_over_time.png":
+            analyzer.plot_accuracy_over_time(path, dpi=dpi, show=False)
+        elif name == "accuracy_trend.png":
+            analyzer.plot_accuracy_trend(path, dpi=dpi, show=False, outcomes=inputs["outcomes"])
+        elif name == "note_difficulty_heatmap.png":
+            analyzer.plot_note_difficulty_heatmap(path, dpi=dpi, show=False)
+        elif name == "note_confusion_matrix.png":
+            analyzer.plot_confusion_matrix(path, dpi=dpi, show=False)
+        elif name == "detailed_report.xlsx":
+            analyzer.export_detailed_report(path)
+        else:
+            raise ValueError(f"Unknown artifact: {name}")
+    if name == "summary.txt":
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(output.getvalue())
+        os.replace(tmp_path, path)
+    return name, time.perf_counter() - start, os.getpid()
+
+
+class ReportPipeline:
+    """Renders the analyzer's artifacts concurrently, skipping unchanged ones."""
+
+    def __init__(self, data_file="data/training_data.csv", output_dir="analytics/report",
+                 workers=None, dpi=150, incremental=False, chunksize=None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            data_file (str): Path to the training data file
+            output_dir (str): Directory for the artifacts and the fingerprint cache
+            workers (int): Worker processes; defaults to the number of CPUs
+            dpi (int): Figure resolution
+            incremental (bool): Use the persisted incremental aggregates
+            chunksize (int): Stream the history in chunks of this many rows
+        """
+        self.data_file = data_file
+        self.output_dir = Path(output_dir)
+        self.workers = workers or os.cpu_count() or 1
+        self.dpi = dpi
+        self.incremental = incremental
+        self.chunksize = chunksize
+        self.timings = {}
+
+    def _load_cache(self):
+        """Read the fingerprints of the previous run."""
+        try:
+            with open(self.output_dir / CACHE_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        """Atomically write the artifact fingerprints."""
+        path = self.output_dir / CACHE_FILE
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _inputs(self, analyzer):
+        """Collect every artifact input from a loaded analyzer."""
+        inputs = dict(analyzer.aggregates)
+        start = time.perf_counter()
+        outcomes = analyzer.task_outcomes()
+        self.timings["load outcomes"] = time.perf_counter() - start
+        inputs["outcomes"] = outcomes if outcomes is not None else pd.DataFrame(
+            columns=timeseries.OUTCOME_COLUMNS)
+        skill = analyzer.skill_model()
+        inputs["skill"] = skill.state if skill is not None else None
+        inputs["data_file"] = _file_stamp(self.data_file)
+        return inputs
+
+    def run(self, force=False):
+        """
+        Render every artifact whose inputs changed since the last run.
+
+        Args:
+            force (bool): Render all artifacts regardless of the cache
+
+        Returns:
+            dict: Per-artifact status ('rendered', 'cached' or 'failed')
+        """
+        start = time.perf_counter()
+        analyzer = PitchTrainingAnalyzer(self.data_file, incremental=self.incremental,
+                                         chunksize=self.chunksize)
+        self.timings["load aggregates"] = time.perf_counter() - start
+        if analyzer.aggregates is None:
+            print("No data available for the report")
+            return {}
+
+        inputs = self._inputs(analyzer)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        cache = {} if force else self._load_cache()
+
+        status = {}
+        pending = {}
+        for name, keys in ARTIFACTS.items():
+            artifact_inputs = {key: inputs[key] for key in keys}
+            fp = fingerprint(name, artifact_inputs, self.dpi)
+            if cache.get(name) == fp and (self.output_dir / name).exists():
+                status[name] = "cached"
+                self.timings[name] = 0.0
+            else:
+                pending[name] = (artifact_inputs, fp)
+
+        render_start = time.perf_counter()
+        if pending:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(pending))) as pool:
+                futures = {
+                    pool.submit(render_artifact, name, artifact_inputs, self.data_file,
+                                str(self.output_dir / name), self.dpi): name
+                    for name, (artifact_inputs, _) in pending.items()
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        _, seconds, pid = future.result()
+                    except Exception as e:
+                        print(f"Error rendering {name}: {e}")
+                        status[name] = "failed"
+                        cache.pop(name, None)
+                        continue
+                    status[name] = "rendered"
+                    self.timings[name] = seconds
+                    cache[name] = pending[name][1]
+                    print(f"  {name:<30} {seconds:>7.2f}s  (pid {pid})")
+        self.timings["render wall"] = time.perf_counter() - render_start
+        self.timings["total"] = time.perf_counter() - start
+
+        self._save_cache(cache)
+        self._print_timings(status)
+        return status
+
+    def _print_timings(self, status):
+        """Print where report time went."""
+        print(f"\n=== Report Timings ({self.workers} workers) ===")
+        for step in ("load aggregates", "load outcomes"):
+            print(f"{step:<30} {self.timings[step]:>7.2f}s")
+        for name in ARTIFACTS:
+            if name in status:
+                print(f"{name:<30} {self.timings.get(name, 0.0):>7.2f}s  {status[name]}")
+        print(f"{'render wall':<30} {self.timings['render wall']:>7.2f}s")
+        print(f"{'total':<30} {self.timings['total']:>7.2f}s")
+
+
+def main():
+    """Command-line entry point for the headless report."""
+    parser = argparse.ArgumentParser(description="Render the training report without a display")
+    parser.add_argument("data_file", nargs="?", default="data/training_data.csv")
+    parser.add_argument("--output-dir", default="analytics/report", help="Where the artifacts go")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPUs)")
+    parser.add_argument("--dpi", type=int, default=150, help="Figure resolution")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process rows added since the last incremental run")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the data in chunks of this many rows to bound memory use")
+    parser.add_argument("--force", action="store_true", help="Render every artifact again")
+    args = parser.parse_args()
+
+    pipeline = ReportPipeline(args.data_file, args.output_dir, workers=args.workers, dpi=args.dpi,
+                              incremental=args.incremental, chunksize=args.chunksize)
+    pipeline.run(force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark the vectorized report aggregations against the original groupby lambdas.
+
+Synthetic histories of increasing size are summarized both ways. Every
+table is checked for identical values before timings are reported.
+
+Usage:
+    python benchmarks/bench_aggregations.py --sizes 10000 100000 1000000 10000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import aggregates
+from src.config import NOTE_GROUPS, NOTES
+
+
+def make_history(rows, attempts_per_session=300, seed=0):
+    """
+    Build a synthetic attempt history.
+
+    Session and task ids are integers to keep ten-million-row frames in
+    memory; the aggregations treat them like the uuid strings of real data.
+    """
+    rng = np.random.default_rng(seed)
+    is_correct = rng.random(rows) < 0.6
+    # A task ends at its correct attempt, or after a wrong one with probability 0.1
+    new_task = np.concatenate(([True], is_correct[:-1] | (rng.random(rows - 1) < 0.1)))
+    task_id = np.cumsum(new_task)
+    idx = np.arange(rows)
+    task_start = np.maximum.accumulate(np.where(new_task, idx, 0))
+    attempt_number = idx - task_start + 1
+
+    midi = rng.integers(24, 84, size=rows)
+    groups = np.array(list(NOTE_GROUPS), dtype=object)
+    start = np.datetime64("2025-01-01T09:00:00")
+    return pd.DataFrame({
+        "session_id": task_id // (attempts_per_session // 2),
+        "task_id": task_id,
+        "timestamp": start + (idx * 20 + rng.integers(0, 20, size=rows)).astype("timedelta64[s]"),
+        "correct_note_name": np.array(NOTES, dtype=object)[midi % 12],
+        "correct_octave": midi // 12,
+        "is_correct": is_correct,
+        "attempt_number": attempt_number,
+        "play_again_count": rng.poisson(0.5, size=rows),
+        "note_group": groups[rng.integers(0, len(groups), size=rows)],
+    })
+
+
+def legacy_tables(data):
+    """The original PitchTrainingAnalyzer aggregations."""
+    tables = {}
+    tables["groups"] = data.groupby('note_group').agg({
+        'task_id': lambda x: x[data.loc[x.index, 'is_correct']].nunique(),
+        'is_correct': 'mean',
+        'attempt_number': 'mean'
+    })
+    tables["sessions"] = data.groupby('session_id').agg({
+        'timestamp': ['min', 'max'],
+        'task_id': lambda x: x[data.loc[x.index, 'is_correct']].nunique(),
+        'is_correct': 'mean',
+        'attempt_number': 'mean'
+    })
+    tables["notes"] = data.groupby(['correct_note_name', 'correct_octave']).agg({
+        'is_correct': ['count', 'mean'],
+        'attempt_number': 'mean',
+        'play_again_count': 'mean'
+    })
+    dates = data['timestamp'].dt.date
+    daily = data[data['attempt_number'] == 1].groupby(dates).agg({
+        'is_correct': ['count', 'sum']
+    })
+    daily.columns = ['Total_Tasks', 'Correct_Tasks']
+    daily['Accuracy'] = daily['Correct_Tasks'] / daily['Total_Tasks']
+    tables["daily"] = daily
+    return tables
+
+
+def vectorized_tables(data):
+    """The aggregations used by the analyzer now."""
+    return {
+        "groups": aggregates.group_summary(data),
+        "sessions": aggregates.session_summary(data),
+        "notes": aggregates.note_summary(data),
+        "daily": aggregates.daily_accuracy(data),
+    }
+
+
+def assert_identical(legacy, vectorized):
+    """Check both sets of tables hold exactly the same values."""
+    for name, expected in legacy.items():
+        actual = vectorized[name].copy()
+        expected = expected.copy()
+        expected.columns = actual.columns
+        if name == "daily":
+            actual.index = actual.index.date
+            expected.index.name = actual.index.name = None
+        pd.testing.assert_frame_equal(actual, expected, check_exact=True, check_dtype=False)
+
+
+def run(sizes, repeat):
+    """Time both implementations at each size and print the speedup."""
+    print(f"{'rows':>10} {'legacy s':>10} {'vectorized s':>13} {'speedup':>8}")
+    for rows in sizes:
+        data = make_history(rows)
+
+        start = time.perf_counter()
+        legacy = legacy_tables(data)
+        legacy_time = time.perf_counter() - start
+
+        vectorized_time = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            vectorized = vectorized_tables(data)
+            vectorized_time = min(vectorized_time, time.perf_counter() - start)
+
+        assert_identical(legacy, vectorized)
+        print(f"{rows:>10,} {legacy_time:>10.3f} {vectorized_time:>13.3f} "
+              f"{legacy_time / vectorized_time:>7.1f}x")
+        del data, legacy, vectorized
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Vectorized runs per size (fastest is reported)")
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+    print("All tables identical.")
+
+
+if __name__ == "__main__":
+    main()
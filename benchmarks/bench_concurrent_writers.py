@@ -0,0 +1,157 @@
+"""
+Benchmark concurrent appends from several processes to one shared store.
+
+Each worker process appends attempts as fast as it can through its own
+storage backend instance. Afterwards the store is checked for torn or
+interleaved rows and, for CSV stores, for a consistent session index.
+
+Usage:
+    python benchmarks/bench_concurrent_writers.py --processes 8 --records 5000
+"""
+
+import argparse
+import csv
+import datetime
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.schema import ATTEMPT_COLUMNS
+from src.data.session_index import SessionIndex
+from src.data.storage import open_storage
+
+
+def _make_record(session_id, task_id, worker, i):
+    """Build a synthetic attempt record."""
+    midi = 24 + (worker * 7 + i) % 60
+    return {
+        "session_id": session_id,
+        "task_id": task_id,
+        "timestamp": datetime.datetime.now().isoformat(),
+        "correct_note_name": "C",
+        "correct_octave": midi // 12,
+        "correct_midi": midi,
+        "guessed_note_name": "C",
+        "guessed_octave": midi // 12,
+        "guessed_midi": midi,
+        "is_correct": i % 3 == 0,
+        "attempt_number": i % 3 + 1,
+        "play_again_count": worker,
+        "note_group": "All",
+        "octave_range_low": 2,
+        "octave_range_high": 7,
+    }
+
+
+def _worker(args):
+    """Append records from one process and return its elapsed time."""
+    path, worker, records, batch_size = args
+    storage = open_storage(path)
+    session_id = str(uuid.uuid4())
+    task_id = str(uuid.uuid4())
+    start = time.perf_counter()
+    batch = []
+    for i in range(records):
+        if i % 3 == 0:
+            task_id = str(uuid.uuid4())
+        batch.append(_make_record(session_id, task_id, worker, i))
+        if len(batch) >= batch_size:
+            storage.append(batch)
+            batch = []
+    if batch:
+        storage.append(batch)
+    storage.close()
+    return session_id, time.perf_counter() - start
+
+
+def verify_csv(path, expected_rows, sessions):
+    """
+    Check every row of a CSV store is complete and well-formed.
+
+    Returns:
+        list: Descriptions of torn or unexpected rows
+    """
+    problems = []
+    counts = dict.fromkeys(sessions, 0)
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        if header != ATTEMPT_COLUMNS:
+            problems.append(f"unexpected header {header}")
+        for line_no, row in enumerate(reader, start=2):
+            if len(row) != len(ATTEMPT_COLUMNS):
+                problems.append(f"line {line_no}: {len(row)} fields")
+                continue
+            try:
+                uuid.UUID(row[0])
+                uuid.UUID(row[1])
+                datetime.datetime.fromisoformat(row[2])
+                int(row[5])
+            except ValueError as e:
+                problems.append(f"line {line_no}: {e}")
+                continue
+            if row[0] not in counts:
+                problems.append(f"line {line_no}: unknown session {row[0]}")
+                continue
+            counts[row[0]] += 1
+
+    total = sum(counts.values())
+    if total != expected_rows:
+        problems.append(f"expected {expected_rows} rows, found {total}")
+    index = SessionIndex(path)
+    index.sync()
+    problems.extend(index.check())
+    return problems
+
+
+def run(processes, records, batch_size, path):
+    """Run the benchmark and print throughput and verification results."""
+    jobs = [(path, worker, records, batch_size) for worker in range(processes)]
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_worker, jobs)
+    elapsed = time.perf_counter() - start
+
+    total = processes * records
+    print(f"{processes} processes x {records} records (batches of {batch_size}) -> {path}")
+    for worker, (_, worker_time) in enumerate(results):
+        print(f"  worker {worker}: {records / worker_time:,.0f} records/s")
+    print(f"Total: {total:,} records in {elapsed:.2f}s ({total / elapsed:,.0f} records/s)")
+
+    if Path(path).suffix == ".csv":
+        problems = verify_csv(path, total, [session for session, _ in results])
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        print(f"Torn or invalid rows: {len(problems)}")
+        return not problems
+
+    count = open_storage(path).count()
+    print(f"Stored records: {count:,} (expected {total:,})")
+    return count == total
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--records", type=int, default=5000, help="Records per process")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Records per append (1 = unbuffered)")
+    parser.add_argument("--backend", choices=["csv", "sqlite", "binary"], default="csv")
+    args = parser.parse_args()
+
+    suffix = {"csv": ".csv", "sqlite": ".db", "binary": ".bin"}[args.backend]
+    with tempfile.TemporaryDirectory() as tmp:
+        ok = run(args.processes, args.records, args.batch_size,
+                 os.path.join(tmp, f"shared{suffix}"))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
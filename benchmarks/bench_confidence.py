@@ -0,0 +1,62 @@
+"""
+Benchmark the batched bootstrap intervals over all 128 MIDI cells.
+
+Random attempt counts are drawn for every MIDI cell and Wilson plus
+bootstrap intervals computed for increasing numbers of resamples. For
+cells with many attempts both intervals must agree closely.
+
+Usage:
+    python benchmarks/bench_confidence.py --resamples 1000 10000 50000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics.confidence import bootstrap_interval, wilson_interval
+from analytics.confusion import MIDI_NOTES
+
+
+def run(resamples_list, max_attempts, repeat):
+    """Time both interval kinds for every resample count."""
+    rng = np.random.default_rng(0)
+    trials = rng.integers(0, max_attempts, size=MIDI_NOTES)
+    successes = rng.binomial(trials, rng.random(MIDI_NOTES))
+
+    start = time.perf_counter()
+    wilson = np.array(wilson_interval(successes, trials))
+    wilson_time = time.perf_counter() - start
+    print(f"Wilson, {MIDI_NOTES} cells: {wilson_time * 1000:.2f} ms")
+
+    print(f"{'resamples':>10} {'bootstrap ms':>13} {'max gap (n>1000)':>17}")
+    large = trials > 1000
+    for resamples in resamples_list:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            boot = np.array(bootstrap_interval(successes, trials, resamples=resamples))
+            best = min(best, time.perf_counter() - start)
+        gap = np.abs(boot[:, large] - wilson[:, large]).max()
+        assert gap < 0.01, f"Bootstrap and Wilson intervals differ by {gap}"
+        print(f"{resamples:>10,} {best * 1000:>13.1f} {gap:>17.5f}")
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resamples", type=int, nargs="+", default=[1000, 2000, 10000, 50000])
+    parser.add_argument("--max-attempts", type=int, default=1_000_000,
+                        help="Upper bound of the random attempt count per cell")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size (fastest is reported)")
+    args = parser.parse_args()
+    run(args.resamples, args.max_attempts, args.repeat)
+    print("Intervals agree.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark the bincount confusion matrix against a pandas crosstab.
+
+Synthetic correct/guessed MIDI pairs of increasing size are counted both
+ways and checked for identical counts. The time to fold a new batch into
+an existing matrix, which is what an incremental update costs, is
+reported as well.
+
+Usage:
+    python benchmarks/bench_confusion.py --sizes 10000 100000 1000000 10000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics import confusion
+from src.config import MIDI_NOTES
+
+
+def make_guesses(rows, seed=0):
+    """Correct notes across the trainer's octaves and guesses scattered around them."""
+    rng = np.random.default_rng(seed)
+    correct = rng.integers(24, 96, size=rows)
+    guessed = np.clip(correct + rng.integers(-14, 15, size=rows) * (rng.random(rows) < 0.6), 0, 127)
+    return correct, guessed
+
+
+def crosstab_matrix(correct, guessed):
+    """The same matrix through pandas, padded to 128 x 128."""
+    table = pd.crosstab(correct, guessed)
+    full = range(MIDI_NOTES)
+    return table.reindex(index=full, columns=full, fill_value=0).to_numpy()
+
+
+def run(sizes, batch):
+    """Time both implementations at each size and an incremental update."""
+    print(f"{'rows':>10} {'crosstab s':>11} {'bincount s':>11} {'speedup':>8} "
+          f"{'update ms':>10} {'report ms':>10}")
+    for rows in sizes:
+        correct, guessed = make_guesses(rows)
+
+        start = time.perf_counter()
+        expected = crosstab_matrix(correct, guessed)
+        crosstab_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matrix = confusion.confusion_matrix(correct, guessed)
+        bincount_time = time.perf_counter() - start
+        assert np.array_equal(matrix, expected)
+
+        new_correct, new_guessed = make_guesses(batch, seed=1)
+        start = time.perf_counter()
+        matrix = matrix + confusion.confusion_matrix(new_correct, new_guessed)
+        update_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        confusion.error_decomposition(matrix)
+        confusion.semitone_histogram(matrix)
+        confusion.most_confused(matrix)
+        report_time = time.perf_counter() - start
+
+        print(f"{rows:>10,} {crosstab_time:>11.3f} {bincount_time:>11.3f} "
+              f"{crosstab_time / bincount_time:>7.1f}x {update_time * 1000:>10.2f} "
+              f"{report_time * 1000:>10.2f}")
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--batch", type=int, default=1000,
+                        help="Attempts added by the simulated incremental update")
+    args = parser.parse_args()
+    run(args.sizes, args.batch)
+    print("All matrices identical.")
+
+
+if __name__ == "__main__":
+    main()
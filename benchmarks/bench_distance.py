@@ -0,0 +1,86 @@
+"""
+Benchmark guess-distance metrics over large attempt arrays.
+
+Per-row distances are computed with the array API of src.audio.pitch
+and, for a sample of the rows, with a plain Python loop over the same
+formulas. The report metrics are then computed from the confusion
+matrix and checked against the per-row distances.
+
+Usage:
+    python benchmarks/bench_distance.py --sizes 1000000 5000000
+"""
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from analytics.confusion import confusion_matrix
+from analytics.distance import attempt_distances, distance_metrics
+
+LOOP_SAMPLE = 200_000
+
+
+def loop_distances(correct, guessed):
+    """Per-row distances the way a Python loop would compute them."""
+    rows = []
+    for c, g in zip(correct.tolist(), guessed.tolist()):
+        semitones = g - c
+        folded = (semitones + 6) % 12 - 6
+        rows.append((semitones, 100.0 * semitones, folded, (semitones - folded) // 12,
+                     math.pow(2.0, semitones / 12)))
+    return rows
+
+
+def run(sizes, seed):
+    """Time both ways at each size and check the matrix metrics."""
+    rng = np.random.default_rng(seed)
+    print(f"{'rows':>10} {'array s':>8} {'loop s (est.)':>14} {'speedup':>8} {'matrix s':>9}")
+    for rows in sizes:
+        correct = rng.integers(24, 96, size=rows)
+        guessed = np.where(rng.random(rows) < 0.6, correct, rng.integers(24, 96, size=rows))
+        df = pd.DataFrame({"correct_midi": correct, "guessed_midi": guessed})
+
+        start = time.perf_counter()
+        distances = attempt_distances(df)
+        array_time = time.perf_counter() - start
+
+        sample = min(rows, LOOP_SAMPLE)
+        start = time.perf_counter()
+        looped = loop_distances(correct[:sample], guessed[:sample])
+        loop_time = (time.perf_counter() - start) * rows / sample
+        expected = np.array(looped, dtype=np.float64)
+        if not np.allclose(distances.iloc[:sample].to_numpy(dtype=np.float64), expected):
+            raise AssertionError("Array and loop distances differ")
+
+        start = time.perf_counter()
+        metrics = distance_metrics(confusion_matrix(correct, guessed))
+        matrix_time = time.perf_counter() - start
+        wrong = distances[correct != guessed]
+        if not (np.isclose(metrics["mean_abs_semitones"], wrong["Semitones"].abs().mean())
+                and np.isclose(metrics["bias_cents"], wrong["Cents"].mean())
+                and np.isclose(metrics["octave_share"], (wrong["Folded_Semitones"] == 0).mean())):
+            raise AssertionError("Matrix metrics differ from per-row distances")
+
+        print(f"{rows:>10,} {array_time:>8.3f} {loop_time:>14.2f} "
+              f"{loop_time / array_time:>7.0f}x {matrix_time:>9.3f}")
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.sizes, args.seed)
+    print("Array, loop and matrix results agree.")
+
+
+if __name__ == "__main__":
+    main()
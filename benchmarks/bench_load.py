@@ -0,0 +1,133 @@
+"""
+Benchmark loading training_data.csv with the typed schema against plain inference.
+
+Synthetic attempt files of increasing size are loaded the original way
+(pd.read_csv with inferred dtypes, then pd.to_datetime) and through the
+typed path (read_attempt_csv, then parse_timestamps). Both frames are
+checked for identical values before load time and in-memory size are
+reported.
+
+Usage:
+    python benchmarks/bench_load.py --sizes 100000 1000000 5000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import NOTE_GROUPS, NOTES
+from src.data.schema import ATTEMPT_COLUMNS, CSV_ENGINE, parse_timestamps, read_attempt_csv
+
+
+def make_attempts(rows, attempts_per_session=300, seed=0):
+    """Build a synthetic attempt history in the data file layout."""
+    rng = np.random.default_rng(seed)
+    is_correct = rng.random(rows) < 0.6
+    new_task = np.concatenate(([True], is_correct[:-1]))
+    task_number = np.cumsum(new_task)
+    idx = np.arange(rows)
+    attempt_number = idx - np.maximum.accumulate(np.where(new_task, idx, 0)) + 1
+
+    task_ids = np.array([str(uuid.UUID(int=int(i))) for i in range(task_number[-1] + 1)], dtype=object)
+    sessions = task_number // (attempts_per_session // 2)
+    session_ids = np.array([str(uuid.UUID(int=int(i) + (1 << 64))) for i in range(sessions[-1] + 1)],
+                           dtype=object)
+    correct = rng.integers(24, 84, size=rows)
+    guessed = np.where(is_correct, correct, rng.integers(24, 84, size=rows))
+    notes = np.array(NOTES, dtype=object)
+    groups = np.array(list(NOTE_GROUPS), dtype=object)
+    timestamps = np.datetime64("2025-01-01T09:00:00.000000") + (idx * 20_000_000
+                                                               + rng.integers(0, 999_999, size=rows)
+                                                               ).astype("timedelta64[us]")
+    return pd.DataFrame({
+        "session_id": session_ids[sessions],
+        "task_id": task_ids[task_number],
+        "timestamp": np.datetime_as_string(timestamps),
+        "correct_note_name": notes[correct % 12],
+        "correct_octave": correct // 12,
+        "correct_midi": correct,
+        "guessed_note_name": notes[guessed % 12],
+        "guessed_octave": guessed // 12,
+        "guessed_midi": guessed,
+        "is_correct": is_correct,
+        "attempt_number": attempt_number,
+        "play_again_count": rng.poisson(0.5, size=rows),
+        "note_group": groups[rng.integers(0, len(groups), size=rows)],
+        "octave_range_low": 2,
+        "octave_range_high": 6,
+    })[ATTEMPT_COLUMNS]
+
+
+def inferred_load(path):
+    """The original load: inferred dtypes, then format inference per call."""
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+def typed_load(path):
+    """The typed load path used by the storage backends."""
+    df = read_attempt_csv(path)
+    df['timestamp'] = parse_timestamps(df['timestamp'])
+    return df
+
+
+def assert_same_values(expected, actual):
+    """Check both loads hold the same values, whatever their dtypes."""
+    for col in ATTEMPT_COLUMNS:
+        left = expected[col].to_numpy()
+        right = np.asarray(actual[col].astype(expected[col].dtype))
+        if not np.array_equal(left, right):
+            raise AssertionError(f"Column {col} differs")
+
+
+def run(sizes, repeat):
+    """Time both loads at each size and print time and memory."""
+    print(f"CSV engine for typed loads: {CSV_ENGINE}")
+    print(f"{'rows':>10} {'inferred s':>11} {'typed s':>8} {'speedup':>8} "
+          f"{'inferred MB':>12} {'typed MB':>9} {'saving':>7}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in sizes:
+            path = os.path.join(tmp_dir, f"attempts_{rows}.csv")
+            make_attempts(rows).to_csv(path, index=False)
+
+            timings = {}
+            frames = {}
+            for name, load in (("inferred", inferred_load), ("typed", typed_load)):
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    frames[name] = load(path)
+                    best = min(best, time.perf_counter() - start)
+                timings[name] = best
+
+            assert_same_values(frames["inferred"], frames["typed"])
+            memory = {name: df.memory_usage(deep=True).sum() / 2**20 for name, df in frames.items()}
+            print(f"{rows:>10,} {timings['inferred']:>11.3f} {timings['typed']:>8.3f} "
+                  f"{timings['inferred'] / timings['typed']:>7.1f}x {memory['inferred']:>12.1f} "
+                  f"{memory['typed']:>9.1f} {1 - memory['typed'] / memory['inferred']:>6.0%}")
+            del frames
+            os.remove(path)
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--repeat", type=int, default=3, help="Loads per size (fastest is reported)")
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+    print("All loads identical.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark the note scheduler's sampling and update throughput.
+
+The Fenwick sampler is timed over the full 128-note MIDI space against
+drawing with random.choices, which walks the whole weight list on every
+draw. The sampler's empirical draw frequencies are checked against its
+weights, and each scheduler mode is timed over complete tasks (draw the
+note, then record the outcome).
+
+Usage:
+    python benchmarks/bench_scheduler.py --draws 200000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.training.scheduler import MIDI_NOTES, SCHEDULER_MODES, FenwickSampler, NoteScheduler
+
+
+def _rate(count, seconds):
+    """Operations per second, formatted."""
+    return f"{count / seconds:>12,.0f}/s"
+
+
+def bench_sampler(draws, seed):
+    """Time draws and weight updates against list-based weighted choice."""
+    rng = random.Random(seed)
+    weights = [rng.random() for _ in range(MIDI_NOTES)]
+    sampler = FenwickSampler(MIDI_NOTES)
+    sampler.rebuild(weights)
+
+    start = time.perf_counter()
+    for _ in range(draws):
+        sampler.sample(rng)
+    fenwick_sample = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(draws):
+        sampler.update(i % MIDI_NOTES, weights[i % MIDI_NOTES])
+    fenwick_update = time.perf_counter() - start
+
+    # Each draw after a weight change: random.choices has to re-accumulate the list
+    indices = range(MIDI_NOTES)
+    start = time.perf_counter()
+    for _ in range(draws):
+        rng.choices(indices, weights)
+    choices_sample = time.perf_counter() - start
+
+    print(f"Sampler over {MIDI_NOTES} notes, {draws:,} operations")
+    print(f"  Fenwick sample      {_rate(draws, fenwick_sample)}")
+    print(f"  Fenwick update      {_rate(draws, fenwick_update)}")
+    print(f"  random.choices      {_rate(draws, choices_sample)}  "
+          f"({choices_sample / fenwick_sample:.1f}x slower than Fenwick sampling)")
+
+
+def check_distribution(draws, seed):
+    """Check draw frequencies match the weights, including after updates."""
+    rng = random.Random(seed)
+    sampler = FenwickSampler(MIDI_NOTES)
+    sampler.rebuild([rng.random() if rng.random() < 0.5 else 0.0 for _ in range(MIDI_NOTES)])
+    for i in range(0, MIDI_NOTES, 3):
+        sampler.update(i, rng.random() * 10)
+
+    counts = [0] * MIDI_NOTES
+    for _ in range(draws):
+        counts[sampler.sample(rng)] += 1
+    total = sampler.total
+    worst = 0.0
+    for i in range(MIDI_NOTES):
+        expected = sampler.weight(i) / total
+        if expected == 0 and counts[i]:
+            raise AssertionError(f"Drew note {i} with zero weight")
+        # Allow five standard deviations of the binomial count
+        tolerance = 5 * (expected * (1 - expected) / draws) ** 0.5 + 1e-9
+        gap = abs(counts[i] / draws - expected)
+        if gap > tolerance:
+            raise AssertionError(f"Note {i}: drawn {counts[i] / draws:.4f}, expected {expected:.4f}")
+        worst = max(worst, gap)
+    print(f"Draw frequencies match weights (largest gap {worst:.4f})")
+
+
+def bench_modes(tasks, seed):
+    """Time complete tasks in every scheduler mode over the full MIDI range."""
+    print(f"Scheduler, {tasks:,} tasks over {MIDI_NOTES} notes")
+    for mode in SCHEDULER_MODES:
+        rng = random.Random(seed)
+        scheduler = NoteScheduler(mode, seed=seed)
+        scheduler.set_available(range(MIDI_NOTES))
+        skill = [rng.random() for _ in range(MIDI_NOTES)]
+        start = time.perf_counter()
+        for _ in range(tasks):
+            midi = scheduler.next_note()
+            scheduler.record(midi, rng.random() < skill[midi], 1.0 + rng.random() * 4)
+        seconds = time.perf_counter() - start
+        print(f"  {mode:<10} {_rate(tasks, seconds)}")
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--draws", type=int, default=200_000, help="Operations per timing")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    bench_sampler(args.draws, args.seed)
+    check_distribution(args.draws, args.seed)
+    bench_modes(args.draws, args.seed)
+
+
+if __name__ == "__main__":
+    main()
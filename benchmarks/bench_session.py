@@ -0,0 +1,99 @@
+"""
+Simulate training runs through the headless TrainingSession.
+
+A simulated student with a fixed chance of naming each note answers
+every task, guessing other available notes until correct, while the
+session schedules notes and records every attempt in a temporary store.
+Tasks per second are reported for each scheduler mode, and the recorded
+attempts are read back and checked against the simulation's counts.
+
+Usage:
+    python benchmarks/bench_session.py --tasks 50000 --backend csv
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data.manager import TrainingDataManager
+from src.data.storage import create_storage
+from src.training.scheduler import SCHEDULER_MODES
+from src.training.session import TrainingSession
+
+STORE_FILES = {"csv": "training_data.csv", "sqlite": "training_data.db", "binary": "training_data.bin"}
+
+
+def simulate(session, tasks, seed):
+    """Answer ``tasks`` tasks as a student with a per-note chance of success."""
+    rng = random.Random(seed)
+    skill = {midi: rng.uniform(0.2, 0.95) for midi in session.notes_by_midi}
+    notes = list(session.notes_by_midi.values())
+    attempts = 0
+    for _ in range(tasks):
+        note_name, octave, midi = session.start_task()
+        tried = set()
+        correct = rng.random() < skill[midi]
+        while True:
+            if correct:
+                guess = (note_name, octave)
+            else:
+                guess = rng.choice(notes)[:2]
+                while guess == (note_name, octave) or guess in tried:
+                    guess = rng.choice(notes)[:2]
+                tried.add(guess)
+            attempts += 1
+            if session.guess(*guess):
+                break
+            # Wrong buttons are disabled; later guesses get easier
+            correct = rng.random() < 0.5
+    return attempts
+
+
+def run(tasks, backend, seed):
+    """Simulate a run in every scheduler mode and report throughput."""
+    print(f"{tasks:,} simulated tasks per mode, {backend} storage")
+    print(f"{'mode':<10} {'tasks/s':>10} {'attempts/s':>11} {'close s':>8}")
+    for mode in SCHEDULER_MODES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, STORE_FILES[backend])
+            manager = TrainingDataManager(storage=create_storage(backend, path))
+            session = TrainingSession(manager, settings={"scheduler_mode": mode})
+
+            start = time.perf_counter()
+            attempts = simulate(session, tasks, seed)
+            seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            session.close()
+            close_seconds = time.perf_counter() - start
+
+            storage = create_storage(backend, path)
+            stored = len(storage.read_all())
+            storage.close()
+            if stored != attempts:
+                raise AssertionError(f"{mode}: recorded {stored} attempts, simulated {attempts}")
+            stats = manager.get_session_stats()
+            if stats["total_tasks"] != tasks or stats["total_attempts"] != attempts:
+                raise AssertionError(f"{mode}: session stats do not match the simulation")
+            print(f"{mode:<10} {tasks / seconds:>10,.0f} {attempts / seconds:>11,.0f} {close_seconds:>8.2f}")
+
+
+def main():
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50_000)
+    parser.add_argument("--backend", choices=sorted(STORE_FILES), default="csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.tasks, args.backend, args.seed)
+    print("Recorded attempts match the simulation.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Precomputed pitch tables for MIDI notes 0-127.
+
+Note spellings are resolved through one dictionary built at import time:
+sharps and flats, written with ``#``/``♯`` or ``b``/``♭``, map to their
+semitone offset from C of the same octave, so 'C#' and 'D♭' give the
+same MIDI number. Offsets run from -1 (C♭) to 12 (B♯), which puts C♭4
+at the same MIDI number as B3.
+
+MIDI numbers follow the trainer's numbering, MIDI = pitch class +
+octave * 12, and frequencies are those of the MIDI number played, in
+equal temperament with A = 440 Hz at MIDI 69. The trainer's octaves
+therefore sit one below scientific pitch notation: its A4 is MIDI 57
+and sounds at 220 Hz, and concert A is its A5. Every frequency
+function here, table lookups and computed ones alike, uses this one
+numbering.
+
+The array functions map whole arrays through the tables without Python
+loops over rows; names are hashed and looked up once per distinct spelling.
+The distance functions compare correct and guessed notes as semitones,
+cents, frequency ratios and octave-folded pitch-class errors.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.config import MIDI_NOTES, NOTES
+
+FLAT_NOTES = ["C", "D♭", "D", "E♭", "E", "F", "G♭", "G", "A♭", "A", "B♭", "B"]
+
+# Concert A (440 Hz) is MIDI 69, which the trainer names A5
+CONCERT_A_MIDI = 69
+CONCERT_A_FREQUENCY = 440.0
+
+_NATURALS = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+_ACCIDENTALS = {"": 0, "#": 1, "♯": 1, "b": -1, "♭": -1}
+
+# Spelling -> semitones above C of the written octave
+NOTE_OFFSETS = {
+    letter + accidental: semitone + shift
+    for letter, semitone in _NATURALS.items()
+    for accidental, shift in _ACCIDENTALS.items()
+}
+
+# Per-MIDI tables
+MIDI_RANGE = np.arange(MIDI_NOTES)
+PITCH_CLASS_TABLE = MIDI_RANGE % 12
+OCTAVE_TABLE = MIDI_RANGE // 12
+NAME_TABLE = np.array(NOTES, dtype=object)[PITCH_CLASS_TABLE]
+FLAT_NAME_TABLE = np.array(FLAT_NOTES, dtype=object)[PITCH_CLASS_TABLE]
+FREQUENCY_TABLE = CONCERT_A_FREQUENCY * 2.0 ** ((MIDI_RANGE - CONCERT_A_MIDI) / 12)
+
+
+def note_offset(note_name):
+    """
+    Semitones from C of the same octave to a spelled note.
+
+    Args:
+        note_name (str): Note name, e.g. 'C', 'F#', 'B♭' or 'Eb'
+
+    Returns:
+        int: Offset from -1 (C♭) to 12 (B♯)
+    """
+    try:
+        return NOTE_OFFSETS[note_name]
+    except (KeyError, TypeError):
+        raise ValueError(f"Invalid note name: {note_name}") from None
+
+
+def _check_midi(midi_note):
+    """Raise ValueError unless a MIDI number is in range."""
+    if midi_note < 0 or midi_note >= MIDI_NOTES:
+        raise ValueError(f"MIDI note {midi_note} out of range (0-{MIDI_NOTES - 1})")
+
+
+def note_to_midi(note_name, octave):
+    """
+    Convert a note name and octave to a MIDI note number.
+
+    Args:
+        note_name (str): Sharp or flat spelling, e.g. 'C#' or 'D♭'
+        octave (int): Octave number
+
+    Returns:
+        int: MIDI note number
+    """
+    midi_note = note_offset(note_name) + octave * 12
+    _check_midi(midi_note)
+    return midi_note
+
+
+def midi_to_note(midi_note, flats=False):
+    """
+    Convert a MIDI note number to a note name and octave.
+
+    Args:
+        midi_note (int): MIDI note number
+        flats (bool): Spell black keys as flats instead of sharps
+
+    Returns:
+        tuple: (note_name, octave)
+    """
+    _check_midi(midi_note)
+    names = FLAT_NAME_TABLE if flats else NAME_TABLE
+    return names[midi_note], int(OCTAVE_TABLE[midi_note])
+
+
+def note_label(midi_note, flats=False):
+    """
+    Name a MIDI note number the way the trainer does.
+
+    Args:
+        midi_note (int): MIDI note number
+        flats (bool): Spell black keys as flats instead of sharps
+
+    Returns:
+        str: Note name followed by octave, e.g. 'C#4'
+    """
+    note_name, octave = midi_to_note(midi_note, flats)
+    return f"{note_name}{octave}"
+
+
+def midi_to_frequency(midi_note):
+    """
+    Frequency of a MIDI note number.
+
+    Args:
+        midi_note (int): MIDI note number
+
+    Returns:
+        float: Frequency in Hz
+    """
+    _check_midi(midi_note)
+    return float(FREQUENCY_TABLE[midi_note])
+
+
+def note_frequency(note_name, octave):
+    """
+    Frequency of a spelled note.
+
+    Args:
+        note_name (str): Sharp or flat spelling
+        octave (int): Octave number
+
+    Returns:
+        float: Frequency in Hz
+    """
+    return float(FREQUENCY_TABLE[note_to_midi(note_name, octave)])
+
+
+def canonical_name(note_name):
+    """
+    Sharp spelling of a note's pitch class, e.g. 'D♭' -> 'C#'.
+
+    Args:
+        note_name (str): Sharp or flat spelling
+
+    Returns:
+        str: The name in NOTES
+    """
+    return NOTES[note_offset(note_name) % 12]
+
+
+def _offsets(note_names):
+    """Look up the offset of every name in an array, once per distinct spelling."""
+    names = np.asarray(note_names, dtype=object)
+    codes, spellings = pd.factorize(names.ravel(), use_na_sentinel=False)
+    offsets = np.array([note_offset(name) for name in spellings], dtype=np.int64)
+    return offsets[codes.reshape(names.shape)]
+
+
+def _check_midi_array(midi):
+    """Raise ValueError unless every MIDI number of an array is in range."""
+    if midi.size and (midi.min() < 0 or midi.max() >= MIDI_NOTES):
+        bad = midi[(midi < 0) | (midi >= MIDI_NOTES)][0]
+        raise ValueError(f"MIDI note {bad} out of range (0-{MIDI_NOTES - 1})")
+
+
+def notes_to_midi(note_names, octaves):
+    """
+    Convert arrays of note names and octaves to MIDI note numbers.
+
+    Args:
+        note_names (array-like): Sharp or flat spellings
+        octaves (array-like): Octave numbers, broadcast against the names
+
+    Returns:
+        np.ndarray: MIDI note numbers
+    """
+    midi = _offsets(note_names) + np.asarray(octaves, dtype=np.int64) * 12
+    _check_midi_array(midi)
+    return midi
+
+
+def midi_to_names(midi_notes, flats=False):
+    """
+    Note names of an array of MIDI note numbers.
+
+    Args:
+        midi_notes (array-like): MIDI note numbers
+        flats (bool): Spell black keys as flats instead of sharps
+
+    Returns:
+        np.ndarray: Note names (object array)
+    """
+    midi = np.asarray(midi_notes, dtype=np.int64)
+    _check_midi_array(midi)
+    return (FLAT_NAME_TABLE if flats else NAME_TABLE)[midi]
+
+
+def midi_to_octaves(midi_notes):
+    """
+    Octaves of an array of MIDI note numbers.
+
+    Args:
+        midi_notes (array-like): MIDI note numbers
+
+    Returns:
+        np.ndarray: Octave numbers
+    """
+    midi = np.asarray(midi_notes, dtype=np.int64)
+    _check_midi_array(midi)
+    return OCTAVE_TABLE[midi]
+
+
+def midi_to_frequencies(midi_notes):
+    """
+    Frequencies of an array of MIDI note numbers.
+
+    Args:
+        midi_notes (array-like): MIDI note numbers
+
+    Returns:
+        np.ndarray: Frequencies in Hz
+    """
+    midi = np.asarray(midi_notes, dtype=np.int64)
+    _check_midi_array(midi)
+    return FREQUENCY_TABLE[midi]
+
+
+def canonical_names(note_names):
+    """
+    Sharp spellings of an array of note names, so enharmonic spellings group together.
+
+    Args:
+        note_names (array-like): Sharp or flat spellings
+
+    Returns:
+        np.ndarray: Names from NOTES (object array)
+    """
+    return np.array(NOTES, dtype=object)[_offsets(note_names) % 12]
+
+
+def midi_grid(note_names, octave_low, octave_high):
+    """
+    MIDI numbers of every note in every octave of a range.
+
+    Args:
+        note_names (list): Sharp or flat spellings, one grid column each
+        octave_low (int): Lowest octave, the first grid row
+        octave_high (int): Highest octave, the last grid row
+
+    Returns:
+        np.ndarray: (octaves x notes) MIDI note numbers
+    """
+    octaves = np.arange(octave_low, octave_high + 1)[:, None]
+    return notes_to_midi(np.asarray(note_names, dtype=object)[None, :], octaves)
+
+
+def midi_to_hz(midi_notes):
+    """
+    Frequencies of MIDI numbers, fractional numbers included.
+
+    Unlike midi_to_frequencies this computes rather than looks up, so it
+    accepts detuned (non-integer) MIDI numbers. Integer numbers give the
+    same frequencies as the table, e.g. the trainer's A4 (MIDI 57) is 220 Hz.
+
+    Args:
+        midi_notes (array-like): MIDI numbers in the trainer's numbering
+
+    Returns:
+        np.ndarray: Frequencies in Hz
+    """
+    midi = np.asarray(midi_notes, dtype=np.float64)
+    return CONCERT_A_FREQUENCY * np.exp2((midi - CONCERT_A_MIDI) / 12)
+
+
+def hz_to_midi(frequencies):
+    """
+    Fractional MIDI numbers of frequencies; the inverse of midi_to_hz.
+
+    Args:
+        frequencies (array-like): Frequencies in Hz (positive)
+
+    Returns:
+        np.ndarray: MIDI numbers in the trainer's numbering; round them
+            for the nearest note, e.g. 440 Hz gives 69 (the trainer's A5)
+    """
+    hz = np.asarray(frequencies, dtype=np.float64)
+    return CONCERT_A_MIDI + 12 * np.log2(hz / CONCERT_A_FREQUENCY)
+
+
+def cents_between(reference_hz, other_hz):
+    """
+    Interval from one frequency to another in cents.
+
+    Args:
+        reference_hz (array-like): Reference frequencies
+        other_hz (array-like): Compared frequencies
+
+    Returns:
+        np.ndarray: Cents, positive where ``other_hz`` is higher
+    """
+    return 1200 * np.log2(np.asarray(other_hz, dtype=np.float64) / np.asarray(reference_hz, dtype=np.float64))
+
+
+def semitone_distance(correct_midi, guessed_midi):
+    """
+    Signed distance from the correct note to the guess in semitones.
+
+    Args:
+        correct_midi (array-like): Correct MIDI numbers
+        guessed_midi (array-like): Guessed MIDI numbers
+
+    Returns:
+        np.ndarray: Guessed minus correct; positive guesses are too high
+    """
+    return np.asarray(guessed_midi, dtype=np.int64) - np.asarray(correct_midi, dtype=np.int64)
+
+
+def cents_distance(correct_midi, guessed_midi):
+    """
+    Signed distance from the correct note to the guess in cents.
+
+    Args:
+        correct_midi (array-like): Correct MIDI numbers, fractional allowed
+        guessed_midi (array-like): Guessed MIDI numbers, fractional allowed
+
+    Returns:
+        np.ndarray: Cents, positive where the guess is higher
+    """
+    return 100 * (np.asarray(guessed_midi, dtype=np.float64) - np.asarray(correct_midi, dtype=np.float64))
+
+
+def frequency_ratio(correct_midi, guessed_midi):
+    """
+    Frequency of the guess over the frequency of the correct note.
+
+    Args:
+        correct_midi (array-like): Correct MIDI numbers
+        guessed_midi (array-like): Guessed MIDI numbers
+
+    Returns:
+        np.ndarray: Ratios; 2.0 is an octave too high, 0.5 an octave too low
+    """
+    return np.exp2(cents_distance(correct_midi, guessed_midi) / 1200)
+
+
+def folded_distance(correct_midi, guessed_midi):
+    """
+    Signed pitch-class error with whole octaves removed.
+
+    Args:
+        correct_midi (array-like): Correct MIDI numbers
+        guessed_midi (array-like): Guessed MIDI numbers
+
+    Returns:
+        np.ndarray: Semitones in [-6, 5]; 0 where only the octave is wrong
+    """
+    return (semitone_distance(correct_midi, guessed_midi) + 6) % 12 - 6
+
+
+def octave_distance(correct_midi, guessed_midi):
+    """
+    Whole octaves between the correct note and the guess, after folding.
+
+    Args:
+        correct_midi (array-like): Correct MIDI numbers
+        guessed_midi (array-like): Guessed MIDI numbers
+
+    Returns:
+        np.ndarray: Octaves, so that semitones = 12 * octaves + folded distance
+    """
+    distance = semitone_distance(correct_midi, guessed_midi)
+    return (distance - folded_distance(correct_midi, guessed_midi)) // 12
@@ -5,6 +5,7 @@ Audio player module for MIDI note playback.
 import pygame
 import pygame.midi
 from PyQt5.QtCore import QTimer
+from src.audio import pitch
 from src.config import MIDI_CHANNEL, MIDI_VELOCITY, NOTE_DURATION_MS
 
 
@@ -83,24 +84,13 @@ def note_to_midi(note_name, octave):
     Convert note name and octave to MIDI note number.
     
     Args:
-        note_name (str): Note name (e.g., 'C', 'C#', 'F#')
+        note_name (str): Note name, sharp or flat (e.g., 'C', 'C#', 'D♭')
         octave (int): Octave number
         
     Returns:
         int: MIDI note number
     """
-    from src.config import NOTES
-    
-    if note_name not in NOTES:
-        raise ValueError(f"Invalid note name: {note_name}")
-    
-    note_number = NOTES.index(note_name)
-    midi_note = note_number + (octave * 12)
-    
-    if midi_note < 0 or midi_note > 127:
-        raise ValueError(f"MIDI note {midi_note} out of range (0-127)")
-    
-    return midi_note
+    return pitch.note_to_midi(note_name, octave)
 
 
 def midi_to_note(midi_note):
@@ -113,13 +103,4 @@ def midi_to_note(midi_note):
     Returns:
         tuple: (note_name, octave)
     """
-    from src.config import NOTES
-    
-    if midi_note < 0 or midi_note > 127:
-        raise ValueError(f"MIDI note {midi_note} out of range (0-127)")
-    
-    octave = midi_note // 12
-    note_index = midi_note % 12
-    note_name = NOTES[note_index]
-    
-    return note_name, octave
+    return pitch.midi_to_note(midi_note)
@@ -10,6 +10,7 @@ NOTES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
 # MIDI Configuration
 MIDI_CHANNEL = 1
 MIDI_VELOCITY = 127
+MIDI_NOTES = 128
 NOTE_DURATION_MS = 3000
 
 # Note Groups for training
@@ -24,6 +25,10 @@ NOTE_GROUPS = {
     "Pentatonic": ["C", "D", "E", "G", "A"]
 }
 
+# Note scheduling: "uniform", "adaptive" (favours missed, slow and unplayed
+# notes) or "spaced" (spaced repetition)
+SCHEDULER_MODE = "adaptive"
+
 # UI Configuration
 BUTTON_HEIGHT = 80
 BUTTON_WIDTH = 100
@@ -32,7 +37,12 @@ WINDOW_MIN_HEIGHT = 600
 
 # Data Configuration
 DATA_FILE = "data/training_data.csv"
-BACKUP_INTERVAL = 50  # Number of attempts before backup
+SQLITE_DATA_FILE = "data/training_data.db"
+BINARY_DATA_FILE = "data/training_data.bin"
+PARTITION_DIR = "data/partitions"
+STORAGE_BACKEND = "csv"  # "csv", "sqlite", "binary" or "partitioned"
+BACKUP_INTERVAL = 50  # Number of buffered attempts that triggers a write to disk
+FLUSH_INTERVAL_SECONDS = 5.0  # Maximum time an attempt waits in the write buffer
 
 # Application Configuration
 APP_NAME = "Perfect Pitch Trainer"
@@ -0,0 +1,281 @@
+"""
+Fixed-width binary format for attempt records.
+
+Each record is a packed little-endian struct (RECORD_DTYPE) following a
+16-byte file header, so a log can be memory-mapped as a NumPy structured
+array without parsing. Note names are stored as indices into
+NOTE_SPELLINGS, so flats read back as they were recorded, and note group
+names are dictionary-encoded in a ``.groups`` sidecar file with one name
+per line.
+"""
+
+import os
+import struct
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from src.config import NOTES
+from src.data.schema import ATTEMPT_COLUMNS, to_bool_int
+
+MAGIC = b"PPTLOG"
+FORMAT_VERSION = 1
+
+RECORD_DTYPE = np.dtype([
+    ("session_id", "V16"),
+    ("task_id", "V16"),
+    ("timestamp", "<i8"),
+    ("correct_midi", "u1"),
+    ("correct_note", "u1"),
+    ("correct_octave", "u1"),
+    ("guessed_midi", "u1"),
+    ("guessed_note", "u1"),
+    ("guessed_octave", "u1"),
+    ("is_correct", "u1"),
+    ("attempt_number", "<u2"),
+    ("play_again_count", "<u2"),
+    ("note_group", "u1"),
+    ("octave_range_low", "u1"),
+    ("octave_range_high", "u1"),
+])
+
+# Index -> recorded note spelling. The first twelve are the sharp names
+# every log has used; new spellings are only ever appended
+NOTE_SPELLINGS = NOTES + [
+    "D♭", "E♭", "G♭", "A♭", "B♭",
+    "Db", "Eb", "Gb", "Ab", "Bb",
+    "C♯", "D♯", "F♯", "G♯", "A♯",
+    "C♭", "F♭", "Cb", "Fb", "E#", "B#", "E♯", "B♯",
+]
+_SPELLING_INDEX = {name: index for index, name in enumerate(NOTE_SPELLINGS)}
+
+HEADER_STRUCT = struct.Struct("<6sHII")
+HEADER_SIZE = HEADER_STRUCT.size
+
+
+def _header():
+    """Build the file header for the current format version."""
+    return HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, RECORD_DTYPE.itemsize, 0)
+
+
+def initialize_log(path):
+    """
+    Create an empty binary log if it doesn't exist.
+
+    Args:
+        path (str): Path to the log file
+    """
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(_header())
+
+
+def validate_header(path):
+    """
+    Check that a file is a binary attempt log this code can read.
+
+    Args:
+        path (str): Path to the log file
+    """
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is not a binary attempt log (truncated header)")
+    magic, version, record_size, _ = HEADER_STRUCT.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary attempt log")
+    if version != FORMAT_VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"Unsupported binary log version {version} in {path}")
+
+
+def record_count(path):
+    """
+    Get the number of complete records in a log.
+
+    Args:
+        path (str): Path to the log file
+
+    Returns:
+        int: Number of records
+    """
+    return max(os.path.getsize(path) - HEADER_SIZE, 0) // RECORD_DTYPE.itemsize
+
+
+def read_binary_log(path):
+    """
+    Memory-map a binary log as a structured array without copying it.
+
+    Args:
+        path (str): Path to the log file
+
+    Returns:
+        np.ndarray: Read-only structured array with RECORD_DTYPE
+    """
+    validate_header(path)
+    count = record_count(path)
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r',
+                     offset=HEADER_SIZE, shape=(count,))
+
+
+class GroupDictionary:
+    """Persistent mapping between note group names and 1-byte codes."""
+
+    def __init__(self, log_path):
+        """
+        Load the dictionary stored next to a binary log.
+
+        Args:
+            log_path (str): Path to the log file
+        """
+        self.path = str(log_path) + ".groups"
+        self.names = []
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.names = [line.rstrip("\n") for line in f]
+        self._codes = {name: code for code, name in enumerate(self.names)}
+
+    def encode(self, name):
+        """
+        Get the code for a group name, adding it to the dictionary if new.
+
+        Args:
+            name (str): Note group name
+
+        Returns:
+            int: Group code
+        """
+        name = "" if name is None else str(name)
+        code = self._codes.get(name)
+        if code is None:
+            if len(self.names) >= 256:
+                raise ValueError("Binary log supports at most 256 note groups")
+            code = len(self.names)
+            self.names.append(name)
+            self._codes[name] = code
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(name + "\n")
+        return code
+
+    def decode(self, codes):
+        """
+        Map an array of codes back to group names.
+
+        Args:
+            codes (np.ndarray): Group codes
+
+        Returns:
+            np.ndarray: Group names
+        """
+        lookup = np.array(self.names + [""], dtype=object)
+        return lookup[np.minimum(codes, len(self.names))]
+
+
+def _note_index(note_name, midi):
+    """Get the NOTE_SPELLINGS index of a note, falling back to its MIDI pitch class."""
+    index = _SPELLING_INDEX.get(note_name)
+    if index is None:
+        return int(midi) % 12
+    return index
+
+
+def encode_records(records, groups):
+    """
+    Pack attempt records into a structured array.
+
+    Args:
+        records (list): Attempt records as dicts keyed by column name
+        groups (GroupDictionary): Dictionary used to encode note groups
+
+    Returns:
+        np.ndarray: Records with RECORD_DTYPE
+    """
+    out = np.zeros(len(records), dtype=RECORD_DTYPE)
+    for i, r in enumerate(records):
+        out[i] = (
+            uuid.UUID(str(r["session_id"])).bytes,
+            uuid.UUID(str(r["task_id"])).bytes,
+            pd.Timestamp(r["timestamp"]).value,
+            r["correct_midi"],
+            _note_index(r["correct_note_name"], r["correct_midi"]),
+            r["correct_octave"],
+            r["guessed_midi"],
+            _note_index(r["guessed_note_name"], r["guessed_midi"]),
+            r["guessed_octave"],
+            to_bool_int(r["is_correct"]),
+            r["attempt_number"],
+            r["play_again_count"],
+            groups.encode(r["note_group"]),
+            r["octave_range_low"],
+            r["octave_range_high"],
+        )
+    return out
+
+
+def append_records(path, records, groups):
+    """
+    Append attempt records to a binary log.
+
+    Args:
+        path (str): Path to the log file
+        records (list): Attempt records as dicts keyed by column name
+        groups (GroupDictionary): Dictionary used to encode note groups
+    """
+    packed = encode_records(records, groups)
+    with open(path, 'ab') as f:
+        # Drop a partial record left by an interrupted write so later
+        # records stay aligned
+        size = f.seek(0, os.SEEK_END)
+        partial = (size - HEADER_SIZE) % RECORD_DTYPE.itemsize
+        if partial:
+            f.truncate(size - partial)
+        f.write(packed.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _uuid_column(values):
+    """Decode a V16 column to UUID strings, converting each distinct value once."""
+    if len(values) == 0:
+        return np.array([], dtype=object)
+    unique, inverse = np.unique(values, return_inverse=True)
+    names = np.array([str(uuid.UUID(bytes=v.tobytes())) for v in unique], dtype=object)
+    return names[inverse.ravel()]
+
+
+def to_dataframe(records, groups, columns=None):
+    """
+    Convert binary records to a DataFrame in the CSV column layout.
+
+    Numeric columns are built directly from the record fields; only the
+    UUID, note name and group columns need decoding.
+
+    Args:
+        records (np.ndarray): Records with RECORD_DTYPE
+        groups (GroupDictionary): Dictionary used to decode note groups
+        columns (list): Subset of columns to produce, or None for all
+
+    Returns:
+        pd.DataFrame: Attempt rows
+    """
+    notes = np.array(NOTE_SPELLINGS, dtype=object)
+    builders = {
+        "session_id": lambda: _uuid_column(records["session_id"]),
+        "task_id": lambda: _uuid_column(records["task_id"]),
+        "timestamp": lambda: pd.to_datetime(records["timestamp"]),
+        "correct_note_name": lambda: notes[records["correct_note"]],
+        "correct_octave": lambda: records["correct_octave"].astype(np.int64),
+        "correct_midi": lambda: records["correct_midi"].astype(np.int64),
+        "guessed_note_name": lambda: notes[records["guessed_note"]],
+        "guessed_octave": lambda: records["guessed_octave"].astype(np.int64),
+        "guessed_midi": lambda: records["guessed_midi"].astype(np.int64),
+        "is_correct": lambda: records["is_correct"].astype(bool),
+        "attempt_number": lambda: records["attempt_number"].astype(np.int64),
+        "play_again_count": lambda: records["play_again_count"].astype(np.int64),
+        "note_group": lambda: groups.decode(records["note_group"]),
+        "octave_range_low": lambda: records["octave_range_low"].astype(np.int64),
+        "octave_range_high": lambda: records["octave_range_high"].astype(np.int64),
+    }
+    return pd.DataFrame({col: builders[col]() for col in (columns or ATTEMPT_COLUMNS)})
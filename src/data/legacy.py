@@ -0,0 +1,351 @@
+"""
+Streaming importer for the legacy training data formats.
+
+The original trainer wrote ``data/data.csv``, ``data/data_v2.csv`` and
+``archive/data082723.csv`` with one row per guess:
+
+* v1: ``CorrectNote, SelectedNote, PlayAgainCount, time``
+* v2: ``ID, CorrectNote, SelectedNote, PlayAgainCount, time, grouping, Notes, NotesIndex``
+
+``CorrectNote`` is a MIDI number in the same ``octave * 12 + index``
+numbering as ``note_to_midi`` and ``SelectedNote`` is an index into
+``NOTES``; legacy guesses had no octave, so the guess is taken to be in
+the octave of the correct note. Tasks, attempt numbers and sessions are
+synthesized from row order, and ids are derived deterministically from
+the source file so repeated imports produce the same ids.
+"""
+
+import argparse
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import DATA_FILE, NOTES
+from src.data.schema import ATTEMPT_COLUMNS
+from src.data.storage import open_storage
+
+LEGACY_SCHEMAS = {
+    "v1": ["CorrectNote", "SelectedNote", "PlayAgainCount", "time"],
+    "v2": ["ID", "CorrectNote", "SelectedNote", "PlayAgainCount", "time",
+           "grouping", "Notes", "NotesIndex"],
+}
+
+LEGACY_DTYPES = {
+    "ID": str, "CorrectNote": np.int16, "SelectedNote": np.int8,
+    "PlayAgainCount": np.int32, "time": str, "grouping": str,
+}
+
+LEGACY_NOTE_GROUP = "Legacy"
+LEGACY_OCTAVE_RANGE = (2, 6)
+
+# Namespace for ids synthesized from legacy files
+LEGACY_NAMESPACE = uuid.UUID("6f1c1f52-3a0e-4d8e-9a55-5f3d1b0c2a71")
+
+MINUTE_SECOND = re.compile(r"^\d{1,2}:\d{2}(\.\d+)?$")
+
+
+def detect_schema(path):
+    """
+    Detect which legacy schema a file uses.
+
+    Args:
+        path (str): Path to a legacy CSV file
+
+    Returns:
+        str: Schema name ('v1' or 'v2')
+    """
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    for name, expected in LEGACY_SCHEMAS.items():
+        if columns == expected:
+            return name
+    if columns == ATTEMPT_COLUMNS:
+        raise ValueError(f"{path} already uses the current format")
+    raise ValueError(f"Unrecognized legacy schema in {path}: {columns}")
+
+
+def _file_date(path):
+    """Get a base date for a file from an MMDDYY stamp in its name, if any."""
+    match = re.search(r"(\d{2})(\d{2})(\d{2})", Path(path).stem)
+    if match:
+        month, day, year = (int(g) for g in match.groups())
+        try:
+            return pd.Timestamp(datetime(2000 + year, month, day))
+        except ValueError:
+            pass
+    return None
+
+
+def _parse_times(values):
+    """
+    Parse legacy time cells.
+
+    Legacy files hold few distinct time strings, so each distinct value is
+    parsed once and the results are broadcast back to the rows.
+
+    Returns:
+        tuple: (absolute timestamps or NaT, minute:second offsets in seconds or NaN)
+    """
+    codes, uniques = pd.factorize(values.fillna("").astype(str).str.strip())
+    uniques = pd.Series(uniques, dtype=object)
+    is_offset = uniques.str.match(MINUTE_SECOND).astype(bool)
+
+    unique_offsets = pd.Series(np.nan, index=uniques.index)
+    if is_offset.any():
+        parts = uniques[is_offset].str.split(":", n=1, expand=True)
+        unique_offsets[is_offset] = parts[0].astype(float) * 60 + parts[1].astype(float)
+    unique_absolute = pd.Series(
+        [pd.NaT if offset or not v else pd.to_datetime(v, errors="coerce")
+         for v, offset in zip(uniques, is_offset)],
+        dtype="datetime64[ns]"
+    )
+
+    absolute = pd.Series(unique_absolute.to_numpy()[codes], index=values.index)
+    offsets = pd.Series(unique_offsets.to_numpy()[codes], index=values.index)
+    return absolute, offsets
+
+
+def _first_timestamp(path, chunksize):
+    """Find the first absolute timestamp in a file by scanning only its time column."""
+    for chunk in pd.read_csv(path, usecols=["time"], dtype=str, chunksize=chunksize):
+        absolute, _ = _parse_times(chunk["time"])
+        valid = absolute.dropna()
+        if not valid.empty:
+            return valid.iloc[0]
+    return None
+
+
+class _ImportState:
+    """Carries task, attempt and clock state across chunk boundaries."""
+
+    def __init__(self, base_time):
+        self.base_time = base_time
+        self.last_time = base_time
+        self.last_offset = None
+        self.hour_carry = 0.0
+        self.prev_correct_midi = None
+        self.prev_task_key = None
+        self.prev_was_correct = True
+        self.task_seq = 0
+        self.open_attempts = 0
+        self.run_value = None
+        self.run_length = 0
+
+
+def _continue_runs(starts, carried):
+    """
+    Number rows within runs that begin where ``starts`` is True.
+
+    Rows before the first start continue a run that already has
+    ``carried`` rows, so numbering carries across chunk boundaries.
+
+    Returns:
+        np.ndarray: 1-based position of each row within its run
+    """
+    idx = np.arange(len(starts))
+    last_start = np.maximum.accumulate(np.where(starts, idx, -1))
+    return np.where(last_start >= 0, idx - last_start + 1, carried + idx + 1)
+
+
+def _convert_chunk(chunk, schema, source, state):
+    """Convert one chunk of legacy rows into current-format attempt rows."""
+    n = len(chunk)
+    correct_midi = chunk["CorrectNote"].to_numpy(dtype=np.int64)
+    selected = chunk["SelectedNote"].to_numpy(dtype=np.int64)
+    correct_octave = correct_midi // 12
+    correct_index = correct_midi % 12
+    is_correct = selected == correct_index
+    guessed_midi = correct_octave * 12 + selected
+
+    # Timestamps: absolute values carry forward, minute:second values are
+    # offsets from the base time that wrap every hour
+    absolute, offsets = _parse_times(chunk["time"])
+    offset_values = offsets.to_numpy()
+    has_offset = ~np.isnan(offset_values)
+    if has_offset.any():
+        vals = offset_values[has_offset]
+        previous = np.concatenate(([state.last_offset if state.last_offset is not None else vals[0]], vals[:-1]))
+        wraps = np.cumsum(vals < previous) * 3600.0 + state.hour_carry
+        absolute[has_offset] = state.base_time + pd.to_timedelta(vals + wraps, unit="s")
+        state.hour_carry = wraps[-1]
+        state.last_offset = vals[-1]
+    absolute = absolute.ffill().fillna(state.last_time)
+    state.last_time = absolute.iloc[-1]
+
+    # Keep row order within repeated (e.g. date-only) timestamps
+    stamp = absolute.to_numpy()
+    prior = np.concatenate(([state.run_value if state.run_value is not None else stamp[0]], stamp[:-1]))
+    run_starts = stamp != prior
+    if state.run_value is None:
+        run_starts[0] = True
+    position = _continue_runs(run_starts, state.run_length) - 1
+    timestamps = absolute + pd.to_timedelta(position, unit="ms")
+    state.run_value = stamp[-1]
+    state.run_length = int(position[-1]) + 1
+
+    # Tasks: a new task starts after a correct guess, when the played note
+    # changes, or when the v2 task ID changes
+    prev_midi = np.concatenate(([state.prev_correct_midi if state.prev_correct_midi is not None else -1],
+                                correct_midi[:-1]))
+    prev_correct = np.concatenate(([state.prev_was_correct], is_correct[:-1]))
+    new_task = prev_correct | (correct_midi != prev_midi)
+    task_keys = None
+    if schema == "v2":
+        task_keys = chunk["ID"].fillna("").to_numpy(dtype=object)
+        prev_keys = np.concatenate(([state.prev_task_key], task_keys[:-1]))
+        new_task |= task_keys != prev_keys
+    attempt_number = _continue_runs(new_task, state.open_attempts)
+    task_seq = state.task_seq + np.cumsum(new_task)
+
+    # Task ids share a per-file prefix; the last 12 hex digits are the task number
+    task_prefix = str(uuid.uuid5(LEGACY_NAMESPACE, f"{source}:task"))[:24]
+    task_ids = (task_prefix + pd.Series(task_seq).map("{:012x}".format)).to_numpy()
+    if task_keys is not None:
+        task_ids = np.where(task_keys != "", task_keys, task_ids)
+
+    stamp = timestamps.to_numpy()
+    dates = pd.Series(np.datetime_as_string(stamp, unit="D"))
+    session_names = {d: str(uuid.uuid5(LEGACY_NAMESPACE, f"{source}:session:{d}"))
+                     for d in dates.unique()}
+
+    note_names = np.array(NOTES, dtype=object)
+    if schema == "v2":
+        note_group = chunk["grouping"].fillna(LEGACY_NOTE_GROUP).to_numpy()
+    else:
+        note_group = np.full(n, LEGACY_NOTE_GROUP, dtype=object)
+
+    state.prev_correct_midi = int(correct_midi[-1])
+    state.prev_was_correct = bool(is_correct[-1])
+    state.prev_task_key = task_keys[-1] if task_keys is not None else None
+    state.task_seq = int(task_seq[-1])
+    state.open_attempts = int(attempt_number[-1])
+
+    return pd.DataFrame({
+        "session_id": dates.map(session_names).to_numpy(),
+        "task_id": task_ids,
+        "timestamp": np.datetime_as_string(stamp, unit="us"),
+        "correct_note_name": note_names[correct_index],
+        "correct_octave": correct_octave,
+        "correct_midi": correct_midi,
+        "guessed_note_name": note_names[selected],
+        "guessed_octave": correct_octave,
+        "guessed_midi": guessed_midi,
+        "is_correct": is_correct,
+        "attempt_number": attempt_number,
+        "play_again_count": chunk["PlayAgainCount"].to_numpy(),
+        "note_group": note_group,
+        "octave_range_low": LEGACY_OCTAVE_RANGE[0],
+        "octave_range_high": LEGACY_OCTAVE_RANGE[1],
+    })
+
+
+def iter_legacy_attempts(path, chunksize=100000):
+    """
+    Stream a legacy file as current-format attempt chunks.
+
+    Memory use is bounded by ``chunksize`` regardless of file size.
+
+    Args:
+        path (str): Path to a legacy CSV file
+        chunksize (int): Number of legacy rows converted at a time
+
+    Yields:
+        pd.DataFrame: Attempt rows with ATTEMPT_COLUMNS
+    """
+    schema = detect_schema(path)
+    base_time = _file_date(path)
+    if base_time is None:
+        base_time = _first_timestamp(path, chunksize)
+    if base_time is None:
+        base_time = pd.Timestamp(datetime.fromtimestamp(Path(path).stat().st_mtime).date())
+
+    state = _ImportState(base_time)
+    source = Path(path).name
+    usecols = [c for c in LEGACY_SCHEMAS[schema] if c in LEGACY_DTYPES]
+    dtypes = {c: LEGACY_DTYPES[c] for c in usecols}
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=chunksize):
+        chunk = chunk.dropna(subset=["CorrectNote", "SelectedNote"])
+        if not chunk.empty:
+            yield _convert_chunk(chunk, schema, source, state)
+
+
+def _attempt_keys(df):
+    """Key each attempt row by task id and attempt number."""
+    return df["task_id"].astype(str) + ":" + df["attempt_number"].astype(str)
+
+
+def imported_keys(storage, chunksize=100000):
+    """
+    Collect the task id and attempt number of every attempt in a store.
+
+    Args:
+        storage (StorageBackend): Attempt store
+        chunksize (int): Attempts read per chunk
+
+    Returns:
+        set: ``task_id:attempt_number`` keys
+    """
+    keys = set()
+    for chunk in storage.iter_chunks(chunksize, columns=["task_id", "attempt_number"]):
+        keys.update(_attempt_keys(chunk))
+    return keys
+
+
+def import_legacy_file(path, storage, chunksize=100000, existing=None):
+    """
+    Import a legacy file into a storage backend.
+
+    Ids are deterministic, so attempts already in the store (from an
+    earlier or interrupted import of the same file) are skipped rather
+    than appended twice.
+
+    Args:
+        path (str): Path to a legacy CSV file
+        storage (StorageBackend): Destination store
+        chunksize (int): Number of legacy rows converted at a time
+        existing (set): Keys from imported_keys, updated with the imported
+            attempts; read from the store if omitted
+
+    Returns:
+        tuple: (attempts imported, attempts skipped as already imported)
+    """
+    if existing is None:
+        existing = imported_keys(storage, chunksize)
+    imported = skipped = 0
+    for attempts in iter_legacy_attempts(path, chunksize):
+        keys = _attempt_keys(attempts)
+        new = ~keys.isin(existing).to_numpy()
+        skipped += int((~new).sum())
+        if new.any():
+            storage.append_frame(attempts[new])
+            existing.update(keys[new])
+            imported += int(new.sum())
+    return imported, skipped
+
+
+def main():
+    """Command-line entry point for importing legacy data."""
+    parser = argparse.ArgumentParser(description="Import legacy training data")
+    parser.add_argument("files", nargs="+", help="Legacy CSV files to import")
+    parser.add_argument("--dest", default=DATA_FILE, help="Destination store")
+    parser.add_argument("--chunksize", type=int, default=100000)
+    args = parser.parse_args()
+
+    storage = open_storage(args.dest)
+    try:
+        existing = imported_keys(storage, args.chunksize)
+        for path in args.files:
+            count, skipped = import_legacy_file(path, storage, args.chunksize, existing)
+            message = f"Imported {count} attempts from {path} ({detect_schema(path)})"
+            if skipped:
+                message += f", skipped {skipped} already imported"
+            print(message)
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Advisory inter-process file locks for shared data stores.
+"""
+
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive advisory lock held on a separate ``.lock`` file.
+
+    Every process writing to a shared store takes the same lock around
+    each append, so records from different processes never interleave.
+    Usable as a context manager.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the lock.
+
+        Args:
+            path (str): Path of the lock file (created if missing)
+        """
+        self.path = str(path)
+        self._fd = None
+
+    def acquire(self):
+        """Block until the lock is held."""
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            return
+        while True:
+            try:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ~10 seconds; keep waiting
+                time.sleep(0.05)
+
+    def release(self):
+        """Release the lock."""
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -2,50 +2,121 @@
 Data management for training session recording and analysis.
 """
 
-import pandas as pd
 import datetime
-import uuid
 import os
-from pathlib import Path
-from src.config import DATA_FILE
+import random
+import uuid
+from src.data.schema import to_bool_int
+from src.data.skill import SkillModel, skill_path, timestamp_seconds
+from src.data.stats import SessionStats
+from src.data.storage import create_storage
+from src.data.tasks import (TaskFactStore, TaskFactTracker, rebuild_task_facts, task_facts_path,
+                            task_table_complete)
+from src.data.timeseries import AccuracyTrend
+from src.data.writer import BufferedAttemptWriter
+
+# Random version-4 task IDs without an os.urandom call per task; the
+# generator is seeded from os.urandom once per process, and reseeded in
+# forked children, which would otherwise repeat their parent's IDs
+_task_ids = random.Random()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_task_ids.seed)
 
 
 class TrainingDataManager:
     """Manages training session data recording and retrieval."""
     
-    def __init__(self, data_file=None):
+    def __init__(self, data_file=None, session_id=None, storage=None, backend=None,
+                 tasks_file=None):
         """
         Initialize the data manager.
         
         Args:
             data_file (str): Path to the data file
+            session_id (str): Existing session to resume, or None for a new one
+            storage (StorageBackend): Storage backend to use instead of creating one
+            backend (str): Backend name passed to create_storage ('csv', 'sqlite',
+                'binary' or 'partitioned')
+            tasks_file (str): Task table path; defaults to ``<store>.tasks.csv``
         """
-        self.data_file = data_file or DATA_FILE
-        self.session_id = str(uuid.uuid4())
+        self.storage = storage or create_storage(backend, data_file)
+        self.data_file = self.storage.path
+        self.session_id = session_id or str(uuid.uuid4())
         self.current_task_id = None
-        self._ensure_data_directory()
-        self._initialize_data_file()
+        self.stats = SessionStats(self.session_id)
+        if session_id is not None:
+            self._seed_session_stats()
+        self.writer = BufferedAttemptWriter(self.storage)
+        tasks_file = tasks_file or task_facts_path(self.storage.path)
+        if not task_table_complete(self.storage, tasks_file):
+            self._build_task_table(tasks_file)
+        self.task_tracker = TaskFactTracker()
+        self.task_store = TaskFactStore(tasks_file)
+        self.task_writer = BufferedAttemptWriter(self.task_store)
+        self.trend = AccuracyTrend()
+        self._seed_trend(self.task_store)
+        self.skill_file = skill_path(self.storage.path)
+        self.skill = self._load_skill()
+    
+    def _build_task_table(self, tasks_file):
+        """Derive the task table from the attempts if it is missing, outdated or incomplete."""
+        try:
+            rebuild_task_facts(self.storage, tasks_file)
+        except Exception as e:
+            print(f"Error building task table: {e}")
+    
+    def _seed_session_stats(self):
+        """Seed the running session statistics once from storage."""
+        try:
+            df = self.storage.read_session(self.session_id, columns=[
+                "session_id", "task_id", "correct_note_name", "correct_octave",
+                "is_correct", "attempt_number"
+            ])
+            self.stats.seed_from_frame(df)
+        except Exception as e:
+            print(f"Error seeding session stats: {e}")
     
-    def _ensure_data_directory(self):
-        """Ensure the data directory exists."""
-        data_dir = Path(self.data_file).parent
-        data_dir.mkdir(parents=True, exist_ok=True)
+    def _seed_trend(self, task_store):
+        """Seed the recent accuracy trend from the tasks of earlier sessions."""
+        try:
+            tasks = task_store.read(columns=["first_try_correct"])
+            self.trend.seed(tasks["first_try_correct"].map(to_bool_int).to_numpy())
+        except Exception as e:
+            print(f"Error seeding accuracy trend: {e}")
     
-    def _initialize_data_file(self):
-        """Initialize the data file with headers if it doesn't exist."""
-        if not os.path.exists(self.data_file):
-            headers = [
-                "session_id", "task_id", "timestamp", "correct_note_name", 
-                "correct_octave", "correct_midi", "guessed_note_name", 
-                "guessed_octave", "guessed_midi", "is_correct", "attempt_number",
-                "play_again_count", "note_group", "octave_range_low", "octave_range_high"
-            ]
-            df = pd.DataFrame(columns=headers)
-            df.to_csv(self.data_file, index=False)
+    def _load_skill(self):
+        """Load the per-note skill model, deriving it once from the task table if missing."""
+        try:
+            if os.path.exists(self.skill_file):
+                return SkillModel.load(self.skill_file)
+            tasks = self.task_store.read(columns=["correct_midi", "first_try_correct", "first_timestamp"])
+            skill = SkillModel.from_tasks(tasks)
+            skill.save(self.skill_file)
+            return skill
+        except Exception as e:
+            print(f"Error loading skill model: {e}")
+            return SkillModel()
+    
+    def task_history(self, columns=None):
+        """
+        Read the finished tasks of all sessions, oldest first.
+        
+        Args:
+            columns (list): Task table columns to read; defaults to all
+            
+        Returns:
+            pd.DataFrame: One row per task, or None if the table can't be read
+        """
+        try:
+            self.task_writer.flush()
+            return self.task_store.read(columns=columns)
+        except Exception as e:
+            print(f"Error reading task history: {e}")
+            return None
     
     def start_new_task(self):
         """Start a new training task."""
-        self.current_task_id = str(uuid.uuid4())
+        self.current_task_id = str(uuid.UUID(int=_task_ids.getrandbits(128), version=4))
         return self.current_task_id
     
     def record_attempt(self, correct_note_name, correct_octave, correct_midi,
@@ -55,6 +126,10 @@ class TrainingDataManager:
         """
         Record a training attempt.
         
+        The attempt is queued on the write-behind buffer and written to disk
+        in the background, so this does no file I/O. When the attempt
+        finishes a task, the task's facts are queued for the task table.
+        
         Args:
             correct_note_name (str): The correct note name
             correct_octave (int): The correct octave
@@ -69,10 +144,11 @@ class TrainingDataManager:
             octave_range_low (int): Lower octave range
             octave_range_high (int): Higher octave range
         """
+        now = datetime.datetime.now()
         data = {
             "session_id": self.session_id,
             "task_id": self.current_task_id,
-            "timestamp": datetime.datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "correct_note_name": correct_note_name,
             "correct_octave": correct_octave,
             "correct_midi": correct_midi,
@@ -87,54 +163,52 @@ class TrainingDataManager:
             "octave_range_high": octave_range_high
         }
         
-        df = pd.DataFrame([data])
-        df.to_csv(self.data_file, mode='a', header=False, index=False)
+        self.writer.write(data)
+        for fact in self.task_tracker.add_attempt(data):
+            self.task_writer.write(fact)
+        self.stats.add_attempt(self.current_task_id, correct_note_name,
+                               correct_octave, is_correct, attempt_number)
+        if attempt_number == 1:
+            self.trend.add(to_bool_int(is_correct))
+            self.skill.update(correct_midi, is_correct, timestamp_seconds(now))
     
     def get_session_stats(self):
         """
         Get statistics for the current session.
         
+        Statistics are maintained in memory as attempts are recorded, so this
+        never reads the data file.
+        
         Returns:
-            dict: Session statistics
+            dict: Session statistics, plus the rolling and EWMA first-try
+                accuracy over the most recent tasks of all sessions
         """
+        stats = self.stats.as_dict()
+        stats.update(self.trend.as_dict())
+        return stats
+    
+    def _save_skill(self):
+        """Persist the per-note skill model."""
         try:
-            df = pd.read_csv(self.data_file)
-            session_data = df[df['session_id'] == self.session_id]
-            
-            if session_data.empty:
-                return {
-                    "total_tasks": 0,
-                    "correct_first_try": 0,
-                    "total_attempts": 0,
-                    "accuracy": 0.0
-                }
-            
-            # Count completed tasks (tasks where is_correct == True)
-            completed_tasks = session_data[session_data['is_correct'] == True]['task_id'].nunique()
-            
-            # Count first-try successes
-            first_try_correct = len(session_data[
-                (session_data['attempt_number'] == 1) & 
-                (session_data['is_correct'] == True)
-            ])
-            
-            total_attempts = len(session_data)
-            accuracy = first_try_correct / completed_tasks if completed_tasks > 0 else 0.0
-            
-            return {
-                "total_tasks": completed_tasks,
-                "correct_first_try": first_try_correct,
-                "total_attempts": total_attempts,
-                "accuracy": accuracy
-            }
+            self.skill.save(self.skill_file)
         except Exception as e:
-            print(f"Error getting session stats: {e}")
-            return {
-                "total_tasks": 0,
-                "correct_first_try": 0,
-                "total_attempts": 0,
-                "accuracy": 0.0
-            }
+            print(f"Error saving skill model: {e}")
+    
+    def flush(self):
+        """Write any buffered attempts, finished tasks and the skill model to disk."""
+        self.writer.flush()
+        self.task_writer.flush()
+        self._save_skill()
+    
+    def close(self):
+        """Drain buffered attempts and tasks, save the skill model, stop the writers and close storage."""
+        # A task left unanswered is recorded as not completed
+        for fact in self.task_tracker.finish():
+            self.task_writer.write(fact)
+        self.writer.close()
+        self.task_writer.close()
+        self._save_skill()
+        self.storage.close()
     
     def export_session_data(self, export_path=None):
         """
@@ -151,8 +225,8 @@ class TrainingDataManager:
             export_path = f"data/session_{timestamp}.csv"
         
         try:
-            df = pd.read_csv(self.data_file)
-            session_data = df[df['session_id'] == self.session_id]
+            self.flush()
+            session_data = self.storage.read_session(self.session_id)
             session_data.to_csv(export_path, index=False)
             return export_path
         except Exception as e:
@@ -0,0 +1,161 @@
+"""
+Streaming merge of training histories recorded on several machines.
+"""
+
+import argparse
+import csv
+import heapq
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from src.data.schema import ATTEMPT_COLUMNS
+from src.data.storage import open_storage
+
+SESSION, TASK, TIMESTAMP = (ATTEMPT_COLUMNS.index(c) for c in ("session_id", "task_id", "timestamp"))
+ATTEMPT = ATTEMPT_COLUMNS.index("attempt_number")
+
+
+def _sort_key(row):
+    """Output order: timestamp, then session, task and attempt number."""
+    return row[TIMESTAMP], row[SESSION], row[TASK], int(row[ATTEMPT])
+
+
+def _identity_key(row):
+    """Dedup order: (session_id, task_id, attempt_number), earliest copy first."""
+    return row[SESSION], row[TASK], int(row[ATTEMPT]), row[TIMESTAMP]
+
+
+def _write_run(rows, tmp_dir):
+    """Write rows to a headerless run file and return its path."""
+    fd, run_path = tempfile.mkstemp(suffix=".csv", dir=tmp_dir)
+    with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, lineterminator="\n").writerows(rows)
+    return run_path
+
+
+def _write_identity_runs(path, tmp_dir, chunksize):
+    """
+    Split an input file into runs sorted in dedup order.
+
+    Args:
+        path (str): Input CSV data file
+        tmp_dir (str): Directory for the run files
+        chunksize (int): Rows per run; bounds memory use
+
+    Returns:
+        list: Paths of the sorted run files
+    """
+    runs = []
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize):
+        chunk = chunk[ATTEMPT_COLUMNS]
+        chunk = chunk.assign(_attempt=pd.to_numeric(chunk["attempt_number"]))
+        chunk = chunk.sort_values(["session_id", "task_id", "_attempt", "timestamp"], kind="stable")
+        runs.append(_write_run(chunk[ATTEMPT_COLUMNS].to_numpy().tolist(), tmp_dir))
+    return runs
+
+
+def _read_run(path, key):
+    """Stream the rows of a run file, each paired with its sort key."""
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            yield key(row), row
+
+
+def merge_histories(inputs, output, chunksize=500000, batch_size=50000, tmp_dir=None):
+    """
+    Merge several attempt histories into one store in timestamp order.
+
+    The merge works in two streaming passes over sorted runs of at most
+    ``chunksize`` rows on disk, so memory stays bounded by the chunk size
+    however large the inputs are. The first pass k-way merges the inputs
+    by (session_id, task_id, attempt_number) and keeps only the earliest
+    copy of each attempt, whatever the timestamps of the other copies.
+    The second pass re-sorts the surviving rows by timestamp.
+
+    Args:
+        inputs (list): Paths of CSV data files to merge
+        output (str): Destination store (any backend supported by open_storage)
+        chunksize (int): Rows sorted in memory at a time
+        batch_size (int): Rows appended to the destination per write
+        tmp_dir (str): Directory for temporary run files
+
+    Returns:
+        dict: Row counts, elapsed seconds and throughput
+    """
+    start = time.perf_counter()
+    destination = open_storage(output)
+    if destination.count() > 0:
+        destination.close()
+        raise ValueError(f"{output} already contains attempts; merge into a new store")
+
+    rows_in = rows_out = 0
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as run_dir:
+        identity_runs = []
+        for path in inputs:
+            identity_runs.extend(_read_run(r, _identity_key)
+                                 for r in _write_identity_runs(path, run_dir, chunksize))
+
+        # Pass 1: drop repeated attempts, cutting the rest into timestamp-sorted runs
+        time_runs = []
+        previous = None
+        chunk = []
+        for key, row in heapq.merge(*identity_runs):
+            rows_in += 1
+            if key[:3] == previous:
+                continue
+            previous = key[:3]
+            chunk.append(row)
+            if len(chunk) >= chunksize:
+                chunk.sort(key=_sort_key)
+                time_runs.append(_write_run(chunk, run_dir))
+                chunk = []
+        if chunk:
+            chunk.sort(key=_sort_key)
+            time_runs.append(_write_run(chunk, run_dir))
+
+        # Pass 2: write in timestamp order
+        batch = []
+        try:
+            for _, row in heapq.merge(*(_read_run(r, _sort_key) for r in time_runs)):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    destination.append_frame(pd.DataFrame(batch, columns=ATTEMPT_COLUMNS))
+                    rows_out += len(batch)
+                    batch = []
+            if batch:
+                destination.append_frame(pd.DataFrame(batch, columns=ATTEMPT_COLUMNS))
+                rows_out += len(batch)
+        finally:
+            destination.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "inputs": len(inputs),
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "duplicates": rows_in - rows_out,
+        "seconds": elapsed,
+        "rows_per_second": rows_in / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    """Command-line entry point for merging histories."""
+    parser = argparse.ArgumentParser(description="Merge training histories from several machines")
+    parser.add_argument("output", help="Destination store (.csv, .db, .bin or partition directory)")
+    parser.add_argument("inputs", nargs="+", help="CSV data files to merge")
+    parser.add_argument("--chunksize", type=int, default=500000, help="Rows sorted in memory at a time")
+    parser.add_argument("--tmp-dir", default=None, help="Directory for temporary sorted runs")
+    args = parser.parse_args()
+
+    report = merge_histories(args.inputs, args.output, args.chunksize, tmp_dir=args.tmp_dir)
+    print(f"Merged {report['inputs']} files: {report['rows_in']:,} rows read, "
+          f"{report['rows_out']:,} written, {report['duplicates']:,} duplicates dropped")
+    print(f"{report['seconds']:.2f}s ({report['rows_per_second']:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
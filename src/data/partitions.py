@@ -0,0 +1,334 @@
+"""
+Month-partitioned attempt storage with a manifest and cold-data roll-up.
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import PARTITION_DIR
+from src.data.locking import FileLock
+from src.data.schema import ATTEMPT_COLUMNS
+from src.data.storage import CsvStorage, StorageBackend
+from src.data.tasks import TASK_COLUMNS, derive_task_facts
+
+MANIFEST_NAME = "manifest.json"
+
+
+def partition_key(timestamp):
+    """
+    Get the partition a timestamp belongs to.
+
+    Args:
+        timestamp (str): ISO timestamp
+
+    Returns:
+        str: Partition key in YYYY-MM form
+    """
+    return str(timestamp)[:7]
+
+
+def previous_key(key):
+    """
+    Get the partition key of the month before another.
+
+    Args:
+        key (str): Partition key in YYYY-MM form
+
+    Returns:
+        str: Key of the previous month
+    """
+    year, month = int(key[:4]), int(key[5:7])
+    if month == 1:
+        return f"{year - 1:04d}-12"
+    return f"{year:04d}-{month - 1:02d}"
+
+
+class PartitionedStorage(StorageBackend):
+    """
+    Stores attempts in one CSV file per calendar month.
+
+    Every attempt of a task goes to the partition of the task's first
+    attempt, so a task answered across midnight at the end of a month is
+    not split between two partitions, nor between two task rows when the
+    month is rolled up.
+
+    ``manifest.json`` records each partition's row count, time span and
+    sessions, so session and time-range reads open only the partitions
+    that can contain matching rows. Old partitions can be rolled up into
+    per-task aggregates with ``rollup``.
+    """
+
+    def __init__(self, path=None):
+        super().__init__(Path(path or PARTITION_DIR) / MANIFEST_NAME)
+        self.directory = Path(self.path).parent
+        self.lock = FileLock(self.path + ".lock")
+        self.partitions = {}
+        self._storages = {}
+        # Partition of each task in the previous append
+        self._task_keys = {}
+        self._load_manifest()
+
+    def _load_manifest(self):
+        """Read the manifest, starting empty if it doesn't exist."""
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.partitions = json.load(f)["partitions"]
+
+    def _save_manifest(self):
+        """Atomically write the manifest."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"partitions": self.partitions}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def _storage(self, key):
+        """Get the CSV storage of a raw partition."""
+        if key not in self._storages:
+            self._storages[key] = CsvStorage(self.directory / self.partitions[key]["file"])
+        return self._storages[key]
+
+    def append(self, records):
+        with self.lock:
+            # Other processes may have updated the manifest since we read it
+            self._load_manifest()
+            by_key = {}
+            task_keys = {}
+            for record in records:
+                key = self._task_key(record, task_keys)
+                by_key.setdefault(key, []).append(record)
+            for key, batch in by_key.items():
+                self._append_partition(key, batch)
+            self._save_manifest()
+            self._task_keys = task_keys
+
+    def _task_key(self, record, task_keys):
+        """
+        Get the partition of a record: that of its task's first attempt.
+
+        Args:
+            record (dict): Attempt record
+            task_keys (dict): Partitions of the tasks seen in this append
+
+        Returns:
+            str: Partition key
+        """
+        task_id = str(record["task_id"])
+        key = task_keys.get(task_id) or self._task_keys.get(task_id)
+        if key is None:
+            key = partition_key(record["timestamp"])
+            if int(record["attempt_number"]) > 1 and self._started_before(record, key):
+                key = previous_key(key)
+        task_keys[task_id] = key
+        return key
+
+    def _started_before(self, record, key):
+        """Check whether a record's task has attempts in the raw partition before ``key``."""
+        entry = self.partitions.get(previous_key(key))
+        if entry is None or entry["rolled_up"] or str(record["session_id"]) not in entry["sessions"]:
+            return False
+        tasks = self._storage(previous_key(key)).read_session(str(record["session_id"]), ["task_id"])
+        return str(record["task_id"]) in set(tasks["task_id"].astype(str))
+
+    def _append_partition(self, key, batch):
+        """Append records to one partition and update its manifest entry."""
+        entry = self.partitions.setdefault(key, {
+            "file": f"attempts-{key}.csv",
+            "rows": 0,
+            "start": None,
+            "end": None,
+            "sessions": [],
+            "rolled_up": False
+        })
+        if entry["rolled_up"]:
+            raise ValueError(f"Partition {key} has been rolled up and is read-only")
+        self._storage(key).append(batch)
+
+        timestamps = [str(r["timestamp"]) for r in batch]
+        entry["rows"] += len(batch)
+        entry["start"] = min(timestamps + ([entry["start"]] if entry["start"] else []))
+        entry["end"] = max(timestamps + ([entry["end"]] if entry["end"] else []))
+        sessions = set(entry["sessions"])
+        sessions.update(str(r["session_id"]) for r in batch)
+        entry["sessions"] = sorted(sessions)
+
+    def append_frame(self, df):
+        self.append(df[ATTEMPT_COLUMNS].to_dict('records'))
+
+    def prune(self, session_id=None, start=None, end=None, rolled_up=False):
+        """
+        Select the partitions that may contain matching rows.
+
+        Args:
+            session_id (str): Only partitions containing this session
+            start (str): Only partitions ending at or after this timestamp
+            end (str): Only partitions starting before this timestamp
+            rolled_up (bool): Select rolled-up instead of raw partitions
+
+        Returns:
+            list: Partition keys in chronological order
+        """
+        keys = []
+        for key in sorted(self.partitions):
+            entry = self.partitions[key]
+            if entry["rolled_up"] != rolled_up:
+                continue
+            if session_id is not None and session_id not in entry["sessions"]:
+                continue
+            if start is not None and entry["end"] is not None and entry["end"] < str(start):
+                continue
+            if end is not None and entry["start"] is not None and entry["start"] >= str(end):
+                continue
+            keys.append(key)
+        return keys
+
+    def _concat(self, frames, columns):
+        """Concatenate partition frames, keeping the column layout when empty."""
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns or ATTEMPT_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def read_all(self, columns=None):
+        return self._concat([self._storage(k).read_all(columns) for k in self.prune()], columns)
+
+    def read_session(self, session_id, columns=None):
+        return self._concat([
+            self._storage(k).read_session(session_id, columns)
+            for k in self.prune(session_id=session_id)
+        ], columns)
+
+    def read_range(self, start=None, end=None, columns=None):
+        return self._concat([
+            self._storage(k).read_range(start, end, columns)
+            for k in self.prune(start=start, end=end)
+        ], columns)
+
+    def iter_chunks(self, chunksize=100000, columns=None):
+        for key in self.prune():
+            yield from self._storage(key).iter_chunks(chunksize, columns)
+
+    def read_after(self, position=None, columns=None):
+        # Positions map each raw partition to a byte offset in its file.
+        # Rows of a partition rolled up since the position was taken may
+        # not have been read, so such positions are refused.
+        self._load_manifest()
+        position = dict(position or {})
+        for key in position:
+            if self.partitions.get(key, {}).get("rolled_up"):
+                raise ValueError(f"Partition {key} was rolled up since it was last read")
+        frames = []
+        for key in self.prune():
+            df, position[key] = self._storage(key).read_after(position.get(key), columns)
+            frames.append(df)
+        return self._concat(frames, columns), position
+
+    def _read_rolled_up(self, key):
+        """Read the task rows of a rolled-up partition."""
+        path = self.directory / self.partitions[key]["file"]
+        df = pd.read_csv(path, dtype={"wrong_guesses": str}).fillna({"wrong_guesses": ""})
+        missing = [c for c in TASK_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Rolled-up partition {path} lacks columns {', '.join(missing)}")
+        return df[TASK_COLUMNS]
+
+    def read_rolled_up(self):
+        frames = [self._read_rolled_up(k) for k in self.prune(rolled_up=True)]
+        return self._concat(frames, TASK_COLUMNS) if frames else None
+
+    def read_tasks(self, start=None, end=None):
+        """
+        Read per-task facts across raw and rolled-up partitions.
+
+        Args:
+            start (str): Only partitions ending at or after this timestamp
+            end (str): Only partitions starting before this timestamp
+
+        Returns:
+            pd.DataFrame: One row per task with TASK_COLUMNS
+        """
+        frames = [
+            self._read_rolled_up(k)
+            for k in self.prune(start=start, end=end, rolled_up=True)
+        ]
+        frames += [
+            derive_task_facts(self._storage(k).read_all())
+            for k in self.prune(start=start, end=end)
+        ]
+        return self._concat(frames, TASK_COLUMNS)
+
+    def count(self):
+        return sum(entry["rows"] for entry in self.partitions.values() if not entry["rolled_up"])
+
+    def close(self):
+        for storage in self._storages.values():
+            storage.close()
+
+    def rollup(self, before):
+        """
+        Compact raw partitions older than a cutoff into per-task aggregates.
+
+        The raw attempt file of each selected partition is replaced by a
+        ``tasks-YYYY-MM.csv`` file with one row per task (TASK_COLUMNS),
+        and the manifest marks the partition as rolled up. Analytics read
+        the task rows through ``read_rolled_up``, so reports still cover
+        rolled-up months.
+
+        Args:
+            before (str): Partition key (YYYY-MM); older partitions are rolled up
+
+        Returns:
+            list: Keys of the partitions that were rolled up
+        """
+        rolled = []
+        with self.lock:
+            self._load_manifest()
+            for key in self.prune():
+                if key >= before:
+                    continue
+                storage = self._storage(key)
+                facts = derive_task_facts(storage.read_all())
+                task_file = f"tasks-{key}.csv"
+                facts.to_csv(self.directory / task_file, index=False)
+
+                entry = self.partitions[key]
+                entry.update({"file": task_file, "rolled_up": True, "tasks": len(facts)})
+                self._save_manifest()
+
+                os.remove(storage.path)
+                for sidecar in (storage.index.path, storage.index.lock_path):
+                    if os.path.exists(sidecar):
+                        os.remove(sidecar)
+                del self._storages[key]
+                rolled.append(key)
+        return rolled
+
+
+def main():
+    """Command-line entry point for partition maintenance."""
+    parser = argparse.ArgumentParser(description="Partitioned training data tools")
+    parser.add_argument("--dir", default=PARTITION_DIR, help="Partition directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="Show the partition manifest")
+    rollup = subparsers.add_parser("rollup", help="Roll up partitions older than a month")
+    rollup.add_argument("before", help="Partition key (YYYY-MM); older partitions are rolled up")
+
+    args = parser.parse_args()
+    storage = PartitionedStorage(args.dir)
+    if args.command == "list":
+        for key in sorted(storage.partitions):
+            entry = storage.partitions[key]
+            kind = "rolled up" if entry["rolled_up"] else "raw"
+            print(f"{key}: {entry['rows']} rows, {len(entry['sessions'])} sessions, "
+                  f"{entry['start']} .. {entry['end']} ({kind})")
+    else:
+        rolled = storage.rollup(args.before)
+        print(f"Rolled up {len(rolled)} partitions: {', '.join(rolled) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
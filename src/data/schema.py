@@ -0,0 +1,158 @@
+"""
+Column layout of the training attempt data file.
+
+SCHEMA_VERSION identifies the columns together with the dtypes they are
+read with. Bump it whenever either changes: caches derived from the data
+record the version they were built with and are rebuilt on a mismatch.
+"""
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:  # Optional; the C parser is used without it
+    CSV_ENGINE = "c"
+
+# 1: untyped columns; 2: explicit dtypes with categorical note names and groups
+SCHEMA_VERSION = 2
+
+ATTEMPT_COLUMNS = [
+    "session_id", "task_id", "timestamp", "correct_note_name",
+    "correct_octave", "correct_midi", "guessed_note_name",
+    "guessed_octave", "guessed_midi", "is_correct", "attempt_number",
+    "play_again_count", "note_group", "octave_range_low", "octave_range_high"
+]
+
+
+# Explicit dtypes for reading attempt data; octaves, MIDI numbers and
+# counts fit small integers, and the few distinct note names and groups
+# are stored once as categories
+ATTEMPT_DTYPES = {
+    "session_id": str, "task_id": str, "timestamp": str,
+    "correct_note_name": "category", "correct_octave": "int8", "correct_midi": "int16",
+    "guessed_note_name": "category", "guessed_octave": "int8", "guessed_midi": "int16",
+    "is_correct": bool, "attempt_number": "int32", "play_again_count": "int32",
+    "note_group": "category", "octave_range_low": "int8", "octave_range_high": "int8"
+}
+
+
+# The same columns read so that a malformed row (e.g. a line torn by a
+# crash during an append) yields missing values instead of failing the
+# read; floats parse as fast as integers and hold NaN
+_TOLERANT_DTYPES = {
+    c: ("category" if t is bool else "float64" if str(t).startswith("int") else t)
+    for c, t in ATTEMPT_DTYPES.items()
+}
+
+
+def attempt_dtypes(columns=None):
+    """
+    Get the read dtypes of some attempt columns.
+
+    Args:
+        columns (list): Columns to read; defaults to all of ATTEMPT_COLUMNS
+
+    Returns:
+        dict: Column -> dtype
+    """
+    return {c: t for c, t in ATTEMPT_DTYPES.items() if columns is None or c in columns}
+
+
+def _drop_malformed(df, columns):
+    """
+    Drop rows read with _TOLERANT_DTYPES that miss a value, and apply the schema's dtypes.
+
+    Args:
+        df (pd.DataFrame): Rows read with _TOLERANT_DTYPES
+        columns (list): Columns requested by the caller, or None for all
+
+    Returns:
+        pd.DataFrame: Complete rows with the schema's dtypes
+    """
+    typed = [c for c in df.columns if ATTEMPT_DTYPES[c] is not str]
+    bad = df[typed].isna().any(axis=1)
+    if "is_correct" in df.columns:
+        bad |= ~df["is_correct"].isin(["True", "False"])
+        df["is_correct"] = df["is_correct"] == "True"
+    if bad.any():
+        print(f"Skipping {int(bad.sum())} malformed attempt rows")
+        df = df[~bad].reset_index(drop=True)
+    df = df.astype({c: ATTEMPT_DTYPES[c] for c in typed})
+    if columns is not None and ATTEMPT_COLUMNS[-1] not in columns:
+        df = df.drop(columns=ATTEMPT_COLUMNS[-1])
+    return df
+
+
+def _read_tolerant(source, columns, chunksize):
+    """Read attempt rows, dropping malformed ones instead of failing."""
+    # The last column is missing from any torn line, so it is always read
+    usecols = ATTEMPT_COLUMNS
+    if columns is not None:
+        usecols = list(dict.fromkeys([*columns, ATTEMPT_COLUMNS[-1]]))
+    dtypes = {c: _TOLERANT_DTYPES[c] for c in usecols}
+    reader = pd.read_csv(source, usecols=usecols, dtype=dtypes, engine="c",
+                         chunksize=chunksize, on_bad_lines="skip")
+    if chunksize is None:
+        return _drop_malformed(reader, columns)
+    return (_drop_malformed(chunk, columns) for chunk in reader)
+
+
+def read_attempt_csv(source, columns=None, chunksize=None):
+    """
+    Read attempt rows from CSV with the schema's dtypes.
+
+    Whole reads use the pyarrow parser when it is installed and fall back
+    to a tolerant read when the file has malformed rows; chunked reads,
+    which pyarrow does not support, are always tolerant. Malformed rows,
+    such as a line torn by a crash during an append, are skipped and
+    their number is printed.
+
+    Args:
+        source (str or file-like): CSV with an ATTEMPT_COLUMNS header
+        columns (list): Columns to read; defaults to all
+        chunksize (int): Return an iterator of chunks of this many rows
+
+    Returns:
+        pd.DataFrame or iterator: Typed attempt rows
+    """
+    if chunksize:
+        return _read_tolerant(source, columns, chunksize)
+    try:
+        return pd.read_csv(source, usecols=columns, dtype=attempt_dtypes(columns), engine=CSV_ENGINE)
+    except ValueError:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return _read_tolerant(source, columns, None)
+
+
+def parse_timestamps(values):
+    """
+    Parse recorded timestamps.
+
+    Timestamps are ISO 8601 strings, with or without fractional seconds,
+    so they are parsed with the vectorized ISO parser instead of inferring
+    a format; repeated values are converted once.
+
+    Args:
+        values (pd.Series): Timestamp strings
+
+    Returns:
+        pd.Series: datetime64 values
+    """
+    return pd.to_datetime(values, format="ISO8601", cache=True)
+
+
+def to_bool_int(value):
+    """
+    Normalize a boolean cell to 0/1.
+
+    Args:
+        value: A bool, number or 'True'/'False' string
+
+    Returns:
+        int: 1 for true values, otherwise 0
+    """
+    if isinstance(value, str):
+        return int(value.strip().lower() == "true")
+    return int(bool(value))
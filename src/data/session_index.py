@@ -0,0 +1,255 @@
+"""
+Sidecar index mapping sessions to the byte ranges they occupy in a CSV data file.
+"""
+
+import argparse
+import json
+import os
+
+from src.config import DATA_FILE
+from src.data.locking import FileLock
+
+
+class SessionIndex:
+    """
+    Byte-offset index stored next to a CSV data file as ``<data_file>.idx``.
+
+    The index records the file size it covers, so rows appended without
+    updating it (by another tool, or before a crash) are picked up by
+    scanning only the uncovered tail of the file. Updates are made while
+    holding the data file's ``.lock`` so concurrent writers don't lose
+    each other's ranges.
+    """
+
+    def __init__(self, data_file, load=True):
+        """
+        Load the index for a data file.
+
+        Args:
+            data_file (str): Path to the CSV data file
+            load (bool): Whether to read the existing index from disk
+        """
+        self.data_file = str(data_file)
+        self.path = self.data_file + ".idx"
+        self.lock_path = self.data_file + ".lock"
+        self.header_end = 0
+        self.covered = 0
+        self.sessions = {}
+        if load:
+            self._load()
+
+    def _load(self):
+        """Read the index from disk, starting empty if it is missing or unreadable."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.header_end = data["header_end"]
+            self.covered = data["covered"]
+            self.sessions = {sid: [list(r) for r in ranges]
+                             for sid, ranges in data["sessions"].items()}
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring unreadable session index {self.path}: {e}")
+            self.header_end = 0
+            self.covered = 0
+            self.sessions = {}
+
+    def save(self):
+        """Atomically write the index to disk."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "header_end": self.header_end,
+                "covered": self.covered,
+                "sessions": self.sessions
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def add_range(self, session_id, start, end):
+        """
+        Record that a session's rows occupy bytes [start, end).
+
+        Args:
+            session_id (str): Session the rows belong to
+            start (int): Offset of the first byte
+            end (int): Offset one past the last byte
+        """
+        ranges = self.sessions.setdefault(session_id, [])
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+        self.covered = max(self.covered, end)
+
+    def ranges(self, session_id):
+        """
+        Get the byte ranges for a session.
+
+        Args:
+            session_id (str): Session to look up
+
+        Returns:
+            list: [start, end) byte ranges in file order
+        """
+        self.sync()
+        return list(self.sessions.get(session_id, []))
+
+    def refresh(self):
+        """
+        Catch up with the saved index and index rows appended since.
+
+        The caller must hold the data file lock.
+
+        Returns:
+            bool: Whether the index changed and should be saved
+        """
+        saved = SessionIndex(self.data_file)
+        if saved.covered >= self.covered:
+            self.header_end = saved.header_end
+            self.covered = saved.covered
+            self.sessions = saved.sessions
+        size = os.path.getsize(self.data_file)
+        if size < self.covered:
+            # The data file was truncated or replaced
+            self.header_end = 0
+            self.covered = 0
+            self.sessions = {}
+            self._scan(0)
+            return True
+        if size > self.covered:
+            self._scan(self.covered)
+            return True
+        return False
+
+    def sync(self):
+        """Index any rows appended since the index was last updated and save it."""
+        if os.path.getsize(self.data_file) == self.covered:
+            return
+        with FileLock(self.lock_path):
+            self.refresh()
+            self.save()
+
+    def persist(self):
+        """Save the in-memory index unless the saved copy already covers more."""
+        with FileLock(self.lock_path):
+            saved = SessionIndex(self.data_file)
+            if saved.covered < self.covered:
+                self.save()
+
+    def rebuild(self):
+        """Rebuild the whole index from the data file."""
+        with FileLock(self.lock_path):
+            self.header_end = 0
+            self.covered = 0
+            self.sessions = {}
+            self._scan(0)
+            self.save()
+
+    def _scan(self, offset, limit=None):
+        """Index complete lines starting at a byte offset, up to an optional limit."""
+        with open(self.data_file, 'rb') as f:
+            f.seek(offset)
+            if offset == 0:
+                f.readline()
+                offset = self.header_end = f.tell()
+                self.covered = offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partial line still being written
+                if limit is not None and offset >= limit:
+                    break
+                end = offset + len(line)
+                session_id = line.split(b",", 1)[0].decode('utf-8')
+                if session_id.strip():
+                    self.add_range(session_id, offset, end)
+                self.covered = end
+                offset = end
+
+    def read_header(self):
+        """
+        Read the CSV header line.
+
+        Returns:
+            bytes: The header line including its newline
+        """
+        with open(self.data_file, 'rb') as f:
+            return f.readline()
+
+    def read_session_bytes(self, session_id):
+        """
+        Read the header and only the rows of one session.
+
+        Args:
+            session_id (str): Session to read
+
+        Returns:
+            bytes: CSV content containing the header and the session's rows
+        """
+        ranges = self.ranges(session_id)
+        parts = [self.read_header()]
+        with open(self.data_file, 'rb') as f:
+            for start, end in ranges:
+                f.seek(start)
+                parts.append(f.read(end - start))
+        return b"".join(parts)
+
+    def check(self):
+        """
+        Verify the index against the data file.
+
+        Rows appended after the index was last saved are not an error; they
+        are indexed by the next sync. See ``unindexed_bytes``.
+
+        Returns:
+            list: Descriptions of inconsistencies; empty if the index is valid
+        """
+        problems = []
+        size = os.path.getsize(self.data_file)
+        if self.covered > size:
+            problems.append(f"index covers {self.covered} bytes but file has only {size}")
+
+        fresh = SessionIndex(self.data_file, load=False)
+        fresh._scan(0, limit=self.covered)
+
+        if fresh.covered != self.covered:
+            problems.append(f"index ends at byte {self.covered}, which is not a row boundary")
+        if fresh.header_end != self.header_end:
+            problems.append(f"header ends at {fresh.header_end}, index says {self.header_end}")
+        for session_id in sorted(set(fresh.sessions) | set(self.sessions)):
+            expected = fresh.sessions.get(session_id)
+            actual = self.sessions.get(session_id)
+            if expected != actual:
+                problems.append(f"session {session_id}: index {actual}, file {expected}")
+        return problems
+
+    def unindexed_bytes(self):
+        """Return the number of bytes appended since the index was last updated."""
+        return max(os.path.getsize(self.data_file) - self.covered, 0)
+
+
+def main():
+    """Command-line entry point for maintaining session indexes."""
+    parser = argparse.ArgumentParser(description="Session byte-offset index tools")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("data_file", nargs="?", default=DATA_FILE)
+    args = parser.parse_args()
+
+    index = SessionIndex(args.data_file)
+    if args.command == "rebuild":
+        index.rebuild()
+        print(f"Indexed {len(index.sessions)} sessions in {args.data_file}")
+    else:
+        problems = index.check()
+        for problem in problems:
+            print(problem)
+        if problems:
+            raise SystemExit(1)
+        print(f"Index for {args.data_file} is consistent ({len(index.sessions)} sessions)")
+        pending = index.unindexed_bytes()
+        if pending:
+            print(f"{pending} bytes appended since the last update will be indexed on next read")
+
+
+if __name__ == "__main__":
+    main()
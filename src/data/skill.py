@@ -0,0 +1,242 @@
+"""
+Online per-note skill estimates.
+
+Each MIDI note has a Beta-Bernoulli posterior over the chance of naming
+it on the first try. First attempts add a success or a failure to the
+note's evidence, and old evidence fades with a half-life so the estimate
+follows the current level rather than the whole history. Updating one
+note and reading all 128 estimates are constant-time array operations.
+
+The evidence is kept next to each store in ``<store>.skill.npy``, a
+3 x 128 float array of decayed successes, decayed failures and the
+time of each note's last update, so the app and the analyzer read the
+current estimates without scanning attempts. Several processes may
+train on one store: each saves by re-reading the file under a lock and
+applying only the attempts it added since its last save.
+"""
+
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.audio.pitch import note_label
+from src.config import MIDI_NOTES
+from src.data.locking import FileLock
+from src.data.schema import parse_timestamps, to_bool_int
+
+# Beta(1, 1) prior: a note never played is estimated at 50%
+PRIOR_SUCCESSES = 1.0
+PRIOR_FAILURES = 1.0
+# Evidence loses half its weight over this many days
+HALF_LIFE_DAYS = 30.0
+
+_SUCCESSES, _FAILURES, _UPDATED = range(3)
+
+
+def skill_path(store_path):
+    """
+    Path of the skill file kept next to a store.
+
+    Args:
+        store_path (str): Path of the attempt store
+
+    Returns:
+        str: ``<store_path>.skill.npy``
+    """
+    return str(store_path) + ".skill.npy"
+
+
+def timestamp_seconds(moment):
+    """
+    Seconds since the epoch of a naive local timestamp, as pandas counts them.
+
+    Args:
+        moment (datetime.datetime): Timestamp as recorded with attempts
+
+    Returns:
+        float: Seconds since 1970-01-01 00:00 in the same local clock
+    """
+    return (moment - datetime.datetime(1970, 1, 1)).total_seconds()
+
+
+class SkillModel:
+    """Decayed Beta-Bernoulli skill posterior for every MIDI note."""
+
+    def __init__(self, state=None, half_life_days=HALF_LIFE_DAYS):
+        """
+        Initialize the model.
+
+        Args:
+            state (np.ndarray): Saved 3 x MIDI_NOTES evidence array, or None
+                for a model without evidence
+            half_life_days (float): Days over which evidence loses half its weight
+        """
+        if state is None:
+            state = np.zeros((3, MIDI_NOTES))
+        state = np.asarray(state, dtype=np.float64)
+        if state.shape != (3, MIDI_NOTES):
+            raise ValueError(f"Skill state must have shape (3, {MIDI_NOTES}), got {state.shape}")
+        self.state = state.copy()
+        self.half_life_seconds = half_life_days * 86400.0
+        # First attempts added since the model was loaded or last saved
+        self.pending = []
+
+    def _decay(self, elapsed):
+        """Weight left of evidence after ``elapsed`` seconds."""
+        return 0.5 ** (np.maximum(elapsed, 0.0) / self.half_life_seconds)
+
+    def update(self, midi, correct, when):
+        """
+        Add the first attempt of a task to a note's evidence.
+
+        Args:
+            midi (int): MIDI note number of the task
+            correct (bool): Whether the first attempt was correct
+            when (float): Time of the attempt in seconds since the epoch
+        """
+        self._apply(midi, correct, when)
+        self.pending.append((midi, correct, when))
+
+    def _apply(self, midi, correct, when):
+        """Add one first attempt to the evidence array."""
+        state = self.state
+        updated = float(state[_UPDATED, midi])
+        decay = 0.5 ** (max(when - updated, 0.0) / self.half_life_seconds) if updated else 1.0
+        successes = float(state[_SUCCESSES, midi]) * decay
+        failures = float(state[_FAILURES, midi]) * decay
+        state[_SUCCESSES, midi] = successes + 1.0 if correct else successes
+        state[_FAILURES, midi] = failures if correct else failures + 1.0
+        state[_UPDATED, midi] = max(when, updated)
+
+    def evidence(self, now=None):
+        """
+        Decayed evidence of every note.
+
+        Args:
+            now (float): Time to decay to in seconds since the epoch;
+                defaults to the latest update
+
+        Returns:
+            tuple: (successes, failures) arrays over MIDI notes
+        """
+        updated = self.state[_UPDATED]
+        if now is None:
+            now = updated.max()
+        decay = np.where(updated > 0, self._decay(now - updated), 0.0)
+        return self.state[_SUCCESSES] * decay, self.state[_FAILURES] * decay
+
+    def estimates(self, now=None):
+        """
+        Posterior mean chance of a first-try success for every note.
+
+        Args:
+            now (float): Time to decay to; defaults to the latest update
+
+        Returns:
+            np.ndarray: Estimate per MIDI note; the prior mean for unplayed notes
+        """
+        successes, failures = self.evidence(now)
+        return ((PRIOR_SUCCESSES + successes)
+                / (PRIOR_SUCCESSES + PRIOR_FAILURES + successes + failures))
+
+    def table(self, now=None):
+        """
+        Estimates of the notes that have been played.
+
+        Args:
+            now (float): Time to decay to; defaults to the latest update
+
+        Returns:
+            pd.DataFrame: Note, Skill, Evidence (decayed attempts) and
+                Last_Played indexed by MIDI number, weakest first
+        """
+        successes, failures = self.evidence(now)
+        played = np.flatnonzero(self.state[_UPDATED] > 0)
+        table = pd.DataFrame({
+            "Note": [note_label(midi) for midi in played],
+            "Skill": self.estimates(now)[played],
+            "Evidence": (successes + failures)[played],
+            "Last_Played": pd.to_datetime(self.state[_UPDATED][played], unit="s").floor("s"),
+        }, index=pd.Index(played, name="MIDI"))
+        return table.sort_values("Skill", kind="stable")
+
+    def weakest(self, midi_notes, now=None):
+        """
+        Find the note with the lowest estimate among some notes.
+
+        Args:
+            midi_notes (iterable): MIDI numbers to choose from
+            now (float): Time to decay to; defaults to the latest update
+
+        Returns:
+            tuple: (midi, estimate), or None if no notes are given
+        """
+        midi_notes = np.fromiter(midi_notes, dtype=np.int64)
+        if midi_notes.size == 0:
+            return None
+        estimates = self.estimates(now)[midi_notes]
+        i = int(np.argmin(estimates))
+        return int(midi_notes[i]), float(estimates[i])
+
+    def save(self, path):
+        """
+        Atomically write the evidence array, merged with the saved one.
+
+        Under the file's lock, the saved array is re-read and the first
+        attempts added since this model was loaded or last saved are
+        applied to it, so attempts saved by other processes in the
+        meantime are kept. The model then continues from the merged state.
+
+        Args:
+            path (str): Path of the .npy file
+        """
+        with FileLock(str(path) + ".lock"):
+            if os.path.exists(path):
+                self.state = np.load(path, allow_pickle=False)
+                for midi, correct, when in self.pending:
+                    self._apply(midi, correct, when)
+            tmp_path = str(path) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, self.state)
+            os.replace(tmp_path, path)
+        self.pending = []
+
+    @classmethod
+    def load(cls, path, half_life_days=HALF_LIFE_DAYS):
+        """
+        Read a saved model.
+
+        Args:
+            path (str): Path of the .npy file
+            half_life_days (float): Days over which evidence loses half its weight
+
+        Returns:
+            SkillModel: The saved model
+        """
+        return cls(np.load(path, allow_pickle=False), half_life_days)
+
+    @classmethod
+    def from_tasks(cls, tasks, half_life_days=HALF_LIFE_DAYS):
+        """
+        Build a model from recorded tasks.
+
+        Args:
+            tasks (pd.DataFrame): Task facts with correct_midi,
+                first_try_correct and first_timestamp, in play order
+            half_life_days (float): Days over which evidence loses half its weight
+
+        Returns:
+            SkillModel: Model with every task's first attempt applied
+        """
+        model = cls(half_life_days=half_life_days)
+        if tasks.empty:
+            return model
+        seconds = parse_timestamps(tasks["first_timestamp"]).astype("datetime64[us]")
+        seconds = seconds.astype("int64").to_numpy() / 1e6
+        for midi, correct, when in zip(tasks["correct_midi"].to_numpy(),
+                                       tasks["first_try_correct"].map(to_bool_int).to_numpy(),
+                                       seconds):
+            model._apply(int(midi), bool(correct), float(when))
+        return model
@@ -0,0 +1,107 @@
+"""
+Running statistics for training sessions.
+"""
+
+from collections import Counter
+
+
+class SessionStats:
+    """Accumulates session statistics incrementally as attempts are recorded."""
+
+    def __init__(self, session_id):
+        """
+        Initialize an empty statistics accumulator.
+
+        Args:
+            session_id (str): The session these statistics belong to
+        """
+        self.session_id = session_id
+        self.completed_tasks = 0
+        self.correct_first_try = 0
+        self.total_attempts = 0
+        self.note_attempts = Counter()
+        self.note_correct = Counter()
+        self.octave_attempts = Counter()
+        self.octave_correct = Counter()
+        self._completed_task_ids = set()
+
+    def add_attempt(self, task_id, correct_note_name, correct_octave,
+                    is_correct, attempt_number):
+        """
+        Update the statistics with a single attempt in O(1).
+
+        Args:
+            task_id (str): The task the attempt belongs to
+            correct_note_name (str): The correct note name
+            correct_octave (int): The correct octave
+            is_correct (bool): Whether the guess was correct
+            attempt_number (int): Attempt number for this task
+        """
+        self.total_attempts += 1
+        self.note_attempts[correct_note_name] += 1
+        self.octave_attempts[correct_octave] += 1
+
+        if is_correct:
+            self.note_correct[correct_note_name] += 1
+            self.octave_correct[correct_octave] += 1
+            if attempt_number == 1:
+                self.correct_first_try += 1
+            if task_id not in self._completed_task_ids:
+                self._completed_task_ids.add(task_id)
+                self.completed_tasks += 1
+
+    def seed_from_frame(self, df):
+        """
+        Seed the statistics from previously recorded attempts.
+
+        Args:
+            df (pd.DataFrame): Attempt rows, filtered or unfiltered by session
+        """
+        session_data = df[df['session_id'] == self.session_id]
+        if session_data.empty:
+            return
+
+        correct = session_data['is_correct'].astype(str).str.lower() == 'true'
+        correct_rows = session_data[correct]
+
+        self.total_attempts += len(session_data)
+        self.correct_first_try += int((correct_rows['attempt_number'] == 1).sum())
+
+        new_tasks = set(correct_rows['task_id']) - self._completed_task_ids
+        self._completed_task_ids.update(new_tasks)
+        self.completed_tasks += len(new_tasks)
+
+        # Note names may be categorical; count observed names only
+        self.note_attempts.update(session_data['correct_note_name'].astype(str).value_counts().to_dict())
+        self.note_correct.update(correct_rows['correct_note_name'].astype(str).value_counts().to_dict())
+        self.octave_attempts.update(session_data['correct_octave'].value_counts().to_dict())
+        self.octave_correct.update(correct_rows['correct_octave'].value_counts().to_dict())
+
+    @property
+    def accuracy(self):
+        """First-try accuracy over completed tasks."""
+        if self.completed_tasks == 0:
+            return 0.0
+        return self.correct_first_try / self.completed_tasks
+
+    def as_dict(self):
+        """
+        Get the statistics in the format returned by get_session_stats.
+
+        Returns:
+            dict: Session statistics
+        """
+        return {
+            "total_tasks": self.completed_tasks,
+            "correct_first_try": self.correct_first_try,
+            "total_attempts": self.total_attempts,
+            "accuracy": self.accuracy,
+            "notes": {
+                note: {"attempts": count, "correct": self.note_correct[note]}
+                for note, count in self.note_attempts.items()
+            },
+            "octaves": {
+                octave: {"attempts": count, "correct": self.octave_correct[octave]}
+                for octave, count in self.octave_attempts.items()
+            }
+        }
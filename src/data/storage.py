@@ -0,0 +1,559 @@
+"""
+Storage backends for training attempt records.
+"""
+
+import argparse
+import csv
+import io
+import os
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import BINARY_DATA_FILE, DATA_FILE, SQLITE_DATA_FILE, STORAGE_BACKEND
+from src.data import binlog
+from src.data.locking import FileLock
+from src.data.schema import ATTEMPT_COLUMNS, read_attempt_csv, to_bool_int
+from src.data.session_index import SessionIndex
+
+
+class StorageBackend:
+    """Interface for persisting and querying attempt records."""
+
+    def __init__(self, path):
+        """
+        Initialize the backend.
+
+        Args:
+            path (str): Location of the underlying store
+        """
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+    def append(self, records):
+        """
+        Append attempt records to the store.
+
+        Args:
+            records (list): Attempt records as dicts keyed by column name
+        """
+        raise NotImplementedError
+
+    def append_frame(self, df):
+        """
+        Append a DataFrame of attempt records to the store.
+
+        Args:
+            df (pd.DataFrame): Attempt rows with ATTEMPT_COLUMNS
+        """
+        self.append(df[ATTEMPT_COLUMNS].to_dict('records'))
+
+    def read_all(self, columns=None):
+        """
+        Read every stored attempt.
+
+        Args:
+            columns (list): Subset of columns to read, or None for all
+
+        Returns:
+            pd.DataFrame: Attempt rows
+        """
+        raise NotImplementedError
+
+    def read_session(self, session_id, columns=None):
+        """
+        Read the attempts belonging to one session.
+
+        Args:
+            session_id (str): Session to read
+            columns (list): Subset of columns to read, or None for all
+
+        Returns:
+            pd.DataFrame: Attempt rows for the session
+        """
+        raise NotImplementedError
+
+    def read_range(self, start=None, end=None, columns=None):
+        """
+        Read the attempts recorded in a time range.
+
+        Args:
+            start (str): Inclusive ISO timestamp lower bound, or None
+            end (str): Exclusive ISO timestamp upper bound, or None
+            columns (list): Subset of columns to read, or None for all
+
+        Returns:
+            pd.DataFrame: Attempt rows in the range
+        """
+        raise NotImplementedError
+
+    def iter_chunks(self, chunksize=100000, columns=None):
+        """
+        Read every stored attempt in chunks, in storage order.
+
+        Peak memory is bounded by the chunk size. This fallback reads the
+        whole store and slices it.
+
+        Args:
+            chunksize (int): Maximum rows per chunk
+            columns (list): Subset of columns to read, or None for all
+
+        Yields:
+            pd.DataFrame: Attempt rows
+        """
+        df = self.read_all(columns)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def read_after(self, position=None, columns=None):
+        """
+        Read the attempts appended after a previously returned position.
+
+        Positions are opaque JSON-serializable values; pass None to read
+        from the beginning. This fallback reads the whole store and skips
+        the first ``position`` rows.
+
+        Args:
+            position: Position returned by an earlier call, or None
+            columns (list): Subset of columns to read, or None for all
+
+        Returns:
+            tuple: (pd.DataFrame of new attempt rows, position after them)
+
+        Raises:
+            ValueError: If the store is shorter than the position
+        """
+        df = self.read_all(columns)
+        start = position or 0
+        if start > len(df):
+            raise ValueError(f"{self.path} has fewer rows than position {start}")
+        return df.iloc[start:].reset_index(drop=True), len(df)
+
+    def read_rolled_up(self):
+        """
+        Read the task rows of history whose attempts were rolled up.
+
+        Rolled-up attempts are no longer returned by the other reads;
+        analytics add these rows to cover them.
+
+        Returns:
+            pd.DataFrame: One row per rolled-up task (see
+                tasks.TASK_COLUMNS), or None if nothing was rolled up
+        """
+        return None
+
+    def count(self):
+        """Return the number of stored attempts."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the backend."""
+
+
+class CsvStorage(StorageBackend):
+    """
+    Stores attempts in a single append-only CSV file.
+
+    A SessionIndex sidecar maps each session to the byte ranges of its
+    rows, so session reads seek to those ranges instead of parsing the
+    whole file. Appends hold an advisory lock on ``<path>.lock``, so
+    several processes can share one file without interleaving rows.
+    """
+
+    def __init__(self, path=None):
+        super().__init__(path or DATA_FILE)
+        self.index = SessionIndex(self.path)
+        self.lock = FileLock(self.index.lock_path)
+        with self.lock:
+            if not os.path.exists(self.path):
+                pd.DataFrame(columns=ATTEMPT_COLUMNS).to_csv(self.path, index=False)
+
+    def append(self, records):
+        # Encode every row up front so the batch is written in one call
+        # and each session's byte span is known
+        lines = []
+        for record in records:
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerow(
+                [record.get(col) for col in ATTEMPT_COLUMNS]
+            )
+            lines.append((str(record.get("session_id")), buffer.getvalue().encode('utf-8')))
+
+        offset = self._write(b"".join(line for _, line in lines))
+
+        # Extend the in-memory index only if nothing else was appended since
+        # it was last brought up to date; otherwise the next read rescans
+        # the tail. The index is persisted on close and after reads.
+        if offset == self.index.covered:
+            for session_id, line in lines:
+                self.index.add_range(session_id, offset, offset + len(line))
+                offset += len(line)
+
+    def _write(self, content):
+        """
+        Append encoded rows under the lock and flush them to disk.
+
+        Args:
+            content (bytes): Complete CSV lines
+
+        Returns:
+            int: Offset at which the rows start
+        """
+        with self.lock:
+            with open(self.path, 'ab') as f:
+                offset = self._terminate_partial_line(f)
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        return offset
+
+    def _terminate_partial_line(self, f):
+        """
+        Seek to the end of the file, ending any partial last line.
+
+        A line left without its newline (e.g. by a crashed writer) would
+        otherwise be merged with the next appended row.
+
+        Returns:
+            int: Offset at which new rows start
+        """
+        offset = f.seek(0, os.SEEK_END)
+        if offset > 0:
+            with open(self.path, 'rb') as reader:
+                reader.seek(offset - 1)
+                if reader.read(1) != b"\n":
+                    f.write(b"\n")
+                    offset += 1
+        return offset
+
+    def append_frame(self, df):
+        content = df[ATTEMPT_COLUMNS].to_csv(header=False, index=False, lineterminator="\n")
+        self._write(content.encode('utf-8'))
+        self.index.sync()
+
+    def read_all(self, columns=None):
+        return read_attempt_csv(self.path, columns)
+
+    def count(self):
+        with open(self.path, 'rb') as f:
+            return max(sum(1 for _ in f) - 1, 0)
+
+    def close(self):
+        self.index.persist()
+
+    def read_session(self, session_id, columns=None):
+        content = self.index.read_session_bytes(session_id)
+        return read_attempt_csv(io.BytesIO(content), columns)
+
+    def read_range(self, start=None, end=None, columns=None):
+        df = self.read_all()
+        if start is not None:
+            df = df[df['timestamp'] >= start]
+        if end is not None:
+            df = df[df['timestamp'] < end]
+        return df[columns] if columns else df
+
+    def iter_chunks(self, chunksize=100000, columns=None):
+        yield from read_attempt_csv(self.path, columns, chunksize=chunksize)
+
+    def read_after(self, position=None, columns=None):
+        # Positions are byte offsets; only complete lines are read so a
+        # row being appended concurrently is picked up by the next call
+        header = self.index.read_header()
+        start = len(header) if position is None else position
+        with open(self.path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            if start > size:
+                raise ValueError(f"{self.path} is shorter than position {start}")
+            f.seek(start)
+            content = f.read()
+        content = content[:content.rfind(b"\n") + 1]
+        df = read_attempt_csv(io.BytesIO(header + content), columns)
+        return df, start + len(content)
+
+
+class SqliteStorage(StorageBackend):
+    """Stores attempts in an indexed SQLite database in WAL mode."""
+
+    SQL_TYPES = {
+        "correct_octave": "INTEGER", "correct_midi": "INTEGER",
+        "guessed_octave": "INTEGER", "guessed_midi": "INTEGER",
+        "is_correct": "INTEGER", "attempt_number": "INTEGER",
+        "play_again_count": "INTEGER", "octave_range_low": "INTEGER",
+        "octave_range_high": "INTEGER"
+    }
+
+    INDEXES = {
+        "idx_attempts_session": "session_id",
+        "idx_attempts_task": "task_id",
+        "idx_attempts_timestamp": "timestamp",
+        "idx_attempts_note": "correct_note_name, correct_octave"
+    }
+
+    def __init__(self, path=None):
+        super().__init__(path or SQLITE_DATA_FILE)
+        # The write-behind writer appends from its own thread
+        self._lock = threading.Lock()
+        # Other processes may hold the write lock; wait rather than fail
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create the attempts table and its indexes if they don't exist."""
+        column_defs = ", ".join(
+            f"{col} {self.SQL_TYPES.get(col, 'TEXT')}" for col in ATTEMPT_COLUMNS
+        )
+        with self._lock, self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS attempts ({column_defs})")
+            for name, cols in self.INDEXES.items():
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON attempts ({cols})")
+
+    def _insert_rows(self, rows):
+        """Insert row tuples in ATTEMPT_COLUMNS order in one transaction."""
+        placeholders = ", ".join("?" for _ in ATTEMPT_COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO attempts ({', '.join(ATTEMPT_COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+
+    def append(self, records):
+        self._insert_rows([
+            tuple(to_bool_int(record.get(col)) if col == 'is_correct' else record.get(col)
+                  for col in ATTEMPT_COLUMNS)
+            for record in records
+        ])
+
+    def append_frame(self, df):
+        df = df[ATTEMPT_COLUMNS].astype(object).where(df[ATTEMPT_COLUMNS].notna(), None)
+        df['is_correct'] = df['is_correct'].map(to_bool_int)
+        self._insert_rows(df.itertuples(index=False, name=None))
+
+    def _query(self, where="", params=(), columns=None):
+        """Run a SELECT on the attempts table and return a DataFrame."""
+        select = ", ".join(columns or ATTEMPT_COLUMNS)
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT {select} FROM attempts {where} ORDER BY rowid",
+                self._conn, params=params
+            )
+        if 'is_correct' in df.columns:
+            df['is_correct'] = df['is_correct'].astype(bool)
+        return df
+
+    def read_all(self, columns=None):
+        return self._query(columns=columns)
+
+    def read_session(self, session_id, columns=None):
+        return self._query("WHERE session_id = ?", (session_id,), columns)
+
+    def read_range(self, start=None, end=None, columns=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._query(where, tuple(params), columns)
+
+    def _last_rowid(self):
+        """Return the largest rowid in the attempts table (0 when empty)."""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM attempts").fetchone()[0]
+
+    def iter_chunks(self, chunksize=100000, columns=None):
+        last = self._last_rowid()
+        for start in range(0, last, chunksize):
+            chunk = self._query("WHERE rowid > ? AND rowid <= ?",
+                                (start, min(start + chunksize, last)), columns)
+            if not chunk.empty:
+                yield chunk
+
+    def read_after(self, position=None, columns=None):
+        # Positions are rowids; rows are only ever appended
+        last = self._last_rowid()
+        start = position or 0
+        if start > last:
+            raise ValueError(f"{self.path} has no row {start}")
+        return self._query("WHERE rowid > ? AND rowid <= ?", (start, last), columns), last
+
+    def count(self):
+        """Return the number of stored attempts."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM attempts").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class BinaryStorage(StorageBackend):
+    """Stores attempts in a fixed-width binary log read through a memory map."""
+
+    def __init__(self, path=None):
+        super().__init__(path or BINARY_DATA_FILE)
+        self.lock = FileLock(self.path + ".lock")
+        with self.lock:
+            binlog.initialize_log(self.path)
+        binlog.validate_header(self.path)
+        self.groups = binlog.GroupDictionary(self.path)
+
+    def append(self, records):
+        with self.lock:
+            # Another process may have added note groups since we loaded them
+            self.groups = binlog.GroupDictionary(self.path)
+            binlog.append_records(self.path, records, self.groups)
+
+    def records(self):
+        """
+        Memory-map the stored records.
+
+        Also reloads the note group dictionary, which other writers may
+        have extended since it was last read.
+
+        Returns:
+            np.ndarray: Structured array with binlog.RECORD_DTYPE
+        """
+        records = binlog.read_binary_log(self.path)
+        self.groups = binlog.GroupDictionary(self.path)
+        return records
+
+    def read_all(self, columns=None):
+        return binlog.to_dataframe(self.records(), self.groups, columns)
+
+    def read_session(self, session_id, columns=None):
+        records = self.records()
+        key = np.frombuffer(uuid.UUID(session_id).bytes, dtype='V16')[0]
+        return binlog.to_dataframe(records[records['session_id'] == key], self.groups, columns)
+
+    def read_range(self, start=None, end=None, columns=None):
+        records = self.records()
+        mask = np.ones(len(records), dtype=bool)
+        if start is not None:
+            mask &= records['timestamp'] >= pd.Timestamp(start).value
+        if end is not None:
+            mask &= records['timestamp'] < pd.Timestamp(end).value
+        return binlog.to_dataframe(records[mask], self.groups, columns)
+
+    def iter_chunks(self, chunksize=100000, columns=None):
+        records = self.records()
+        for start in range(0, len(records), chunksize):
+            yield binlog.to_dataframe(records[start:start + chunksize], self.groups, columns)
+
+    def read_after(self, position=None, columns=None):
+        # Positions are record numbers
+        records = self.records()
+        start = position or 0
+        if start > len(records):
+            raise ValueError(f"{self.path} has fewer records than position {start}")
+        return binlog.to_dataframe(records[start:], self.groups, columns), len(records)
+
+    def count(self):
+        return binlog.record_count(self.path)
+
+
+BACKENDS = {
+    "csv": CsvStorage,
+    "sqlite": SqliteStorage,
+    "binary": BinaryStorage,
+}
+
+
+def create_storage(backend=None, path=None):
+    """
+    Create a storage backend.
+
+    Args:
+        backend (str): Backend name ('csv', 'sqlite', 'binary' or 'partitioned');
+            defaults to STORAGE_BACKEND
+        path (str): Location of the store; defaults to the backend's configured file
+
+    Returns:
+        StorageBackend: The storage backend
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend == "partitioned":
+        from src.data.partitions import PartitionedStorage
+        return PartitionedStorage(path)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return BACKENDS[backend](path)
+
+
+def open_storage(path):
+    """
+    Open an existing store, choosing the backend from the file extension.
+
+    Args:
+        path (str): Path to a .csv, .db/.sqlite or .bin file, or a partition directory
+
+    Returns:
+        StorageBackend: The storage backend
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == "" or Path(path).name == "manifest.json":
+        from src.data.partitions import PartitionedStorage
+        return PartitionedStorage(Path(path).parent if suffix else path)
+    if suffix in (".db", ".sqlite", ".sqlite3"):
+        return SqliteStorage(path)
+    if suffix == ".bin":
+        return BinaryStorage(path)
+    return CsvStorage(path)
+
+
+def migrate_csv(csv_path=None, dest_path=None, chunksize=50000):
+    """
+    Copy every attempt from a CSV data file into another store.
+
+    The destination backend is chosen from its extension (.db/.sqlite
+    for SQLite, .bin for the binary log, no extension for a partition
+    directory).
+
+    Args:
+        csv_path (str): Source CSV file; defaults to DATA_FILE
+        dest_path (str): Destination store; defaults to SQLITE_DATA_FILE
+        chunksize (int): Number of rows copied per batch
+
+    Returns:
+        int: Number of rows migrated
+    """
+    csv_path = csv_path or DATA_FILE
+    dest_path = dest_path or SQLITE_DATA_FILE
+    storage = open_storage(dest_path)
+    total = 0
+    try:
+        if storage.count() > 0:
+            raise ValueError(f"{dest_path} already contains attempts; refusing to migrate twice")
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            storage.append_frame(chunk)
+            total += len(chunk)
+    finally:
+        storage.close()
+    return total
+
+
+def main():
+    """Command-line entry point for storage maintenance."""
+    parser = argparse.ArgumentParser(description="Training data storage tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser("migrate", help="Copy a CSV data file into another storage backend")
+    migrate.add_argument("csv_path", nargs="?", default=DATA_FILE)
+    migrate.add_argument("dest_path", nargs="?", default=SQLITE_DATA_FILE)
+
+    args = parser.parse_args()
+    if args.command == "migrate":
+        count = migrate_csv(args.csv_path, args.dest_path)
+        print(f"Migrated {count} attempts from {args.csv_path} to {args.dest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+"""
+Task-level facts derived from raw attempt rows.
+
+Besides deriving facts from raw attempts in bulk, the data manager keeps
+a task table next to each store (``<store>.tasks.csv``) with one row per
+task, appended as tasks finish, so analytics can read one row per task
+instead of regrouping attempts. ``read_task_table`` hands the table to
+analytics only while it accounts for every stored attempt.
+"""
+
+import argparse
+import csv
+import os
+
+import pandas as pd
+
+from src.config import DATA_FILE
+from src.data.locking import FileLock
+from src.data.schema import to_bool_int
+from src.data.storage import open_storage
+
+TASK_COLUMNS = [
+    "session_id", "task_id", "correct_note_name", "correct_octave",
+    "correct_midi", "note_group", "octave_range_low", "octave_range_high",
+    "attempts", "completed", "attempts_to_correct", "first_try_correct",
+    "play_again_count", "first_timestamp", "last_timestamp", "wrong_guesses",
+    "attempt_total", "play_again_total"
+]
+
+
+def derive_task_facts(df):
+    """
+    Collapse attempt rows into one row per task.
+
+    Args:
+        df (pd.DataFrame): Attempt rows with the ATTEMPT_COLUMNS layout
+
+    Returns:
+        pd.DataFrame: One row per task with TASK_COLUMNS; attempt_total and
+            play_again_total sum attempt_number and play_again_count over
+            the task's attempts
+    """
+    if df.empty:
+        return pd.DataFrame(columns=TASK_COLUMNS)
+
+    df = df.copy()
+    df['is_correct'] = df['is_correct'].map(to_bool_int).astype(bool)
+    df['timestamp'] = df['timestamp'].astype(str)
+    grouped = df.groupby('task_id', sort=False)
+
+    facts = grouped.agg(
+        session_id=('session_id', 'first'),
+        correct_note_name=('correct_note_name', 'first'),
+        correct_octave=('correct_octave', 'first'),
+        correct_midi=('correct_midi', 'first'),
+        note_group=('note_group', 'first'),
+        octave_range_low=('octave_range_low', 'first'),
+        octave_range_high=('octave_range_high', 'first'),
+        attempts=('attempt_number', 'size'),
+        completed=('is_correct', 'any'),
+        play_again_count=('play_again_count', 'max'),
+        first_timestamp=('timestamp', 'min'),
+        last_timestamp=('timestamp', 'max'),
+        attempt_total=('attempt_number', 'sum'),
+        play_again_total=('play_again_count', 'sum'),
+    )
+
+    correct_rows = df[df['is_correct']].drop_duplicates('task_id')
+    attempts_to_correct = correct_rows.set_index('task_id')['attempt_number']
+    facts['attempts_to_correct'] = attempts_to_correct.reindex(facts.index).fillna(0).astype(int)
+    facts['first_try_correct'] = facts['attempts_to_correct'] == 1
+
+    wrong = df[~df['is_correct']]
+    wrong_guesses = wrong['guessed_midi'].astype(int).astype(str).groupby(wrong['task_id']).agg(" ".join)
+    facts['wrong_guesses'] = wrong_guesses.reindex(facts.index).fillna("")
+
+    return facts.reset_index()[TASK_COLUMNS]
+
+
+class TaskFactTracker:
+    """
+    Builds task facts incrementally as attempts are recorded.
+
+    Produces the same values as ``derive_task_facts`` over the same
+    attempts, without keeping more than the current task in memory.
+    """
+
+    def __init__(self):
+        """Initialize the tracker with no open task."""
+        self._fact = None
+
+    def add_attempt(self, record):
+        """
+        Add an attempt record.
+
+        Args:
+            record (dict): Attempt record keyed by ATTEMPT_COLUMNS
+
+        Returns:
+            list: Facts of the tasks finished by this attempt; the open task
+                finishes when it is answered correctly or a new task starts
+        """
+        finished = []
+        if self._fact is not None and self._fact["task_id"] != record["task_id"]:
+            finished = self.finish()
+
+        timestamp = str(record["timestamp"])
+        fact = self._fact
+        if fact is None:
+            fact = self._fact = {
+                "session_id": record["session_id"],
+                "task_id": record["task_id"],
+                "correct_note_name": record["correct_note_name"],
+                "correct_octave": record["correct_octave"],
+                "correct_midi": record["correct_midi"],
+                "note_group": record["note_group"],
+                "octave_range_low": record["octave_range_low"],
+                "octave_range_high": record["octave_range_high"],
+                "attempts": 0,
+                "completed": False,
+                "attempts_to_correct": 0,
+                "first_try_correct": False,
+                "play_again_count": record["play_again_count"],
+                "first_timestamp": timestamp,
+                "last_timestamp": timestamp,
+                "wrong_guesses": [],
+                "attempt_total": 0,
+                "play_again_total": 0,
+            }
+
+        fact["attempts"] += 1
+        fact["attempt_total"] += int(record["attempt_number"])
+        fact["play_again_total"] += int(record["play_again_count"])
+        fact["play_again_count"] = max(fact["play_again_count"], record["play_again_count"])
+        fact["first_timestamp"] = min(fact["first_timestamp"], timestamp)
+        fact["last_timestamp"] = max(fact["last_timestamp"], timestamp)
+        if to_bool_int(record["is_correct"]):
+            if not fact["completed"]:
+                fact["completed"] = True
+                fact["attempts_to_correct"] = int(record["attempt_number"])
+                fact["first_try_correct"] = fact["attempts_to_correct"] == 1
+            finished += self.finish()
+        else:
+            fact["wrong_guesses"].append(str(int(record["guessed_midi"])))
+        return finished
+
+    def finish(self):
+        """
+        Close the open task, if any.
+
+        Returns:
+            list: The open task's facts (empty if there was none)
+        """
+        if self._fact is None:
+            return []
+        fact, self._fact = self._fact, None
+        fact["wrong_guesses"] = " ".join(fact["wrong_guesses"])
+        return [fact]
+
+
+def task_facts_path(store_path):
+    """
+    Get the task table path that belongs to a data store.
+
+    Args:
+        store_path (str): Path of the attempt store
+
+    Returns:
+        str: Path of its task table
+    """
+    return str(store_path) + ".tasks.csv"
+
+
+class TaskFactStore:
+    """
+    Append-only CSV table of task facts.
+
+    Appends hold an advisory lock on ``<path>.lock`` so several processes
+    can share one table. Has the ``append`` interface of a storage
+    backend, so it can sit behind a BufferedAttemptWriter.
+    """
+
+    def __init__(self, path, create=True):
+        """
+        Initialize the store, creating the table if it doesn't exist.
+
+        Args:
+            path (str): Path of the task table
+            create (bool): Create an empty table if there is none; readers
+                that must not leave a table behind pass False
+        """
+        self.path = str(path)
+        self.lock = FileLock(self.path + ".lock")
+        if not create:
+            return
+        with self.lock:
+            if not os.path.exists(self.path):
+                self._write_frame(pd.DataFrame(columns=TASK_COLUMNS))
+
+    def _write_frame(self, df):
+        """Atomically replace the table with a DataFrame (caller holds the lock)."""
+        tmp_path = self.path + ".tmp"
+        df[TASK_COLUMNS].to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+    def append(self, facts):
+        """
+        Append task facts.
+
+        Args:
+            facts (list): Task facts as dicts keyed by TASK_COLUMNS
+        """
+        with self.lock:
+            with open(self.path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerows([fact.get(col) for col in TASK_COLUMNS] for fact in facts)
+
+    def read(self, columns=None):
+        """
+        Read the task table.
+
+        Args:
+            columns (list): Columns to read; defaults to all of TASK_COLUMNS
+
+        Returns:
+            pd.DataFrame: One row per task, in the order the tasks finished
+        """
+        df = pd.read_csv(self.path, usecols=columns, dtype={"wrong_guesses": str})
+        if "wrong_guesses" in df.columns:
+            df["wrong_guesses"] = df["wrong_guesses"].fillna("")
+        return df
+
+    def iter_chunks(self, chunksize=100000, columns=None):
+        """
+        Read the task table in chunks.
+
+        Args:
+            chunksize (int): Maximum tasks per chunk
+            columns (list): Columns to read; defaults to all of TASK_COLUMNS
+
+        Yields:
+            pd.DataFrame: Task rows, in the order the tasks finished
+        """
+        for chunk in pd.read_csv(self.path, usecols=columns, dtype={"wrong_guesses": str},
+                                 chunksize=chunksize):
+            if "wrong_guesses" in chunk.columns:
+                chunk["wrong_guesses"] = chunk["wrong_guesses"].fillna("")
+            yield chunk
+
+    def header(self):
+        """
+        Read the columns the table was written with.
+
+        Returns:
+            list: Column names of the header line
+        """
+        with open(self.path, newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), [])
+
+    def replace(self, df):
+        """
+        Replace the whole table.
+
+        Args:
+            df (pd.DataFrame): Task facts with TASK_COLUMNS
+        """
+        with self.lock:
+            self._write_frame(df)
+
+    def close(self):
+        """Nothing to release; present for the storage interface."""
+
+
+def stored_task_facts(storage):
+    """
+    Derive the facts of every task in a store, rolled-up tasks included.
+
+    Args:
+        storage (StorageBackend): Attempt store
+
+    Returns:
+        pd.DataFrame: One row per task with TASK_COLUMNS, oldest first
+    """
+    facts = derive_task_facts(storage.read_all())
+    rolled = storage.read_rolled_up()
+    if rolled is None or rolled.empty:
+        return facts
+    if facts.empty:
+        return rolled[TASK_COLUMNS]
+    return pd.concat([rolled[TASK_COLUMNS], facts], ignore_index=True)
+
+
+def rebuild_task_facts(storage, path=None):
+    """
+    Rebuild a store's task table from its raw attempts.
+
+    Args:
+        storage (StorageBackend): Attempt store
+        path (str): Task table to write; defaults to the store's sidecar
+
+    Returns:
+        int: Number of tasks written
+    """
+    facts = stored_task_facts(storage)
+    TaskFactStore(path or task_facts_path(storage.path)).replace(facts)
+    return len(facts)
+
+
+def task_table_current(path):
+    """
+    Check that a task table exists and has the current column layout.
+
+    Args:
+        path (str): Path of the task table
+
+    Returns:
+        bool: False if the table is missing or was written by an older version
+    """
+    return os.path.exists(path) and TaskFactStore(path, create=False).header() == TASK_COLUMNS
+
+
+def task_table_complete(storage, path=None, chunksize=100000):
+    """
+    Check that a task table is current and accounts for every stored attempt.
+
+    The table falls behind its store when attempts are imported or merged
+    into the store directly, or while a trainer still has a task open. The
+    check compares the tasks' attempt counts with the store's count.
+
+    Args:
+        storage (StorageBackend): Attempt store
+        path (str): Task table to check; defaults to the store's sidecar
+        chunksize (int): Tasks read per chunk while checking
+
+    Returns:
+        bool: False if the table is missing, outdated or incomplete
+    """
+    path = path or task_facts_path(storage.path)
+    if not task_table_current(path):
+        return False
+    table = TaskFactStore(path, create=False)
+    expected = storage.count()
+    rolled = storage.read_rolled_up()
+    if rolled is not None:
+        expected += int(rolled["attempts"].sum())
+    recorded = sum(int(chunk["attempts"].sum())
+                   for chunk in table.iter_chunks(chunksize, columns=["attempts"]))
+    return recorded == expected
+
+
+def read_task_table(storage, chunksize=100000):
+    """
+    Get a store's task table if it accounts for every stored attempt.
+
+    Callers derive task facts from the attempts instead when it does not
+    (see task_table_complete).
+
+    Args:
+        storage (StorageBackend): Attempt store
+        chunksize (int): Tasks read per chunk while checking
+
+    Returns:
+        TaskFactStore: The store's task table, or None if it is missing,
+            outdated or incomplete
+    """
+    if not task_table_complete(storage, chunksize=chunksize):
+        return None
+    return TaskFactStore(task_facts_path(storage.path), create=False)
+
+
+def _comparable(df):
+    """Normalize a task table for comparison regardless of how it was stored."""
+    df = df[TASK_COLUMNS].copy()
+    for col in ("first_timestamp", "last_timestamp"):
+        df[col] = pd.to_datetime(df[col])
+    df['completed'] = df['completed'].map(to_bool_int)
+    df['first_try_correct'] = df['first_try_correct'].map(to_bool_int)
+    return df.astype(str).sort_values("task_id").reset_index(drop=True)
+
+
+def check_task_facts(storage, path=None):
+    """
+    Compare a store's task table with facts derived from its raw attempts.
+
+    Read-only: a missing table is reported, not created.
+
+    Args:
+        storage (StorageBackend): Attempt store
+        path (str): Task table to check; defaults to the store's sidecar
+
+    Returns:
+        list: Descriptions of differences (empty if the table matches)
+    """
+    path = path or task_facts_path(storage.path)
+    if not os.path.exists(path):
+        return [f"task table {path} is missing; rebuild it"]
+    table = TaskFactStore(path, create=False)
+    if table.header() != TASK_COLUMNS:
+        return ["task table has an outdated column layout; rebuild it"]
+    stored = _comparable(table.read())
+    derived = _comparable(stored_task_facts(storage))
+
+    problems = []
+    missing = set(derived["task_id"]) - set(stored["task_id"])
+    extra = set(stored["task_id"]) - set(derived["task_id"])
+    if missing:
+        problems.append(f"{len(missing)} tasks missing from the task table")
+    if extra:
+        problems.append(f"{len(extra)} tasks in the task table have no attempts")
+    if len(stored) != stored["task_id"].nunique():
+        problems.append(f"{len(stored) - stored['task_id'].nunique()} duplicate task rows")
+    if problems:
+        return problems
+
+    for col in TASK_COLUMNS:
+        differs = stored[col] != derived[col]
+        if differs.any():
+            problems.append(f"{col} differs for {int(differs.sum())} tasks, "
+                            f"e.g. task {derived.loc[differs.idxmax(), 'task_id']}")
+    return problems
+
+
+def main():
+    """Command-line entry point for task table maintenance."""
+    parser = argparse.ArgumentParser(description="Task fact table tools")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("data_file", nargs="?", default=DATA_FILE, help="Attempt store")
+    args = parser.parse_args()
+
+    storage = open_storage(args.data_file)
+    try:
+        if args.command == "rebuild":
+            count = rebuild_task_facts(storage)
+            print(f"Wrote {count} tasks to {task_facts_path(storage.path)}")
+            return
+        problems = check_task_facts(storage)
+        for problem in problems:
+            print(problem)
+        print("Task table OK" if not problems else f"{len(problems)} problems found")
+    finally:
+        storage.close()
+    if problems:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+First-try accuracy as a time series over tasks.
+
+A task's outcome is whether its first attempt was correct. The series
+functions take outcomes in the order the tasks were played and compute
+everything in one vectorized pass: rolling accuracy from the difference
+of two cumulative sums, per-session curves from grouped cumulative sums,
+and EWMA from pandas' single-pass recursive filter. Their cost is linear
+in the number of tasks whatever the window.
+
+AccuracyTrend maintains the last values of the same series one task at
+a time, for the status bar.
+"""
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.data.schema import to_bool_int
+from src.data.tasks import read_task_table
+
+# Tasks in the rolling window
+DEFAULT_WINDOW = 100
+# EWMA span in tasks; the smoothing factor is 2 / (span + 1)
+DEFAULT_SPAN = 50
+
+OUTCOME_COLUMNS = ["session_id", "task_id", "timestamp", "first_try_correct"]
+
+_FIRST_ATTEMPT_COLUMNS = ["session_id", "task_id", "timestamp", "is_correct", "attempt_number"]
+
+_FACT_COLUMNS = ["session_id", "task_id", "first_timestamp", "first_try_correct"]
+
+
+def task_outcomes(df):
+    """
+    Extract one outcome per task from attempt rows.
+
+    Args:
+        df (pd.DataFrame): Attempt rows in the order they were recorded
+
+    Returns:
+        pd.DataFrame: session_id, task_id, timestamp and first_try_correct
+            of each task's first attempt, in play order
+    """
+    first = df.loc[df["attempt_number"] == 1, ["session_id", "task_id", "timestamp", "is_correct"]]
+    first = first.rename(columns={"is_correct": "first_try_correct"})
+    first["first_try_correct"] = first["first_try_correct"].astype(bool)
+    return first.reset_index(drop=True)
+
+
+def fact_outcomes(facts):
+    """
+    Extract one outcome per task from task facts.
+
+    Args:
+        facts (pd.DataFrame): Task facts with session_id, task_id,
+            first_timestamp and first_try_correct, in play order
+
+    Returns:
+        pd.DataFrame: Task outcomes as returned by task_outcomes
+    """
+    outcomes = facts[_FACT_COLUMNS]
+    outcomes = outcomes.rename(columns={"first_timestamp": "timestamp"})
+    outcomes["first_try_correct"] = outcomes["first_try_correct"].map(to_bool_int).astype(bool)
+    return outcomes.reset_index(drop=True)
+
+
+def rolled_up_outcomes(storage):
+    """
+    Read the outcomes of the tasks in a store's rolled-up history.
+
+    Args:
+        storage (StorageBackend): Attempt store
+
+    Returns:
+        pd.DataFrame: Task outcomes as returned by fact_outcomes, or None
+            if nothing was rolled up
+    """
+    rolled = storage.read_rolled_up()
+    if rolled is None or rolled.empty:
+        return None
+    return fact_outcomes(rolled)
+
+
+def load_task_outcomes(storage, chunksize=100000):
+    """
+    Read the outcome of every task in a store.
+
+    The store's task table is read when it is complete; otherwise the
+    attempts are read one chunk at a time and only first attempts are
+    kept, so memory grows with the number of tasks rather than attempts.
+    Rolled-up history is included.
+
+    Args:
+        storage (StorageBackend): Attempt store
+        chunksize (int): Attempts read per chunk
+
+    Returns:
+        pd.DataFrame: Task outcomes as returned by task_outcomes
+    """
+    table = read_task_table(storage, chunksize)
+    if table is not None:
+        return fact_outcomes(table.read(columns=_FACT_COLUMNS))
+    rolled = rolled_up_outcomes(storage)
+    parts = [rolled] if rolled is not None else []
+    parts += [task_outcomes(chunk)
+              for chunk in storage.iter_chunks(chunksize, columns=_FIRST_ATTEMPT_COLUMNS)
+              if not chunk.empty]
+    if not parts:
+        return pd.DataFrame(columns=OUTCOME_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def rolling_accuracy(outcomes, window=DEFAULT_WINDOW):
+    """
+    Compute first-try accuracy over the last ``window`` tasks at every task.
+
+    Args:
+        outcomes (array-like): First-try outcomes (bool) in play order
+        window (int): Number of tasks in the window; the first tasks
+            average over all tasks so far
+
+    Returns:
+        np.ndarray: Accuracy after each task
+    """
+    hits = np.cumsum(np.asarray(outcomes, dtype=np.int64))
+    in_window = hits.copy()
+    in_window[window:] -= hits[:-window]
+    return in_window / np.minimum(np.arange(1, len(hits) + 1), window)
+
+
+def ewma_accuracy(outcomes, span=DEFAULT_SPAN):
+    """
+    Compute exponentially weighted first-try accuracy at every task.
+
+    Starts at the first outcome and moves 2 / (span + 1) of the way
+    towards each new outcome, like AccuracyTrend.
+
+    Args:
+        outcomes (array-like): First-try outcomes (bool) in play order
+        span (int): Span of the average in tasks
+
+    Returns:
+        np.ndarray: Smoothed accuracy after each task
+    """
+    values = pd.Series(np.asarray(outcomes, dtype=np.float64))
+    return values.ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def session_curves(outcomes):
+    """
+    Compute cumulative first-try accuracy within each session.
+
+    Args:
+        outcomes (pd.DataFrame): Task outcomes as returned by task_outcomes
+
+    Returns:
+        pd.DataFrame: session_id, task_number (from 1 within the session)
+            and accuracy so far in the session, one row per task
+    """
+    sessions = outcomes["session_id"]
+    hits = outcomes["first_try_correct"].astype(np.int64).groupby(sessions, sort=False).cumsum()
+    task_number = sessions.groupby(sessions, sort=False).cumcount() + 1
+    return pd.DataFrame({
+        "session_id": sessions.to_numpy(),
+        "task_number": task_number.to_numpy(),
+        "accuracy": (hits / task_number).to_numpy(),
+    })
+
+
+def accuracy_series(outcomes, window=DEFAULT_WINDOW, span=DEFAULT_SPAN):
+    """
+    Compute the rolling and EWMA series of a task history.
+
+    Args:
+        outcomes (pd.DataFrame): Task outcomes as returned by task_outcomes
+        window (int): Rolling window in tasks
+        span (int): EWMA span in tasks
+
+    Returns:
+        pd.DataFrame: timestamp, Rolling_Accuracy and EWMA_Accuracy indexed
+            by task number (from 1)
+    """
+    correct = outcomes["first_try_correct"].to_numpy(dtype=bool)
+    return pd.DataFrame({
+        "timestamp": outcomes["timestamp"].to_numpy(),
+        "Rolling_Accuracy": rolling_accuracy(correct, window),
+        "EWMA_Accuracy": ewma_accuracy(correct, span),
+    }, index=pd.RangeIndex(1, len(correct) + 1, name="task"))
+
+
+class AccuracyTrend:
+    """Running rolling and EWMA first-try accuracy, updated in O(1) per task."""
+
+    def __init__(self, window=DEFAULT_WINDOW, span=DEFAULT_SPAN):
+        """
+        Initialize an empty trend.
+
+        Args:
+            window (int): Rolling window in tasks
+            span (int): EWMA span in tasks
+        """
+        self.window = window
+        self.alpha = 2 / (span + 1)
+        self.tasks = 0
+        self.ewma = None
+        self._recent = deque(maxlen=window)
+        self._recent_hits = 0
+
+    def add(self, first_try_correct):
+        """
+        Add the outcome of the next task.
+
+        Args:
+            first_try_correct (bool): Whether the task's first attempt was correct
+        """
+        value = int(bool(first_try_correct))
+        if len(self._recent) == self.window:
+            self._recent_hits -= self._recent[0]
+        self._recent.append(value)
+        self._recent_hits += value
+        self.tasks += 1
+        self.ewma = value if self.ewma is None else self.ewma + self.alpha * (value - self.ewma)
+
+    def seed(self, outcomes):
+        """
+        Seed the trend from earlier outcomes in one vectorized pass.
+
+        Args:
+            outcomes (array-like): First-try outcomes (bool) in play order
+        """
+        outcomes = np.asarray(outcomes, dtype=bool)
+        if len(outcomes) == 0:
+            return
+        if self.ewma is not None:
+            for value in outcomes:
+                self.add(value)
+            return
+        span = 2 / self.alpha - 1
+        self.ewma = float(ewma_accuracy(outcomes, span)[-1])
+        self._recent.extend(int(v) for v in outcomes[-self.window:])
+        self._recent_hits = sum(self._recent)
+        self.tasks += len(outcomes)
+
+    @property
+    def rolling(self):
+        """First-try accuracy over the last ``window`` tasks, or None without tasks."""
+        if not self._recent:
+            return None
+        return self._recent_hits / len(self._recent)
+
+    def as_dict(self):
+        """
+        Get the trend for display.
+
+        Returns:
+            dict: recent_accuracy (rolling), trend_accuracy (EWMA) and the
+                number of tasks in the window
+        """
+        return {
+            "recent_accuracy": self.rolling,
+            "trend_accuracy": self.ewma,
+            "recent_tasks": len(self._recent),
+        }
@@ -0,0 +1,102 @@
+"""
+Write-behind buffering for training attempt records.
+"""
+
+import atexit
+import threading
+from src.config import BACKUP_INTERVAL, FLUSH_INTERVAL_SECONDS
+
+
+class BufferedAttemptWriter:
+    """
+    Queues attempt records and appends them to a storage backend in batches.
+
+    Records are flushed from a background thread when the buffer reaches
+    ``batch_size`` records or ``flush_interval`` seconds have passed, and
+    synchronously on ``flush()``/``close()``. A final drain is registered
+    with ``atexit`` so buffered records survive an unexpected shutdown.
+    Once closed, the writer refuses further records.
+    """
+
+    def __init__(self, storage, batch_size=None, flush_interval=None):
+        """
+        Initialize the writer and start its background flush thread.
+
+        Args:
+            storage (StorageBackend): Backend the records are appended to
+            batch_size (int): Number of buffered records that triggers a flush
+            flush_interval (float): Maximum seconds a record stays buffered
+        """
+        self.storage = storage
+        self.batch_size = batch_size or BACKUP_INTERVAL
+        self.flush_interval = flush_interval or FLUSH_INTERVAL_SECONDS
+
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="AttemptWriter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, record):
+        """
+        Queue a record for writing. Never touches the disk.
+
+        Args:
+            record (dict): Attempt record keyed by column name
+
+        Raises:
+            ValueError: If the writer has been closed; nothing would write the record
+        """
+        with self._buffer_lock:
+            if self._closed:
+                raise ValueError("Cannot write to a closed attempt writer")
+            self._buffer.append(record)
+            pending = len(self._buffer)
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def pending(self):
+        """Return the number of records waiting to be written."""
+        with self._buffer_lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """Write all buffered records to disk and wait for completion."""
+        with self._write_lock:
+            with self._buffer_lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            try:
+                self.storage.append(batch)
+            except Exception:
+                # Put the batch back so the next flush retries it
+                with self._buffer_lock:
+                    self._buffer[:0] = batch
+                raise
+
+    def close(self):
+        """Stop the background thread and drain the buffer."""
+        with self._buffer_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        """Background loop flushing on batch size or time interval."""
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing training data: {e}")
@@ -0,0 +1 @@
+"""Training logic that runs without the user interface."""
@@ -0,0 +1,333 @@
+"""
+Choosing which note to play next.
+
+Every MIDI note has a sampling weight kept in a Fenwick tree, so a note
+is drawn and its weight changed in O(log n) rather than by rebuilding
+the distribution for every task. Three modes are supported:
+
+- uniform: every available note is equally likely.
+- adaptive: notes with recent first-try errors and slow responses are
+  drawn more often, and a note's weight doubles for every
+  ADAPTIVE_STALENESS_TASKS tasks it goes unplayed.
+- spaced: a Leitner-style spaced repetition. A note's review interval
+  doubles with each first-try success and resets after an error; notes
+  past their interval are strongly preferred.
+
+Time since a note was last played changes every note's weight on every
+task. Both the adaptive and the spaced weight grow as 2 ** (age / scale),
+so that growth is a common factor: weights are stored relative to an
+epoch task and only the played note's entry changes. The tree is
+rebuilt from the stored state when the epoch is moved forward, which
+happens once every REBASE_FACTOR * scale tasks.
+"""
+
+import math
+import random
+
+from src.config import MIDI_NOTES, SCHEDULER_MODE
+
+SCHEDULER_MODES = ("uniform", "adaptive", "spaced")
+
+# Adaptive mode: error and response time estimates are exponentially
+# weighted over a note's tasks
+ERROR_ALPHA = 0.3
+ERROR_PRIOR = 0.5  # Assumed error rate of a note that was never played
+ERROR_WEIGHT = 4.0
+RESPONSE_ALPHA = 0.3
+RESPONSE_REFERENCE_SECONDS = 3.0
+RESPONSE_WEIGHT = 1.0
+RESPONSE_CAP = 3.0  # Responses slower than this many references count the same
+ADAPTIVE_STALENESS_TASKS = 50
+
+# Spaced mode: a note in box b is due again after SPACED_BASE_TASKS * 2 ** b tasks
+SPACED_BASE_TASKS = 2
+SPACED_MAX_BOX = 6
+SPACED_SCALE_TASKS = 4
+
+# Stored weights are 2 ** exponent with the exponent clamped to this range,
+# which keeps the tree's sums well within double precision
+MAX_EXPONENT = 20
+REBASE_FACTOR = 8
+
+
+class FenwickSampler:
+    """
+    Weighted sampling over a fixed number of items.
+
+    A Fenwick (binary indexed) tree over the weights gives prefix sums,
+    weight updates and inverse-prefix lookups in O(log n).
+    """
+
+    def __init__(self, size):
+        """
+        Initialize the sampler with all weights zero.
+
+        Args:
+            size (int): Number of items
+        """
+        self.size = size
+        self._weights = [0.0] * size
+        self._tree = [0.0] * (size + 1)
+        self._top = 1 << (size.bit_length() - 1) if size else 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def total(self):
+        """Sum of all weights."""
+        return self.prefix_sum(self.size)
+
+    def weight(self, index):
+        """Current weight of an item."""
+        return self._weights[index]
+
+    def prefix_sum(self, count):
+        """
+        Sum the weights of the first ``count`` items.
+
+        Args:
+            count (int): Number of leading items
+
+        Returns:
+            float: Their total weight
+        """
+        total = 0.0
+        tree = self._tree
+        while count > 0:
+            total += tree[count]
+            count &= count - 1
+        return total
+
+    def update(self, index, weight):
+        """
+        Set the weight of one item.
+
+        Args:
+            index (int): Item index
+            weight (float): New non-negative weight
+        """
+        if weight < 0:
+            raise ValueError(f"Weights must be non-negative, got {weight}")
+        delta = weight - self._weights[index]
+        self._weights[index] = weight
+        tree = self._tree
+        i = index + 1
+        while i <= self.size:
+            tree[i] += delta
+            i += i & -i
+
+    def rebuild(self, weights):
+        """
+        Replace all weights in O(n).
+
+        Args:
+            weights (list): Non-negative weight of every item
+        """
+        if len(weights) != self.size:
+            raise ValueError(f"Expected {self.size} weights, got {len(weights)}")
+        self._weights = [float(w) for w in weights]
+        tree = [0.0] + self._weights
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def find(self, target):
+        """
+        Find the item whose share of the cumulative weight contains ``target``.
+
+        Args:
+            target (float): Value in [0, total)
+
+        Returns:
+            int: The first item whose prefix sum exceeds ``target``
+        """
+        position = 0
+        step = self._top
+        tree = self._tree
+        while step:
+            nxt = position + step
+            if nxt <= self.size and tree[nxt] <= target:
+                position = nxt
+                target -= tree[nxt]
+            step >>= 1
+        return position
+
+    def sample(self, rng=random):
+        """
+        Draw an item with probability proportional to its weight.
+
+        Args:
+            rng (random.Random): Source of randomness
+
+        Returns:
+            int: Index of the drawn item
+        """
+        for _ in range(2):
+            total = self.total
+            if total <= 0:
+                raise ValueError("Cannot sample: all weights are zero")
+            index = self.find(rng.random() * total)
+            if index < self.size and self._weights[index] > 0:
+                return index
+            # Rounding in the incremental sums; start again from exact sums
+            self.rebuild(self._weights)
+        raise ValueError("Cannot sample: inconsistent weights")
+
+
+class NoteScheduler:
+    """Picks the next note to train from the available notes."""
+
+    def __init__(self, mode=SCHEDULER_MODE, seed=None):
+        """
+        Initialize the scheduler with no notes available.
+
+        Args:
+            mode (str): One of SCHEDULER_MODES
+            seed (int): Random seed, for reproducible note orders
+        """
+        self._check_mode(mode)
+        self.mode = mode
+        self.rng = random.Random(seed)
+        self.sampler = FenwickSampler(MIDI_NOTES)
+        self.available = [False] * MIDI_NOTES
+        self.errors = [ERROR_PRIOR] * MIDI_NOTES
+        self.responses = [None] * MIDI_NOTES
+        self.boxes = [0] * MIDI_NOTES
+        self.last_seen = [0] * MIDI_NOTES
+        self.tasks = 0
+        self.epoch = 0
+
+    @staticmethod
+    def _check_mode(mode):
+        if mode not in SCHEDULER_MODES:
+            raise ValueError(f"Unknown scheduler mode: {mode} (expected one of {SCHEDULER_MODES})")
+
+    def _scale(self):
+        """Tasks over which an unplayed note's weight doubles."""
+        return ADAPTIVE_STALENESS_TASKS if self.mode == "adaptive" else SPACED_SCALE_TASKS
+
+    def difficulty(self, midi):
+        """
+        Adaptive weight of a note before its staleness is applied.
+
+        Args:
+            midi (int): MIDI note number
+
+        Returns:
+            float: At least 1, higher for error-prone and slow notes
+        """
+        weight = 1.0 + ERROR_WEIGHT * self.errors[midi]
+        response = self.responses[midi]
+        if response is not None:
+            weight += RESPONSE_WEIGHT * min(response / RESPONSE_REFERENCE_SECONDS, RESPONSE_CAP)
+        return weight
+
+    def interval(self, midi):
+        """Tasks after which a note is due again in spaced mode."""
+        return SPACED_BASE_TASKS * 2 ** self.boxes[midi]
+
+    def _stored_weight(self, midi):
+        """A note's weight relative to the epoch."""
+        if not self.available[midi]:
+            return 0.0
+        if self.mode == "uniform":
+            return 1.0
+        age = self.epoch - self.last_seen[midi]
+        if self.mode == "adaptive":
+            exponent = math.log2(self.difficulty(midi)) + age / ADAPTIVE_STALENESS_TASKS
+        else:
+            exponent = (age - self.interval(midi)) / SPACED_SCALE_TASKS
+        return 2.0 ** max(-MAX_EXPONENT, min(MAX_EXPONENT, exponent))
+
+    def _rebuild(self):
+        """Move the epoch to the current task and recompute every weight."""
+        self.epoch = self.tasks
+        self.sampler.rebuild([self._stored_weight(midi) for midi in range(MIDI_NOTES)])
+
+    def set_mode(self, mode):
+        """
+        Switch the scheduling mode; the note history is kept.
+
+        Args:
+            mode (str): One of SCHEDULER_MODES
+        """
+        self._check_mode(mode)
+        self.mode = mode
+        self._rebuild()
+
+    def set_available(self, midi_notes):
+        """
+        Restrict drawing to the given notes.
+
+        Args:
+            midi_notes (iterable): MIDI numbers of the notes in training
+        """
+        self.available = [False] * MIDI_NOTES
+        for midi in midi_notes:
+            self.available[midi] = True
+        self._rebuild()
+
+    def seed(self, correct_midi, first_try_correct):
+        """
+        Replay earlier tasks so the weights reflect the whole history.
+
+        Args:
+            correct_midi (iterable): Note of each task, in play order
+            first_try_correct (iterable): Whether each task's first attempt was correct
+        """
+        for midi, correct in zip(correct_midi, first_try_correct):
+            self.tasks += 1
+            self.last_seen[int(midi)] = self.tasks
+            self._learn(int(midi), bool(correct), None)
+        self._rebuild()
+
+    def next_note(self):
+        """
+        Draw the note for a new task.
+
+        Returns:
+            int: MIDI number of the note
+        """
+        self.tasks += 1
+        if self.mode != "uniform" and self.tasks - self.epoch >= REBASE_FACTOR * self._scale():
+            self._rebuild()
+        midi = self.sampler.sample(self.rng)
+        self.last_seen[midi] = self.tasks
+        self.sampler.update(midi, self._stored_weight(midi))
+        return midi
+
+    def _learn(self, midi, correct, response_seconds):
+        """Update a note's error, response time and review box."""
+        self.errors[midi] += ERROR_ALPHA * ((0.0 if correct else 1.0) - self.errors[midi])
+        if response_seconds is not None:
+            previous = self.responses[midi]
+            self.responses[midi] = (response_seconds if previous is None
+                                    else previous + RESPONSE_ALPHA * (response_seconds - previous))
+        self.boxes[midi] = min(self.boxes[midi] + 1, SPACED_MAX_BOX) if correct else 0
+
+    def record(self, midi, correct, response_seconds=None):
+        """
+        Update a note's weight with the outcome of a task.
+
+        Args:
+            midi (int): MIDI number of the task's note
+            correct (bool): Whether the first attempt was correct
+            response_seconds (float): Time from the note starting to the first guess
+        """
+        self._learn(midi, correct, response_seconds)
+        self.sampler.update(midi, self._stored_weight(midi))
+
+    def probabilities(self):
+        """
+        Current chance of every note being drawn next.
+
+        Returns:
+            list: Probability per MIDI note
+        """
+        total = self.sampler.total
+        if total <= 0:
+            return [0.0] * MIDI_NOTES
+        return [self.sampler.weight(midi) / total for midi in range(MIDI_NOTES)]
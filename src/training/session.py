@@ -0,0 +1,225 @@
+"""
+Headless training session.
+
+TrainingSession holds the state of a training run: the settings, the
+notes in training, the current task and its attempt and play-again
+counts. It picks notes with the scheduler, evaluates guesses, records
+every attempt through the data manager and reports statistics. Audio
+and storage are injected, so the same engine drives the Qt window, a
+script or a simulation; without an audio player nothing is played.
+"""
+
+import time
+
+from src.audio.pitch import midi_grid, note_to_midi
+from src.config import HIGH_OCTAVE, LOW_OCTAVE, NOTES, SCHEDULER_MODE
+from src.data.schema import to_bool_int
+from src.training.scheduler import NoteScheduler
+
+DEFAULT_SETTINGS = {
+    "note_group": "All",
+    "selected_notes": NOTES,
+    "octave_range_low": LOW_OCTAVE,
+    "octave_range_high": HIGH_OCTAVE,
+    "instrument": 1,
+    "scheduler_mode": SCHEDULER_MODE
+}
+
+
+class TrainingSession:
+    """State machine of a training run: start a task, take guesses until one is correct."""
+
+    def __init__(self, data_manager, audio_player=None, settings=None, scheduler=None,
+                 clock=time.monotonic):
+        """
+        Initialize the session and seed the scheduler from earlier tasks.
+
+        Args:
+            data_manager (TrainingDataManager): Records attempts and keeps statistics
+            audio_player (AudioPlayer): Anything with play_note(midi) and
+                set_instrument(number), or None to train silently
+            settings (dict): Settings overriding DEFAULT_SETTINGS
+            scheduler (NoteScheduler): Note scheduler; one is created for the
+                settings' scheduler mode if omitted
+            clock (callable): Monotonic time in seconds, for response times
+        """
+        self.data_manager = data_manager
+        self.audio_player = audio_player
+        self.clock = clock
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.settings.update(settings or {})
+        self.scheduler = scheduler or NoteScheduler(self.settings["scheduler_mode"])
+
+        self.current_note = None
+        self.current_note_name = None
+        self.current_octave = None
+        self.attempt_number = 0
+        self.play_again_count = 0
+        self.task_started = None
+        self.available_notes = []
+        self.notes_by_midi = {}
+
+        self._seed_scheduler()
+        self.apply_settings(self.settings)
+
+    def _seed_scheduler(self):
+        """Replay earlier tasks into the note scheduler."""
+        history = self.data_manager.task_history(columns=["correct_midi", "first_try_correct"])
+        if history is not None and not history.empty:
+            self.scheduler.seed(history["correct_midi"].to_numpy(),
+                                history["first_try_correct"].map(to_bool_int).to_numpy())
+
+    def apply_settings(self, settings):
+        """
+        Change the training settings. Call start_task afterwards.
+
+        Args:
+            settings (dict): Settings to change, keyed like DEFAULT_SETTINGS
+        """
+        self.settings.update(settings)
+        if self.audio_player is not None:
+            self.audio_player.set_instrument(self.settings["instrument"])
+        self.scheduler.set_mode(self.settings["scheduler_mode"])
+        self._update_available_notes()
+
+    def _update_available_notes(self):
+        """Update the list of available notes for training."""
+        notes = self.settings["selected_notes"]
+        octave_low = self.settings["octave_range_low"]
+        octave_high = self.settings["octave_range_high"]
+        grid = midi_grid(notes, octave_low, octave_high) if notes else []
+        self.available_notes = [
+            (note, octave, int(midi_note))
+            for octave, row in zip(range(octave_low, octave_high + 1), grid)
+            for note, midi_note in zip(notes, row)
+        ]
+        self.notes_by_midi = {midi: (note, octave, midi) for note, octave, midi in self.available_notes}
+        self.scheduler.set_available(self.notes_by_midi)
+
+    @property
+    def has_task(self):
+        """Whether a task is waiting for a guess."""
+        return self.current_note is not None
+
+    def start_task(self):
+        """
+        Start a new task and play its note.
+
+        Returns:
+            tuple: (note_name, octave, midi_note) of the task, or None when
+                no notes are available
+        """
+        if not self.available_notes:
+            return None
+
+        self.attempt_number = 0
+        self.play_again_count = 0
+        self.data_manager.start_new_task()
+
+        note_name, octave, midi_note = self.notes_by_midi[self.scheduler.next_note()]
+        self.current_note = midi_note
+        self.current_note_name = note_name
+        self.current_octave = octave
+
+        self._play(midi_note)
+        self.task_started = self.clock()
+        return note_name, octave, midi_note
+
+    def _play(self, midi_note):
+        """Play a note if there is an audio player."""
+        if self.audio_player is not None:
+            self.audio_player.play_note(midi_note)
+
+    def play_again(self):
+        """Play the current note again; counted against the task."""
+        if self.current_note is not None:
+            self._play(self.current_note)
+            self.play_again_count += 1
+
+    def guess(self, note_name, octave):
+        """
+        Evaluate and record a guess for the current task.
+
+        A correct guess finishes the task; start the next one with
+        start_task. Guesses after that raise ValueError.
+
+        Args:
+            note_name (str): Guessed note name
+            octave (int): Guessed octave
+
+        Returns:
+            bool: Whether the guess was correct
+        """
+        if self.current_note is None:
+            raise ValueError("No task in progress; call start_task first")
+
+        guessed_midi = note_to_midi(note_name, octave)
+        self.attempt_number += 1
+        is_correct = guessed_midi == self.current_note
+        if self.attempt_number == 1:
+            self.scheduler.record(self.current_note, is_correct, self.clock() - self.task_started)
+
+        self.data_manager.record_attempt(
+            correct_note_name=self.current_note_name,
+            correct_octave=self.current_octave,
+            correct_midi=self.current_note,
+            guessed_note_name=note_name,
+            guessed_octave=octave,
+            guessed_midi=guessed_midi,
+            is_correct=is_correct,
+            attempt_number=self.attempt_number,
+            play_again_count=self.play_again_count,
+            note_group=self.settings["note_group"],
+            octave_range_low=self.settings["octave_range_low"],
+            octave_range_high=self.settings["octave_range_high"]
+        )
+        if is_correct:
+            self.current_note = None
+        return is_correct
+
+    def weakest_note(self):
+        """
+        Find the available note with the lowest skill estimate.
+
+        Returns:
+            tuple: (note_name, octave, estimate), or None without available notes
+        """
+        weakest = self.data_manager.skill.weakest(self.notes_by_midi)
+        if weakest is None:
+            return None
+        note_name, octave, _ = self.notes_by_midi[weakest[0]]
+        return note_name, octave, weakest[1]
+
+    def stats(self):
+        """
+        Get statistics for the session.
+
+        Returns:
+            dict: Session statistics of the data manager plus 'weakest_note'
+        """
+        stats = self.data_manager.get_session_stats()
+        stats["weakest_note"] = self.weakest_note()
+        return stats
+
+    def status_text(self):
+        """
+        Summarize the session in one line.
+
+        Returns:
+            str: Tasks, first-try accuracy, recent trend and weakest note
+        """
+        stats = self.stats()
+        text = (f"Tasks: {stats['total_tasks']} | "
+                f"First-try correct: {stats['correct_first_try']} | "
+                f"Accuracy: {stats['accuracy']:.1%}")
+        if stats['recent_accuracy'] is not None:
+            text += (f" | Last {stats['recent_tasks']} tasks: {stats['recent_accuracy']:.1%}"
+                     f" | Trend: {stats['trend_accuracy']:.1%}")
+        if stats['weakest_note'] is not None:
+            note_name, octave, estimate = stats['weakest_note']
+            text += f" | Weakest: {note_name}{octave} ({estimate:.0%})"
+        return text
+
+    def close(self):
+        """Write out everything recorded and close the data manager."""
+        self.data_manager.close()
@@ -2,7 +2,6 @@
 Main window for the Perfect Pitch Training application.
 """
 
-import random
 from PyQt5.QtWidgets import (
     QMainWindow, QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton,
     QButtonGroup, QWidget, QLabel, QMenuBar, QAction, QMessageBox,
@@ -15,8 +14,10 @@ from src.config import (
     NOTES, LOW_OCTAVE, HIGH_OCTAVE, NOTE_GROUPS, 
     BUTTON_HEIGHT, BUTTON_WIDTH, APP_NAME
 )
+from src.audio.pitch import midi_grid
 from src.audio.player import AudioPlayer, note_to_midi, midi_to_note
 from src.data.manager import TrainingDataManager
+from src.training.session import TrainingSession
 from src.ui.settings_dialog import SettingsDialog
 
 
@@ -25,10 +26,10 @@ class NoteButton(QPushButton):
     
     noteSelected = pyqtSignal(str, int, int)  # note_name, octave, midi_note
     
-    def __init__(self, note_name, octave, parent=None):
+    def __init__(self, note_name, octave, parent=None, midi_note=None):
         self.note_name = note_name
         self.octave = octave
-        self.midi_note = note_to_midi(note_name, octave)
+        self.midi_note = note_to_midi(note_name, octave) if midi_note is None else midi_note
         
         display_text = f"{note_name}{octave}"
         super().__init__(display_text, parent)
@@ -150,24 +151,10 @@ class MainWindow(QMainWindow):
         self.resize_timer.setSingleShot(True)
         self.resize_timer.timeout.connect(self._on_resize_timeout)
         
-        # Training state
-        self.current_settings = {
-            "note_group": "All",
-            "selected_notes": NOTES.copy(),
-            "octave_range_low": LOW_OCTAVE,
-            "octave_range_high": HIGH_OCTAVE,
-            "instrument": 1
-        }
-        
-        self.current_note = None
-        self.current_note_name = None
-        self.current_octave = None
-        self.attempt_number = 0
-        self.play_again_count = 0
-        self.available_notes = []
+        # Training state lives in the headless session; the window is a view over it
+        self.session = TrainingSession(self.data_manager, self.audio_player)
         
         self._create_ui()
-        self._update_available_notes()
         self._start_new_task()
     
     def _create_ui(self):
@@ -292,9 +279,9 @@ class MainWindow(QMainWindow):
         self.button_group = QButtonGroup(self)
         
         # Calculate grid dimensions: notes per row, octaves as rows
-        selected_notes = self.current_settings["selected_notes"]
-        octave_low = self.current_settings["octave_range_low"]
-        octave_high = self.current_settings["octave_range_high"]
+        selected_notes = self.session.settings["selected_notes"]
+        octave_low = self.session.settings["octave_range_low"]
+        octave_high = self.session.settings["octave_range_high"]
         
         if not selected_notes:
             return
@@ -308,9 +295,10 @@ class MainWindow(QMainWindow):
         self.note_selection_layout.setContentsMargins(10, 10, 10, 10)
         
         # Create buttons organized by octave (rows) and notes (columns)
+        grid = midi_grid(selected_notes, octave_low, octave_high)
         for row, octave in enumerate(range(octave_low, octave_high + 1)):
             for col, note in enumerate(selected_notes):
-                button = NoteButton(note, octave, self)
+                button = NoteButton(note, octave, self, midi_note=int(grid[row, col]))
                 button.noteSelected.connect(self._on_note_guessed)
                 self.note_buttons[(note, octave)] = button
                 self.button_group.addButton(button)
@@ -342,74 +330,33 @@ class MainWindow(QMainWindow):
                 button.playNote.connect(self.audio_player.play_note)
                 self.keyboard_layout.addWidget(button, octave - LOW_OCTAVE, note_idx)
     
-    def _update_available_notes(self):
-        """Update the list of available notes for training."""
-        self.available_notes = []
-        
-        for octave in range(self.current_settings["octave_range_low"],
-                           self.current_settings["octave_range_high"] + 1):
-            for note in self.current_settings["selected_notes"]:
-                midi_note = note_to_midi(note, octave)
-                self.available_notes.append((note, octave, midi_note))
-    
     def _start_new_task(self):
         """Start a new training task."""
-        if not self.available_notes:
+        if self.session.start_task() is None:
             QMessageBox.warning(self, "No Notes Available", 
                               "Please select notes and octave range in settings.")
             return
         
-        # Reset state
-        self.attempt_number = 0
-        self.play_again_count = 0
-        self.data_manager.start_new_task()
-        
-        # Select random note
-        note_name, octave, midi_note = random.choice(self.available_notes)
-        self.current_note = midi_note
-        self.current_note_name = note_name
-        self.current_octave = octave
-        
         # Reset button states
         for button in self.note_buttons.values():
             button.set_enabled_state(True)
         
-        # Play the note
-        self.audio_player.play_note(self.current_note)
         self._update_status()
     
     def _play_current_note(self):
         """Play the current note again."""
-        if self.current_note is not None:
-            self.audio_player.play_note(self.current_note)
-            self.play_again_count += 1
+        self.session.play_again()
     
     def _on_note_guessed(self, guessed_note, guessed_octave, guessed_midi):
         """Handle note guess."""
-        self.attempt_number += 1
-        
-        is_correct = (guessed_note == self.current_note_name and 
-                     guessed_octave == self.current_octave)
-        
-        # Record the attempt
-        self.data_manager.record_attempt(
-            correct_note_name=self.current_note_name,
-            correct_octave=self.current_octave,
-            correct_midi=self.current_note,
-            guessed_note_name=guessed_note,
-            guessed_octave=guessed_octave,
-            guessed_midi=guessed_midi,
-            is_correct=is_correct,
-            attempt_number=self.attempt_number,
-            play_again_count=self.play_again_count,
-            note_group=self.current_settings["note_group"],
-            octave_range_low=self.current_settings["octave_range_low"],
-            octave_range_high=self.current_settings["octave_range_high"]
-        )
+        if not self.session.has_task:
+            return
+        
+        is_correct = self.session.guess(guessed_note, guessed_octave)
         
         if is_correct:
             QMessageBox.information(self, "Correct!", 
-                                  f"Well done! The note was {self.current_note_name}{self.current_octave}")
+                                  f"Well done! The note was {guessed_note}{guessed_octave}")
             self._start_new_task()
         else:
             # Disable the incorrect button
@@ -422,25 +369,20 @@ class MainWindow(QMainWindow):
         dialog = SettingsDialog(self)
         
         # Set current settings in dialog
-        dialog.group_combo.setCurrentText(self.current_settings["note_group"])
-        dialog.octave_low_spin.setValue(self.current_settings["octave_range_low"])
-        dialog.octave_high_spin.setValue(self.current_settings["octave_range_high"])
+        settings = self.session.settings
+        dialog.group_combo.setCurrentText(settings["note_group"])
+        dialog.octave_low_spin.setValue(settings["octave_range_low"])
+        dialog.octave_high_spin.setValue(settings["octave_range_high"])
+        dialog.set_scheduler_mode(settings["scheduler_mode"])
         
         if dialog.exec_() == QDialog.Accepted:
-            self.current_settings = dialog.get_settings()
-            self.audio_player.set_instrument(self.current_settings["instrument"])
-            
-            self._update_available_notes()
+            self.session.apply_settings(dialog.get_settings())
             self._create_note_buttons()
             self._start_new_task()
     
     def _update_status(self):
         """Update the status bar."""
-        stats = self.data_manager.get_session_stats()
-        status_text = (f"Tasks: {stats['total_tasks']} | "
-                      f"First-try correct: {stats['correct_first_try']} | "
-                      f"Accuracy: {stats['accuracy']:.1%}")
-        self.status_bar.showMessage(status_text)
+        self.status_bar.showMessage(self.session.status_text())
     
     def _export_session_data(self):
         """Export current session data."""
@@ -475,5 +417,6 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Handle application close."""
+        self.session.close()
         self.audio_player.cleanup()
         event.accept()
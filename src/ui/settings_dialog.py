@@ -8,7 +8,9 @@ from PyQt5.QtWidgets import (
     QGroupBox, QSlider
 )
 from PyQt5.QtCore import Qt
+from src.audio.pitch import canonical_name
 from src.config import NOTE_GROUPS, LOW_OCTAVE, HIGH_OCTAVE, NOTES
+from src.training.scheduler import SCHEDULER_MODES
 
 
 class SettingsDialog(QDialog):
@@ -98,6 +100,24 @@ class SettingsDialog(QDialog):
         instrument_box.setLayout(instrument_layout)
         layout.addWidget(instrument_box)
         
+        # Practice Order
+        scheduler_box = QGroupBox("Practice Order")
+        scheduler_layout = QVBoxLayout()
+        
+        self.scheduler_combo = QComboBox()
+        scheduler_names = {
+            "uniform": "Uniform (every note equally often)",
+            "adaptive": "Adaptive (focus on missed and slow notes)",
+            "spaced": "Spaced repetition"
+        }
+        for mode in SCHEDULER_MODES:
+            self.scheduler_combo.addItem(scheduler_names[mode], mode)
+        
+        scheduler_layout.addWidget(QLabel("Select Practice Order:"))
+        scheduler_layout.addWidget(self.scheduler_combo)
+        scheduler_box.setLayout(scheduler_layout)
+        layout.addWidget(scheduler_box)
+        
         # Buttons
         button_layout = QHBoxLayout()
         self.ok_button = QPushButton("OK")
@@ -128,7 +148,8 @@ class SettingsDialog(QDialog):
                 checkbox.setEnabled(True)
         else:
             # Update checkboxes based on selected group
-            selected_notes = NOTE_GROUPS.get(group_name, NOTES)
+            # Flat spellings tick the checkbox of the same sharp note
+            selected_notes = {canonical_name(note) for note in NOTE_GROUPS.get(group_name, NOTES)}
             for note, checkbox in self.note_checkboxes.items():
                 checkbox.setChecked(note in selected_notes)
                 checkbox.setEnabled(False)
@@ -167,6 +188,17 @@ class SettingsDialog(QDialog):
         self.octave_range_low = self.octave_low_spin.value()
         self.octave_range_high = self.octave_high_spin.value()
     
+    def set_scheduler_mode(self, mode):
+        """
+        Select a scheduler mode in the practice order combo box.
+        
+        Args:
+            mode (str): One of SCHEDULER_MODES
+        """
+        index = self.scheduler_combo.findData(mode)
+        if index >= 0:
+            self.scheduler_combo.setCurrentIndex(index)
+    
     def get_settings(self):
         """
         Get the current settings.
@@ -179,5 +211,6 @@ class SettingsDialog(QDialog):
             "selected_notes": self.selected_notes,
             "octave_range_low": self.octave_range_low,
             "octave_range_high": self.octave_range_high,
-            "instrument": self.instrument_combo.currentData()
+            "instrument": self.instrument_combo.currentData(),
+            "scheduler_mode": self.scheduler_combo.currentData()
         }
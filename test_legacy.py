@@ -0,0 +1,58 @@
+"""
+Tests for the legacy data importer.
+"""
+
+from src.data.legacy import import_legacy_file
+from src.data.storage import CsvStorage
+
+LEGACY_V1 = """CorrectNote,SelectedNote,PlayAgainCount,time
+61,4,0,12:01
+61,1,1,12:05
+50,2,0,12:09
+55,3,0,12:14
+55,7,2,12:20
+"""
+
+
+def test_reimport_skips_imported_attempts(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text(LEGACY_V1)
+    storage = CsvStorage(tmp_path / "training_data.csv")
+
+    assert import_legacy_file(source, storage) == (5, 0)
+    assert import_legacy_file(source, storage) == (0, 5)
+
+    df = storage.read_all()
+    storage.close()
+    assert len(df) == 5
+    assert not df.duplicated(["session_id", "task_id", "attempt_number"]).any()
+    assert df.groupby("task_id")["is_correct"].sum().eq(1).all()
+
+
+def test_interrupted_import_is_completed(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text(LEGACY_V1)
+    storage = CsvStorage(tmp_path / "training_data.csv")
+
+    # The import stopped after its first chunk of two rows
+    class Interrupted(Exception):
+        pass
+
+    append_frame = storage.append_frame
+
+    def append_once(df):
+        append_frame(df)
+        raise Interrupted
+
+    storage.append_frame = append_once
+    try:
+        import_legacy_file(source, storage, chunksize=2)
+    except Interrupted:
+        pass
+    storage.append_frame = append_frame
+
+    assert import_legacy_file(source, storage, chunksize=2) == (3, 2)
+    df = storage.read_all()
+    storage.close()
+    assert len(df) == 5
+    assert not df.duplicated(["session_id", "task_id", "attempt_number"]).any()
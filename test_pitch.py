@@ -0,0 +1,32 @@
+"""
+Tests for the pitch tables and frequency conversions.
+"""
+
+import numpy as np
+
+from src.audio import pitch
+
+
+def test_frequency_conversions_round_trip_with_note_frequency():
+    names = list(pitch.NOTE_OFFSETS)
+    for octave in range(1, 9):
+        midi = np.array([pitch.note_to_midi(name, octave) for name in names])
+        hz = np.array([pitch.note_frequency(name, octave) for name in names])
+        np.testing.assert_allclose(pitch.midi_to_hz(midi), hz)
+        np.testing.assert_allclose(pitch.hz_to_midi(hz), midi)
+        np.testing.assert_allclose(pitch.midi_to_frequencies(midi), hz)
+
+
+def test_trainer_numbering_puts_concert_a_in_octave_five():
+    assert pitch.note_to_midi("A", 4) == 57
+    assert pitch.note_frequency("A", 4) == 220.0
+    assert pitch.note_frequency("A", 5) == 440.0
+    assert round(float(pitch.hz_to_midi(440.0))) == pitch.note_to_midi("A", 5)
+
+
+def test_cents_between_matches_cents_distance():
+    correct = np.array([57, 60, 61])
+    guessed = np.array([69, 59, 61.5])
+    cents = pitch.cents_between(pitch.midi_to_hz(correct), pitch.midi_to_hz(guessed))
+    np.testing.assert_allclose(cents, pitch.cents_distance(correct, guessed))
+    np.testing.assert_allclose(cents, [1200, -100, 50])
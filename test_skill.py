@@ -0,0 +1,29 @@
+"""
+Tests for the per-note skill model.
+"""
+
+import numpy as np
+
+from src.data.skill import SkillModel
+
+
+def test_concurrent_saves_keep_both_updates(tmp_path):
+    path = tmp_path / "training_data.csv.skill.npy"
+    SkillModel().save(path)
+
+    # Two trainers on the same store, each with its own copy of the model
+    first = SkillModel.load(path)
+    second = SkillModel.load(path)
+    first.update(57, True, 1000.0)
+    second.update(60, False, 1001.0)
+    first.save(path)
+    second.save(path)
+
+    successes, failures = SkillModel.load(path).evidence(now=1001.0)
+    assert successes[57] > 0.99 and failures[60] == 1.0
+    np.testing.assert_array_equal(second.state, np.load(path))
+
+    # Saving again does not apply the same attempts twice
+    second.save(path)
+    _, failures = SkillModel.load(path).evidence(now=1001.0)
+    assert failures[60] == 1.0
@@ -0,0 +1,94 @@
+"""
+Tests for reading attempt stores.
+"""
+
+import uuid
+
+import pytest
+
+from src.data.partitions import PartitionedStorage
+from src.data.storage import BinaryStorage, CsvStorage
+from src.data.writer import BufferedAttemptWriter
+
+
+def attempt(session_id, task_id, attempt_number, is_correct):
+    """One attempt record as the trainer writes it."""
+    return {
+        "session_id": session_id, "task_id": task_id,
+        "timestamp": f"2026-01-05T10:00:0{attempt_number}",
+        "correct_note_name": "A", "correct_octave": 4, "correct_midi": 57,
+        "guessed_note_name": "A" if is_correct else "G", "guessed_octave": 4,
+        "guessed_midi": 57 if is_correct else 55, "is_correct": is_correct,
+        "attempt_number": attempt_number, "play_again_count": 0,
+        "note_group": "All", "octave_range_low": 3, "octave_range_high": 5,
+    }
+
+
+def test_torn_line_is_skipped(tmp_path):
+    path = tmp_path / "training_data.csv"
+    storage = CsvStorage(path)
+    storage.append([attempt("s1", "t1", 1, False)])
+    # A crash in the middle of an append left part of a row behind
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("s1,t1,2026-01-05T10:00:02,A,4,5")
+    storage.append([attempt("s1", "t1", 2, True)])
+
+    df = storage.read_all()
+    assert df["attempt_number"].tolist() == [1, 2]
+    assert df["is_correct"].tolist() == [False, True]
+    assert df["correct_midi"].dtype == "int16"
+    assert df["is_correct"].dtype == bool
+
+    assert storage.read_session("s1")["attempt_number"].tolist() == [1, 2]
+    chunks = list(storage.iter_chunks(chunksize=2, columns=["task_id", "is_correct"]))
+    assert sum(len(chunk) for chunk in chunks) == 2
+    assert list(chunks[0].columns) == ["task_id", "is_correct"]
+    rows, _ = storage.read_after(None)
+    assert len(rows) == 2
+    storage.close()
+
+
+def test_binary_store_keeps_flat_spellings(tmp_path):
+    storage = BinaryStorage(tmp_path / "training_data.bin")
+    session_id, task_id = str(uuid.uuid4()), str(uuid.uuid4())
+    record = attempt(session_id, task_id, 1, False)
+    record.update(correct_note_name="B♭", correct_midi=58, guessed_note_name="A#", guessed_midi=58)
+    storage.append([record])
+
+    df = storage.read_all()
+    storage.close()
+    assert df["correct_note_name"].tolist() == ["B♭"]
+    assert df["guessed_note_name"].tolist() == ["A#"]
+
+
+def test_task_across_month_end_stays_in_one_partition(tmp_path):
+    storage = PartitionedStorage(tmp_path / "partitions")
+    session_id, task_id = str(uuid.uuid4()), str(uuid.uuid4())
+    first = attempt(session_id, task_id, 1, False)
+    first["timestamp"] = "2026-01-31T23:59:50"
+    second = attempt(session_id, task_id, 2, True)
+    second["timestamp"] = "2026-02-01T00:00:05"
+    storage.append([first])
+    # A fresh store object has no memory of the first append
+    storage = PartitionedStorage(tmp_path / "partitions")
+    storage.append([second])
+    assert sorted(storage.partitions) == ["2026-01"]
+
+    storage.rollup("2026-02")
+    tasks = storage.read_rolled_up()
+    storage.close()
+    assert tasks["task_id"].tolist() == [task_id]
+    assert tasks[["attempts", "attempts_to_correct"]].values.tolist() == [[2, 2]]
+
+
+def test_closed_writer_refuses_records(tmp_path):
+    storage = CsvStorage(tmp_path / "training_data.csv")
+    writer = BufferedAttemptWriter(storage, batch_size=10)
+    writer.write(attempt("s1", "t1", 1, True))
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.write(attempt("s1", "t2", 1, True))
+
+    assert writer.pending() == 0
+    assert storage.read_all()["task_id"].tolist() == ["t1"]
+    storage.close()
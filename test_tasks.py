@@ -0,0 +1,125 @@
+"""
+Tests for the task fact table.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from analytics.aggregates import partial_aggregates, stream_aggregates
+from src.data.legacy import import_legacy_file
+from src.data.manager import TrainingDataManager
+from src.data.schema import parse_timestamps
+from src.data.storage import CsvStorage
+from src.data.tasks import (TaskFactStore, check_task_facts, derive_task_facts, read_task_table,
+                            task_facts_path)
+
+# (correct note, octave, guesses) of each task; the last one is left unanswered
+TASKS = [
+    ("A", 4, [("A", 4)]),
+    ("C#", 3, [("D", 3), ("C", 3), ("C#", 3)]),
+    ("E", 5, [("E", 4), ("E", 5)]),
+    ("G", 4, [("F", 4)]),
+]
+
+NOTE_MIDI = {"C": 0, "C#": 1, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9}
+
+
+def record_tasks(manager):
+    """Play TASKS through the manager."""
+    for note, octave, guesses in TASKS:
+        manager.start_new_task()
+        for number, (guess, guess_octave) in enumerate(guesses, start=1):
+            manager.record_attempt(
+                note, octave, NOTE_MIDI[note] + octave * 12,
+                guess, guess_octave, NOTE_MIDI[guess] + guess_octave * 12,
+                (guess, guess_octave) == (note, octave), number, number - 1,
+                "All", 3, 5)
+
+
+def test_recorded_table_equals_derived_facts(tmp_path):
+    manager = TrainingDataManager(str(tmp_path / "training_data.csv"), backend="csv")
+    record_tasks(manager)
+    manager.close()
+
+    storage = CsvStorage(tmp_path / "training_data.csv")
+    recorded = TaskFactStore(task_facts_path(storage.path)).read()
+    derived = derive_task_facts(storage.read_all())
+    storage.close()
+
+    assert len(recorded) == len(TASKS)
+    pd.testing.assert_frame_equal(recorded.astype(str), derived.astype(str), check_dtype=False)
+
+
+def test_check_does_not_create_missing_table(tmp_path):
+    storage = CsvStorage(tmp_path / "training_data.csv")
+    problems = check_task_facts(storage)
+    storage.close()
+
+    assert len(problems) == 1 and "missing" in problems[0]
+    assert not os.path.exists(task_facts_path(storage.path))
+
+
+def test_table_behind_imported_attempts_is_rebuilt(tmp_path):
+    path = str(tmp_path / "training_data.csv")
+    manager = TrainingDataManager(path, backend="csv")
+    record_tasks(manager)
+    manager.close()
+
+    legacy = tmp_path / "data.csv"
+    legacy.write_text("CorrectNote,SelectedNote,PlayAgainCount,time\n61,4,0,12:01\n50,2,0,12:09\n")
+    storage = CsvStorage(path)
+    import_legacy_file(legacy, storage)
+    assert check_task_facts(storage)
+    storage.close()
+
+    TrainingDataManager(path, backend="csv").close()
+    storage = CsvStorage(path)
+    assert check_task_facts(storage) == []
+    storage.close()
+
+
+def test_task_table_counts_attempts_on_their_own_day(tmp_path):
+    path = str(tmp_path / "training_data.csv")
+    storage = CsvStorage(path)
+    for number, timestamp in enumerate(["2026-01-05T23:59:40", "2026-01-06T00:00:10"], start=1):
+        storage.append([{
+            "session_id": "s1", "task_id": "t1", "timestamp": timestamp,
+            "correct_note_name": "A", "correct_octave": 4, "correct_midi": 57,
+            "guessed_note_name": "A" if number == 2 else "G", "guessed_octave": 4,
+            "guessed_midi": 57 if number == 2 else 55, "is_correct": number == 2,
+            "attempt_number": number, "play_again_count": 0,
+            "note_group": "All", "octave_range_low": 3, "octave_range_high": 5,
+        }])
+    storage.close()
+    # Opening the manager builds the task table
+    TrainingDataManager(path, backend="csv").close()
+
+    storage = CsvStorage(path)
+    assert read_task_table(storage) is not None
+    streamed = stream_aggregates(storage)["daily"]
+    df = storage.read_all()
+    df["timestamp"] = parse_timestamps(df["timestamp"])
+    loaded = partial_aggregates(df)["daily"]
+    storage.close()
+
+    assert len(streamed) == 2
+    pd.testing.assert_frame_equal(streamed, loaded, check_dtype=False)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_trainers_draw_different_task_ids(tmp_path):
+    manager = TrainingDataManager(str(tmp_path / "training_data.csv"), backend="csv")
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write_end, manager.start_new_task().encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    child_id = os.read(read_end, 64).decode()
+    os.close(read_end)
+    os.close(write_end)
+    parent_id = manager.start_new_task()
+    manager.close()
+    assert child_id != parent_id